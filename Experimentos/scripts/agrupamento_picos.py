@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agrupamento de picos por comprimento de onda, sem a matriz N x N de distâncias.
+
+Os picos detectados em todas as amostras de uma série temporal são agrupados
+pelo comprimento de onda, que é uma grandeza 1D. Ordenados os N picos, toda
+lacuna maior que a tolerância entre vizinhos separa grupos: nenhum método
+de ligação (simples, média, completa) junta dois picos através dela abaixo
+da tolerância. Métodos disponíveis:
+
+    "media"       -> mesmo particionamento do ``linkage(method="average")`` +
+                     ``fcluster(t=tolerancia_nm, criterion="distance")``.
+                     Ordena, corta nas lacunas e só roda a ligação média dentro
+                     dos segmentos mais largos que a tolerância (segmentos
+                     estreitos já são um grupo só). Dentro de um segmento, a
+                     ligação roda sobre os comprimentos de onda distintos,
+                     ponderados pela multiplicidade: como os picos caem na
+                     grade de pixels do espectro, milhares de picos viram
+                     poucas centenas de valores. Como a ligação média não tem
+                     inversões, o resultado é o da ligação sobre todos os
+                     picos; só empates exatos de distância (que tornam a
+                     própria ligação dependente da ordem dos dados) podem ser
+                     desfeitos de outro modo.
+                     Custo: O(N log N) da ordenação + O(U²) em tempo e memória
+                     por segmento largo, onde U é o número de valores
+                     distintos do segmento. U é pequeno com picos na grade de
+                     pixels, mas não com comprimentos de onda sub-pixel
+                     (``picos_matriz``) ou calibrações diferentes por arquivo:
+                     acima de ``max_valores`` (padrão ``MAX_VALORES_MEDIA``)
+                     os valores do segmento são agrupados em ``max_valores``
+                     faixas de mesma largura (cada uma representada pela
+                     média dos seus picos) antes da ligação, com aviso. Com
+                     faixas muito mais estreitas que a tolerância o
+                     particionamento é praticamente o mesmo.
+    "lacunas"     -> só os cortes nas lacunas (equivale à ligação simples);
+                     O(N log N) mesmo quando há regiões largas e densas.
+    "hierarquico" -> ``pdist`` + ``linkage`` + ``fcluster`` sobre todos os
+                     picos, como antes: O(N²) em memória, para validar os
+                     outros métodos em entradas pequenas (reproduz também a
+                     numeração dos grupos).
+
+Nos métodos "media" e "lacunas" os grupos são numerados de 1 em diante em
+ordem crescente de comprimento de onda.
+"""
+
+import numpy as np
+
+
+METODOS_AGRUPAMENTO = ("media", "lacunas", "hierarquico")
+
+# Valores distintos por segmento acima dos quais "media" agrupa os valores em faixas
+# (matriz U x U de ~200 MB; o ThorLabs tem 4096 pixels)
+MAX_VALORES_MEDIA = 5000
+
+
+def _ligacao_media(wl, tolerancia_nm):
+    from scipy.cluster.hierarchy import linkage, fcluster
+    from scipy.spatial.distance import pdist
+    if wl.size == 1:
+        return np.ones(1, dtype=int)
+    return fcluster(linkage(pdist(wl.reshape(-1, 1)), method="average"), t=tolerancia_nm, criterion="distance")
+
+
+def _ligacao_media_ponderada(valores, pesos, tolerancia_nm):
+    """
+    Ligação média (UPGMA) por cadeia de vizinhos mais próximos sobre ``valores``
+    distintos, cada um valendo ``pesos`` picos.
+
+    Returns:
+        Representante do grupo de cada valor (fusões de altura <= ``tolerancia_nm``)
+    """
+    u = len(valores)
+    distancias = np.abs(valores[:, np.newaxis] - valores[np.newaxis, :])
+    np.fill_diagonal(distancias, np.inf)
+    tamanhos = pesos.astype(float)
+    pai = np.arange(u)
+    ativos = np.ones(u, dtype=bool)
+    cadeia = []
+    for _ in range(u - 1):
+        if not cadeia:
+            cadeia.append(int(np.argmax(ativos)))
+        while True:
+            x = cadeia[-1]
+            y, minimo = (cadeia[-2], distancias[x, cadeia[-2]]) if len(cadeia) > 1 else (-1, np.inf)
+            candidato = int(np.argmin(distancias[x]))
+            if distancias[x, candidato] < minimo:
+                y, minimo = candidato, distancias[x, candidato]
+            if len(cadeia) > 1 and y == cadeia[-2]:
+                break
+            cadeia.append(y)
+        cadeia.pop()
+        cadeia.pop()
+        # Vizinhos recíprocos x e y: o grupo fundido fica no índice y (Lance-Williams da média)
+        if minimo <= tolerancia_nm:
+            pai[x] = y
+        fundido = (tamanhos[x] * distancias[x] + tamanhos[y] * distancias[y]) / (tamanhos[x] + tamanhos[y])
+        distancias[y, :] = fundido
+        distancias[:, y] = fundido
+        distancias[y, y] = np.inf
+        distancias[x, :] = np.inf
+        distancias[:, x] = np.inf
+        tamanhos[y] += tamanhos[x]
+        ativos[x] = False
+    # Cada índice aponta para o grupo em que foi fundido; segue até a raiz
+    while True:
+        proximo = pai[pai]
+        if np.array_equal(proximo, pai):
+            return pai
+        pai = proximo
+
+
+def agrupar_comprimentos(wl_nm, tolerancia_nm, metodo="media", max_valores=MAX_VALORES_MEDIA):
+    """
+    Args:
+        wl_nm: Comprimento de onda de cada pico (qualquer ordem)
+        tolerancia_nm: Distância de corte, como o ``t`` do ``fcluster``
+        metodo: Um de ``METODOS_AGRUPAMENTO``
+        max_valores: No método "media", máximo de valores distintos por
+            segmento largo; acima disso os valores são agrupados em
+            ``max_valores`` faixas antes da ligação (None = sem limite)
+
+    Returns:
+        Array de inteiros (>= 1) com o grupo de cada pico, na ordem de ``wl_nm``
+    """
+    if metodo not in METODOS_AGRUPAMENTO:
+        raise ValueError(f"Método de agrupamento desconhecido: {metodo}. Use um de {METODOS_AGRUPAMENTO}.")
+    wl = np.asarray(wl_nm, dtype=float).ravel()
+    n = wl.size
+    if n == 0:
+        return np.zeros(0, dtype=int)
+    if metodo == "hierarquico":
+        return _ligacao_media(wl, tolerancia_nm)
+
+    ordem = np.argsort(wl, kind="stable")
+    ordenado = wl[ordem]
+    cortes = np.flatnonzero(np.diff(ordenado) > tolerancia_nm) + 1
+
+    if metodo == "lacunas":
+        passo = np.zeros(n, dtype=int)
+        passo[cortes] = 1
+        rotulos_ordenados = 1 + np.cumsum(passo)
+    else:
+        rotulos_ordenados = np.empty(n, dtype=int)
+        proximo = 1
+        faixas = []
+        for inicio, fim in zip(np.r_[0, cortes], np.r_[cortes, n]):
+            segmento = ordenado[inicio:fim]
+            if segmento[-1] - segmento[0] <= tolerancia_nm:
+                rotulos_ordenados[inicio:fim] = proximo
+                proximo += 1
+                continue
+            # Segmento largo: ligação média sobre os valores distintos; subgrupos numerados na ordem do comprimento de onda
+            valores, indice_valor, pesos = np.unique(segmento, return_inverse=True, return_counts=True)
+            if max_valores is not None and len(valores) > max_valores:
+                # Faixas de mesma largura; cada faixa ocupada vira um valor (média dos picos, peso = contagem)
+                passo = (segmento[-1] - segmento[0]) / max_valores
+                faixa = np.minimum(((segmento - segmento[0]) / passo).astype(np.int64), max_valores - 1)
+                ocupadas, indice_valor, pesos = np.unique(faixa, return_inverse=True, return_counts=True)
+                valores = np.bincount(indice_valor, weights=segmento) / pesos
+                faixas.append(passo)
+            raizes = _ligacao_media_ponderada(valores, pesos, tolerancia_nm)
+            _, primeiros, inverso = np.unique(raizes, return_index=True, return_inverse=True)
+            posicao = np.argsort(np.argsort(primeiros))
+            rotulos_ordenados[inicio:fim] = proximo + posicao[inverso][indice_valor]
+            proximo += len(primeiros)
+        if faixas:
+            print(f"[WARNING] Agrupamento 'media': {len(faixas)} segmento(s) com mais de {max_valores} comprimentos "
+                  f"de onda distintos; valores agrupados em faixas de até {max(faixas):.4f} nm antes da ligação.")
+
+    rotulos = np.empty(n, dtype=int)
+    rotulos[ordem] = rotulos_ordenados
+    return rotulos
@@ -8,36 +8,15 @@ Detecta e analisa picos em espectros experimentais.
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.signal import find_peaks
-from scipy.cluster.hierarchy import linkage, fcluster
 from pathlib import Path
 import os
 from collections import defaultdict
+from functools import partial
 import pandas as pd
 
-
-def carregar_espectro(arquivo_spectrum):
-    """
-    Carrega dados de espectro do arquivo .txt.
-    
-    Args:
-        arquivo_spectrum: Caminho para o arquivo spectrum*.txt
-        
-    Returns:
-        wl: Array de comprimentos de onda em nanômetros
-        intensity: Array de intensidades
-    """
-    # Lê o arquivo
-    dados = np.loadtxt(arquivo_spectrum, delimiter=';')
-    
-    # Primeira coluna: comprimento de onda em metros (notação científica)
-    # Segunda coluna: intensidade
-    wl_metros = dados[:, 0]
-    intensity = dados[:, 1]
-    
-    # Converte de metros para nanômetros
-    wl = wl_metros * 1e9  # 1 metro = 1e9 nanômetros
-    
-    return wl, intensity
+from espectro_io import carregar_espectro, configurar_cache, resumo_cache
+from processamento_paralelo import mapear_arquivos
+from agrupamento_picos import agrupar_comprimentos, METODOS_AGRUPAMENTO
 
 
 def detectar_picos(wl, intensity, prominence=5, distance=None, height=None):
@@ -166,12 +145,33 @@ def analisar_amostra_livre(pasta_amostra_livre=None):
     }
 
 
-def processar_todos_espectros_temporais(pasta_temporal=None):
+def processar_espectro(arquivo, prominence=5, distance=None):
+    """
+    Carrega um espectro e detecta seus picos (tarefa de ``processar_todos_espectros_temporais``,
+    executada em outro processo quando ``jobs`` != 1).
+    
+    Returns:
+        Dicionário com wl, intensity, peaks, peak_wl, peak_intensity e info
+    """
+    wl, intensity = carregar_espectro(arquivo)
+    peaks, peak_wl, peak_intensity, info = detectar_picos(wl, intensity, prominence=prominence, distance=distance)
+    return {
+        'wl': wl,
+        'intensity': intensity,
+        'peaks': peaks,
+        'peak_wl': peak_wl,
+        'peak_intensity': peak_intensity,
+        'info': info
+    }
+
+
+def processar_todos_espectros_temporais(pasta_temporal=None, jobs=1):
     """
     Processa todos os espectros temporais e detecta picos em cada um.
     
     Args:
         pasta_temporal: Caminho para a pasta Temporal (opcional)
+        jobs: Processos para ler e detectar picos em paralelo (1 = serial, 0 = todos os núcleos)
         
     Returns:
         Lista de dicionários com resultados de cada espectro
@@ -193,32 +193,19 @@ def processar_todos_espectros_temporais(pasta_temporal=None):
     print(f"[INFO] Encontrados {len(arquivos_spectrum)} arquivos de espectro")
     print(f"[INFO] Processando todos os espectros...\n")
     
+    processar = partial(processar_espectro, prominence=5)
+    
     resultados_todos = []
     
-    for idx, arquivo in enumerate(arquivos_spectrum):
+    for idx, (arquivo, resultado, erro) in enumerate(mapear_arquivos(arquivos_spectrum, processar, jobs)):
         if (idx + 1) % 10 == 0:
             print(f"  Processando {idx + 1}/{len(arquivos_spectrum)}...")
         
-        try:
-            # Carrega dados
-            wl, intensity = carregar_espectro(arquivo)
-            
-            # Detecta picos
-            peaks, peak_wl, peak_intensity, info = detectar_picos(wl, intensity, prominence=5)
-            
-            resultados_todos.append({
-                'arquivo': arquivo.name,
-                'indice': idx,
-                'wl': wl,
-                'intensity': intensity,
-                'peaks': peaks,
-                'peak_wl': peak_wl,
-                'peak_intensity': peak_intensity,
-                'info': info
-            })
-        except Exception as e:
-            print(f"  [ERRO] Erro ao processar {arquivo.name}: {str(e)[:100]}")
+        if erro is not None:
+            print(f"  [ERRO] Erro ao processar {arquivo.name}: {erro[:100]}")
             continue
+        
+        resultados_todos.append({'arquivo': arquivo.name, 'indice': idx, **resultado})
     
     print(f"\n[OK] {len(resultados_todos)} espectros processados com sucesso")
     return resultados_todos
@@ -242,7 +229,7 @@ def identificar_cor_pico(wl_medio):
         return ("Vermelho", "red")
 
 
-def agrupar_picos_correspondentes(resultados_todos, tolerancia_nm=5.0):
+def agrupar_picos_correspondentes(resultados_todos, tolerancia_nm=5.0, metodo="media"):
     """
     Agrupa picos correspondentes entre diferentes amostras usando clustering.
     Identifica os 3 picos principais RGB.
@@ -250,6 +237,7 @@ def agrupar_picos_correspondentes(resultados_todos, tolerancia_nm=5.0):
     Args:
         resultados_todos: Lista de resultados de cada espectro
         tolerancia_nm: Tolerância em nm para considerar picos como correspondentes
+        metodo: Método de agrupamento ("media", "lacunas" ou "hierarquico"; ver agrupamento_picos)
         
     Returns:
         Dicionário com grupos de picos: {grupo_id: [lista de (amostra_idx, peak_wl, peak_intensity)]}
@@ -271,18 +259,9 @@ def agrupar_picos_correspondentes(resultados_todos, tolerancia_nm=5.0):
         print("[ERRO] Nenhum pico encontrado em nenhuma amostra")
         return None
     
-    # Usa clustering hierárquico para agrupar picos por comprimento de onda
+    # Agrupa por comprimento de onda: ordenação + ligação média só onde é preciso (ver agrupamento_picos)
     wl_array = np.array([p['wl'] for p in todos_picos])
-    
-    # Calcula matriz de distâncias
-    from scipy.spatial.distance import pdist, squareform
-    distancias = pdist(wl_array.reshape(-1, 1))
-    
-    # Clustering hierárquico
-    linkage_matrix = linkage(distancias, method='average')
-    
-    # Agrupa com threshold baseado na tolerância
-    grupos = fcluster(linkage_matrix, t=tolerancia_nm, criterion='distance')
+    grupos = agrupar_comprimentos(wl_array, tolerancia_nm, metodo)
     
     # Organiza picos por grupo
     grupos_picos = defaultdict(list)
@@ -645,13 +624,15 @@ def gerar_graficos_estatisticos(grupos_picos, estatisticas_df, pasta_output):
     print(f"[OK] Todos os graficos salvos em: {pasta_output}")
 
 
-def analise_estatistica_temporal(pasta_temporal=None, tolerancia_nm=5.0):
+def analise_estatistica_temporal(pasta_temporal=None, tolerancia_nm=5.0, jobs=1, agrupamento="media"):
     """
     Realiza análise estatística completa dos dados temporais.
     
     Args:
         pasta_temporal: Caminho para a pasta Temporal (opcional)
         tolerancia_nm: Tolerância para agrupar picos correspondentes (nm)
+        jobs: Processos para ler e detectar picos em paralelo (1 = serial, 0 = todos os núcleos)
+        agrupamento: Método de agrupamento dos picos (ver agrupamento_picos)
     """
     print("=" * 70)
     print("Análise Estatística Temporal - OSA Visível")
@@ -659,7 +640,7 @@ def analise_estatistica_temporal(pasta_temporal=None, tolerancia_nm=5.0):
     print()
     
     # Processa todos os espectros
-    resultados_todos = processar_todos_espectros_temporais(pasta_temporal)
+    resultados_todos = processar_todos_espectros_temporais(pasta_temporal, jobs=jobs)
     
     if resultados_todos is None or len(resultados_todos) == 0:
         print("[ERRO] Nenhum espectro processado")
@@ -669,7 +650,7 @@ def analise_estatistica_temporal(pasta_temporal=None, tolerancia_nm=5.0):
     print(f"\n[INFO] Total de amostras processadas: {num_amostras}")
     
     # Agrupa picos correspondentes
-    grupos_picos = agrupar_picos_correspondentes(resultados_todos, tolerancia_nm=tolerancia_nm)
+    grupos_picos = agrupar_picos_correspondentes(resultados_todos, tolerancia_nm=tolerancia_nm, metodo=agrupamento)
     
     if grupos_picos is None:
         print("[ERRO] Falha ao agrupar picos")
@@ -746,19 +727,28 @@ def main():
     parser.add_argument('--temporal', action='store_true', help='Análise estatística temporal')
     parser.add_argument('--amostra-livre', action='store_true', help='Análise de amostra livre')
     parser.add_argument('--tolerancia', type=float, default=5.0, help='Tolerância para agrupar picos (nm)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Processos para ler e detectar picos em paralelo (0 = todos os núcleos; padrão: 1)')
+    parser.add_argument('--agrupamento', choices=METODOS_AGRUPAMENTO, default='media',
+                        help='Agrupamento dos picos: media (ligação média, padrão), lacunas ou hierarquico (pdist + linkage, só para validar)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Converte todos os arquivos de novo, sem usar nem gravar o cache de espectros (ver espectro_io)')
     
     args = parser.parse_args()
+    configurar_cache(ativo=not args.no_cache)
     
     if args.temporal:
         # Análise estatística temporal
-        resultados = analise_estatistica_temporal(tolerancia_nm=args.tolerancia)
+        resultados = analise_estatistica_temporal(tolerancia_nm=args.tolerancia, jobs=args.jobs, agrupamento=args.agrupamento)
     elif args.amostra_livre:
         # Análise de amostra livre
         resultados = analisar_amostra_livre()
     else:
         # Por padrão, faz análise temporal
         print("[INFO] Executando análise temporal por padrão. Use --amostra-livre para análise de amostra livre.")
-        resultados = analise_estatistica_temporal(tolerancia_nm=args.tolerancia)
+        resultados = analise_estatistica_temporal(tolerancia_nm=args.tolerancia, jobs=args.jobs, agrupamento=args.agrupamento)
+    
+    print(f"[INFO] {resumo_cache()}")
     
     if resultados is not None:
         print("\n[OK] Análise concluída com sucesso!")
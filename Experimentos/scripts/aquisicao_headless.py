@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Aquisição de espectros sem interface gráfica (sem Tk, sem matplotlib).
+
+Usa a mesma calibração da interface (``interface_start.json``: ``coeficientes``,
+``wl_fit``, ``x_detection_start``/``x_detection_end``, ``buffer_size``) e lê
+frames de uma webcam, de um arquivo de vídeo ou de uma pasta de imagens
+(``fontes_frames.py``) o mais rápido possível, ou no ritmo original com
+``--tempo-real``, por um tempo ou número de espectros fixo. Os espectros vão
+para uma pasta de TXT (mesmo layout da interface), para um container binário
+``*.osarec`` ou para a saída padrão. Em vídeos e imagens o timestamp gravado
+é o tempo do próprio vídeo, então duas reproduções geram a mesma saída.
+
+Uso típico:
+    python Experimentos/scripts/aquisicao_headless.py --webcam 0 --duracao 28800 --saida medidas.osarec
+    python Experimentos/scripts/aquisicao_headless.py --video data/video.mp4 --quantidade 500 --saida pasta_txt
+    python Experimentos/scripts/aquisicao_headless.py --imagens frames/ --saida -
+    python Experimentos/scripts/aquisicao_headless.py --sintetica --quantidade 1000 --saida -
+    python Experimentos/scripts/aquisicao_headless.py --webcam 0 --canais --quantidade 10 --saida pasta_txt
+    python Experimentos/scripts/aquisicao_headless.py --webcam 0 --duracao 3600 --servidor 5055
+
+Com ``--canais`` cada registro traz os espectros cinza, R, G e B do mesmo
+frame (arquivos ``spectrumNNN``/``spectrum_r_NNN``/``spectrum_g_NNN``/
+``spectrum_b_NNN``, ou um registro multicanal no ``*.osarec``).
+
+Com ``--servidor`` os espectros também são publicados em localhost para
+outros processos (ver ``servidor_espectros.py``).
+
+Para vários espectrômetros ao mesmo tempo, ver ``aquisicao_multipla.py``.
+"""
+
+import argparse
+import json
+import signal
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from fontes_frames import FonteCamera, FonteVideo, FontePastaImagens, FonteImagem
+from camera_sintetica import CameraSintetica
+from extrator_espectro import ExtratorEspectro, CANAIS
+from cadeia_filtros import CadeiaFiltros
+from media_movel import MediaMovel, MODOS_MEDIA
+from gravador_espectros import GravadorEspectros, nome_arquivo_canal
+from gravacao_binaria import GravacaoEspectros
+from servidor_espectros import ServidorEspectros
+from gatilho_gravacao import GatilhoGravacao
+
+
+def carregar_calibracao(caminho):
+    """
+    Lê a calibração salva pela interface.
+
+    Returns:
+        Dicionário de configuração da interface
+    """
+    with open(caminho, "r") as f:
+        return json.load(f)
+
+
+def abrir_fonte(args, config):
+    """Abre a fonte escolhida na linha de comando."""
+    if args.imagens is not None:
+        if Path(args.imagens).is_dir():
+            return FontePastaImagens(args.imagens, tempo_real=args.tempo_real, repetir=args.repetir)
+        return FonteImagem(args.imagens, tempo_real=args.tempo_real, quantidade=None if args.repetir else 1)
+    if args.sintetica:
+        return CameraSintetica(**{"tempo_real": args.tempo_real, **config.get("camera_sintetica", {})})
+    if args.video is not None:
+        fonte = FonteVideo(args.video, tempo_real=args.tempo_real, repetir=args.repetir)
+    else:
+        fonte = FonteCamera(args.webcam, config.get("FRAME_WIDTH"), config.get("FRAME_HEIGHT"))
+    if not fonte.isOpened():
+        raise IOError("Não foi possível abrir a fonte de vídeo.")
+    return fonte
+
+
+class SaidaTexto:
+    """
+    Uma linha por espectro na saída padrão: ``timestamp;i0;i1;...``
+    (``timestamp;canal;i0;...`` por canal com ``canais``).
+    """
+
+    def __init__(self, wl, casas, canais=False):
+        self.formato = f"%.{casas}e"
+        self.canais = canais
+        sys.stdout.write("# timestamp;" + ("canal;" if canais else "") + ";".join(f"{w:.4f}" for w in wl) + "\n")
+
+    def escrever(self, timestamp, indice, profundidade, espectro):
+        if not self.canais:
+            sys.stdout.write(f"{timestamp:.6f};" + ";".join(self.formato % v for v in espectro) + "\n")
+            return
+        for canal, linha in zip(CANAIS, espectro):
+            sys.stdout.write(f"{timestamp:.6f};{canal};" + ";".join(self.formato % v for v in linha) + "\n")
+
+    def fechar(self):
+        sys.stdout.flush()
+
+
+class SaidaArquivos:
+    """TXT ``wl_m;intensidade`` (como a interface) ou container ``*.osarec``, gravados em thread separada."""
+
+    def __init__(self, destino, wl, config, prefixo, canais=False, filtros=None, metadados=None):
+        self.gravador = GravadorEspectros()
+        self.wl = wl
+        self.prefixo = prefixo
+        self.canais = canais
+        self.gravacao = None
+        destino = Path(destino)
+        if destino.suffix == ".osarec":
+            calibracao = {chave: config[chave] for chave in ("coeficientes", "wl_fit", "x_detection_start", "x_detection_end")}
+            calibracao["filtros"] = filtros.descrever() if filtros is not None else None
+            calibracao.update(metadados or {})
+            self.gravacao = GravacaoEspectros.criar(destino, np.asarray(wl) * 1e-9, calibracao=calibracao,
+                                                    canais=CANAIS if canais else None)
+        else:
+            destino.mkdir(parents=True, exist_ok=True)
+        self.destino = destino
+
+    def escrever(self, timestamp, indice, profundidade, espectro):
+        if self.gravacao is not None:
+            self.gravador.salvar_binario(self.gravacao, espectro, timeout=1.0, timestamp=timestamp,
+                                         indice_frame=indice, profundidade_media=profundidade)
+        elif self.canais:
+            caminhos = [self.destino / nome_arquivo_canal(self.prefixo, canal, f"{indice:03}.txt") for canal in CANAIS]
+            self.gravador.salvar_canais(caminhos, self.wl, espectro, timeout=1.0)
+        else:
+            self.gravador.salvar(self.destino / f"{self.prefixo}{indice:03}.txt", self.wl, espectro, timeout=1.0)
+        for msg in self.gravador.mensagens():
+            if not msg.startswith("Espectro") and "espectros salvos" not in msg:
+                print(msg, file=sys.stderr)
+
+    def fechar(self):
+        if self.gravacao is not None:
+            self.gravador.fechar_gravacao(self.gravacao)
+        self.gravador.fechar()
+        for msg in self.gravador.mensagens():
+            if msg.startswith("[ERROR]") or msg.startswith("[WARNING]"):
+                print(msg, file=sys.stderr)
+
+
+class SaidaServidor:
+    """Publica cada espectro no ``ServidorEspectros`` (assinantes lentos perdem espectros, não atrasam a aquisição)."""
+
+    def __init__(self, endereco, wl, canais=False, filtros=None, metadados=None):
+        host, _, porta = endereco.rpartition(":")
+        self.servidor = ServidorEspectros(host or "127.0.0.1", int(porta))
+        self.servidor.definir_cabecalho(wl, CANAIS if canais else None,
+                                        filtros=filtros.descrever() if filtros is not None else None,
+                                        **(metadados or {}))
+        self.servidor.iniciar()
+        host, porta = self.servidor.endereco
+        print(f"[INFO] Publicando espectros em {host}:{porta}", file=sys.stderr)
+
+    def escrever(self, timestamp, indice, profundidade, espectro):
+        self.servidor.publicar(espectro, timestamp)
+
+    def fechar(self):
+        self.servidor.fechar()
+
+
+class SaidaMultipla:
+    """Repassa cada espectro a várias saídas (ex.: arquivos + servidor)."""
+
+    def __init__(self, saidas):
+        self.saidas = saidas
+
+    def escrever(self, timestamp, indice, profundidade, espectro):
+        for saida in self.saidas:
+            saida.escrever(timestamp, indice, profundidade, espectro)
+
+    def fechar(self):
+        for saida in self.saidas:
+            saida.fechar()
+
+
+def adquirir(fonte, extrator, media, saida, duracao=None, quantidade=None, intervalo=1, canais=False, gatilho=None,
+             parar=None, progresso=None):
+    """
+    Laço de aquisição: lê, extrai, promedia e envia para ``saida``.
+
+    Args:
+        fonte: ``FonteFrames``
+        extrator: ``ExtratorEspectro`` com a calibração carregada
+        media: ``MediaMovel`` aplicada aos espectros
+        saida: Objeto com ``escrever(timestamp, indice, profundidade, espectro)``
+        duracao: Tempo máximo em segundos (None = sem limite)
+        quantidade: Número máximo de espectros gravados (None = sem limite)
+        intervalo: Grava um espectro a cada ``intervalo`` frames
+        canais: Extrai cinza + R, G e B de cada frame (matriz (4, n) por registro)
+        gatilho: ``GatilhoGravacao``; espectros sem mudança são ignorados (None = grava todos)
+        parar: Evento (``threading``/``multiprocessing``) que encerra a aquisição quando ligado
+        progresso: Função ``(frames, gravados)`` chamada a cada frame lido
+
+    Returns:
+        Dicionário com frames lidos, espectros gravados, erros e tempo decorrido
+    """
+    interromper = []
+    anterior = signal.signal(signal.SIGINT, lambda *_: interromper.append(True))
+    inicio = time.time()
+    frames = gravados = erros = 0
+    obter = extrator.obter_espectros_canais if canais else extrator.obter_espectro
+    try:
+        while not interromper and not (parar is not None and parar.is_set()):
+            if duracao is not None and time.time() - inicio >= duracao:
+                break
+            if quantidade is not None and gravados >= quantidade:
+                break
+            frame = fonte.ler()
+            if frame is None:
+                break
+            frames += 1
+            if progresso is not None:
+                progresso(frames, gravados)
+            try:
+                espectro = media.adicionar(obter(frame.imagem)[1])
+            except IndexError as e:
+                erros += 1
+                print(f"[ERRO] {e}", file=sys.stderr)
+                break
+            if frames % intervalo:
+                continue
+            if gatilho is not None and not gatilho.decidir(espectro, frame.timestamp)[0]:
+                continue
+            saida.escrever(frame.timestamp, gravados, len(media), espectro)
+            gravados += 1
+    finally:
+        signal.signal(signal.SIGINT, anterior)
+    return {"frames": frames, "gravados": gravados, "erros": erros, "tempo": time.time() - inicio}
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Aquisição de espectros sem interface gráfica.")
+    origem = parser.add_mutually_exclusive_group(required=True)
+    origem.add_argument("--webcam", type=int, help="Índice da webcam")
+    origem.add_argument("--video", help="Arquivo de vídeo")
+    origem.add_argument("--imagens", help="Pasta de imagens (ordem alfabética) ou uma única imagem")
+    origem.add_argument("--sintetica", action="store_true",
+                        help="Câmera sintética (parâmetros em \"camera_sintetica\" da calibração)")
+    parser.add_argument("--config", default="interface_start.json",
+                        help="Calibração salva pela interface (default: ./interface_start.json)")
+    parser.add_argument("--saida",
+                        help="Pasta de TXT, pasta terminada em .osarec (binário) ou '-' para a saída padrão")
+    parser.add_argument("--servidor", metavar="[HOST:]PORTA",
+                        help="Publica os espectros para assinantes TCP (ver servidor_espectros.py)")
+    parser.add_argument("--duracao", type=float, help="Duração da aquisição em segundos")
+    parser.add_argument("--quantidade", type=int, help="Número de espectros a gravar")
+    parser.add_argument("--intervalo", type=int, default=1, help="Grava um espectro a cada N frames (default: 1)")
+    parser.add_argument("--buffer", type=int, help="Espectros na média móvel (default: buffer_size da calibração)")
+    parser.add_argument("--modo-media", choices=MODOS_MEDIA, help="Modo da média móvel (default: modo_media da calibração)")
+    parser.add_argument("--prefixo", default="spectrum", help="Prefixo dos arquivos TXT (default: spectrum)")
+    parser.add_argument("--sem-filtros", action="store_true",
+                        help="Grava os espectros crus, sem a cadeia \"filtros\" da calibração")
+    parser.add_argument("--por-mudanca", action="store_true",
+                        help="Grava só espectros que mudaram (limiares em \"gravacao_por_mudanca\" da calibração)")
+    parser.add_argument("--canais", action="store_true",
+                        help="Grava também os espectros dos canais R, G e B, extraídos do mesmo frame")
+    parser.add_argument("--repetir", action="store_true", help="Recomeça o vídeo/pasta de imagens ao chegar ao fim")
+    parser.add_argument("--tempo-real", action="store_true",
+                        help="Reproduz vídeos e imagens no ritmo original (padrão: velocidade máxima)")
+    return parser
+
+
+def validar_argumentos(parser, args):
+    """Recusa combinações sem sentido (sai com ``parser.error``)."""
+    if args.duracao is None and args.quantidade is None and (args.webcam is not None or args.sintetica or args.repetir):
+        parser.error("Informe --duracao e/ou --quantidade para uma fonte contínua.")
+    if args.saida is None and args.servidor is None:
+        parser.error("Informe --saida e/ou --servidor.")
+
+
+def montar_aquisicao(args, config, metadados=None):
+    """
+    Monta o que a aquisição descrita por ``args`` precisa, com a calibração ``config``.
+
+    Args:
+        args: Argumentos de ``criar_parser()``
+        config: Calibração da interface
+        metadados: Campos extras gravados na calibração do ``*.osarec`` e no cabeçalho do servidor
+
+    Returns:
+        Dicionário com ``wl``, ``filtros``, ``extrator``, ``media``, ``fonte``, ``saida`` e ``gatilho``
+    """
+    x_detection = np.arange(config["x_detection_start"], config["x_detection_end"])
+    wl = config["wl_fit"][0] * x_detection + config["wl_fit"][1]
+    filtros = CadeiaFiltros.da_config(config, wl)
+    filtros.ativo = not args.sem_filtros
+    extrator = ExtratorEspectro(x_detection, config["coeficientes"], config.get("largura_banda", 1), filtros)
+    media = MediaMovel(args.buffer or config.get("buffer_size", 1), (len(CANAIS), len(wl)) if args.canais else len(wl),
+                       modo=args.modo_media or config.get("modo_media", "media"))
+
+    fonte = abrir_fonte(args, config)
+    saidas = []
+    try:
+        if args.saida == "-":
+            saidas.append(SaidaTexto(wl, 14, args.canais))
+        elif args.saida is not None:
+            saidas.append(SaidaArquivos(args.saida, wl, config, args.prefixo, args.canais, filtros, metadados))
+        if args.servidor is not None:
+            saidas.append(SaidaServidor(args.servidor, wl, args.canais, filtros, metadados))
+    except Exception:
+        for saida in saidas:
+            saida.fechar()
+        fonte.release()
+        raise
+    saida = saidas[0] if len(saidas) == 1 else SaidaMultipla(saidas)
+    gatilho = None
+    if args.por_mudanca:
+        # Log dos intervalos ignorados junto dos arquivos (pasta de TXT ou container .osarec)
+        log = Path(args.saida) / "ignorados.csv" if args.saida not in (None, "-") else None
+        gatilho = GatilhoGravacao.da_config({"gravacao_por_mudanca": True, **config}, wl, log)
+    return {"wl": wl, "filtros": filtros, "extrator": extrator, "media": media,
+            "fonte": fonte, "saida": saida, "gatilho": gatilho}
+
+
+def executar(args, partes, parar=None, progresso=None, rotulo=""):
+    """
+    Roda ``adquirir`` com as ``partes`` de ``montar_aquisicao`` e fecha saída, fonte e gatilho.
+
+    Returns:
+        Resumo de ``adquirir``
+    """
+    fonte, saida, gatilho = partes["fonte"], partes["saida"], partes["gatilho"]
+    try:
+        resumo = adquirir(fonte, partes["extrator"], partes["media"], saida, args.duracao, args.quantidade,
+                          max(1, args.intervalo), args.canais, gatilho, parar, progresso)
+    finally:
+        saida.fechar()
+        fonte.release()
+        if gatilho is not None:
+            gatilho.fechar()
+            print(f"[INFO] {rotulo}Gravação por mudança: {gatilho.resumo()}", file=sys.stderr)
+
+    taxa = resumo["frames"] / resumo["tempo"] if resumo["tempo"] > 0 else 0.0
+    print(f"[OK] {rotulo}{resumo['gravados']} espectros gravados de {resumo['frames']} frames "
+          f"em {resumo['tempo']:.1f} s ({taxa:.1f} frames/s)", file=sys.stderr)
+    return resumo
+
+
+def main():
+    parser = criar_parser()
+    args = parser.parse_args()
+    validar_argumentos(parser, args)
+    config = carregar_calibracao(args.config)
+    executar(args, montar_aquisicao(args, config))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Aquisição simultânea de vários espectrômetros, um processo por câmera.
+
+Um supervisor lê um manifesto JSON com os instrumentos e inicia, para cada
+um, um processo com a mesma aquisição de ``aquisicao_headless.py``: calibração,
+média móvel, filtros e saída (TXT, ``*.osarec`` ou servidor) próprios. Cada
+processo lê a câmera em uma thread que enche um anel limitado
+(``pipeline_captura.AnelFrames``), então uma câmera travada ou uma escrita
+lenta atrasa só o próprio instrumento, e os núcleos da máquina são usados em
+paralelo.
+
+Os espectros de todos os instrumentos recebem o mesmo relógio: segundos de
+``time.monotonic()`` desde o início do supervisor, carimbados quando o frame
+sai da câmera. Assim dois instrumentos podem ser comparados amostra a
+amostra. ``t0_epoch`` (o ``time.time()`` desse início) fica na calibração do
+``*.osarec`` e no cabeçalho do servidor para recuperar a hora absoluta.
+
+Manifesto (argumentos de ``aquisicao_headless.py`` por instrumento):
+    {"instrumentos": [
+        {"nome": "osinha1", "argumentos": ["--webcam", "0", "--config", "osinha1.json", "--saida", "osinha1.osarec"]},
+        {"nome": "osinha2", "argumentos": "--webcam 1 --config osinha2.json --saida osinha2.osarec --servidor 5056"}
+    ]}
+
+Uso típico:
+    python Experimentos/scripts/aquisicao_multipla.py instrumentos.json --duracao 28800
+
+Ctrl+C encerra todos os instrumentos, fechando as gravações normalmente.
+"""
+
+import argparse
+import json
+import multiprocessing
+import queue
+import shlex
+import signal
+import sys
+import threading
+import time
+
+from fontes_frames import FonteFrames
+from pipeline_captura import AnelFrames
+import aquisicao_headless
+
+
+class FonteComAnel(FonteFrames):
+    """
+    Lê ``fonte`` em uma thread própria para um anel limitado, carimbando cada
+    frame com o relógio compartilhado (``time.monotonic() - t0_monotonico``).
+
+    Em câmeras o anel descarta o frame mais antigo quando cheio; em vídeos e
+    imagens a leitura espera vaga, sem perder frames. Só contam como
+    descartados os frames perdidos até o último frame entregue: os que a
+    thread ainda lê depois que a aquisição parou de consumir não são perdas.
+    """
+
+    def __init__(self, fonte, t0_monotonico, capacidade=8):
+        super().__init__(tempo_real=False)
+        self.fonte = fonte
+        self.ao_vivo = fonte.ao_vivo
+        self.t0 = t0_monotonico
+        self.anel = AnelFrames(capacidade)
+        self._capacidade = max(1, int(capacidade))
+        self._parar = threading.Event()
+        self._fim = threading.Event()
+        self._descartados = 0
+        self._thread = threading.Thread(target=self._capturar, daemon=True)
+        self._thread.start()
+
+    def _capturar(self):
+        while not self._parar.is_set():
+            if not self.ao_vivo:
+                while len(self.anel) >= self._capacidade and not self._parar.is_set():
+                    time.sleep(0.001)
+            frame = self.fonte.ler()
+            if frame is None:
+                break
+            self.anel.inserir((frame.imagem, time.monotonic() - self.t0))
+        self._fim.set()
+
+    def _ler(self):
+        while True:
+            item = self.anel.retirar(timeout=0.1)
+            if item is not None:
+                self._descartados = self.anel.descartados
+                return item
+            if self._fim.is_set() and len(self.anel) == 0:
+                return None
+
+    @property
+    def descartados(self):
+        return self._descartados
+
+    def release(self):
+        self._parar.set()
+        self._thread.join(timeout=2.0)
+        self.fonte.release()
+
+
+def ler_manifesto(caminho):
+    """
+    Returns:
+        Lista de tuplas (nome, argumentos) dos instrumentos do manifesto
+    """
+    with open(caminho, "r") as f:
+        manifesto = json.load(f)
+    instrumentos = []
+    for i, instrumento in enumerate(manifesto["instrumentos"]):
+        argumentos = instrumento["argumentos"]
+        if isinstance(argumentos, str):
+            argumentos = shlex.split(argumentos)
+        instrumentos.append((instrumento.get("nome", f"instrumento{i + 1}"), [str(a) for a in argumentos]))
+    nomes = [nome for nome, _ in instrumentos]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError("Nomes de instrumentos repetidos no manifesto.")
+    return instrumentos
+
+
+def _trabalhador(nome, argumentos, t0_monotonico, t0_epoch, tamanho_anel, parar, estados):
+    """Processo de um instrumento: monta a aquisição, lê pelo anel e reporta o progresso."""
+    # Ctrl+C chega a todo o grupo de processos. Fora do laço de aquisição (montagem e fechamento das
+    # gravações) ele é ignorado; durante o laço, ``adquirir`` instala um tratador próprio que só
+    # encerra o laço, como o evento ``parar`` ligado pelo supervisor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    rotulo = f"{nome}: "
+    try:
+        parser = aquisicao_headless.criar_parser()
+        args = parser.parse_args(argumentos)
+        config = aquisicao_headless.carregar_calibracao(args.config)
+        metadados = {"instrumento": nome, "relogio": "monotonic", "t0_epoch": t0_epoch}
+        partes = aquisicao_headless.montar_aquisicao(args, config, metadados)
+        partes["fonte"] = FonteComAnel(partes["fonte"], t0_monotonico, tamanho_anel)
+
+        ultimo = [0.0]
+
+        def progresso(frames, gravados):
+            agora = time.monotonic()
+            if agora - ultimo[0] >= 0.5:
+                ultimo[0] = agora
+                estados.put(("progresso", nome, {"frames": frames, "gravados": gravados,
+                                                  "descartados": partes["fonte"].descartados}))
+
+        resumo = aquisicao_headless.executar(args, partes, parar, progresso, rotulo)
+        resumo["descartados"] = partes["fonte"].descartados
+        estados.put(("fim", nome, resumo))
+    except Exception as e:
+        estados.put(("erro", nome, f"{type(e).__name__}: {e}"))
+        sys.exit(1)
+
+
+def supervisionar(instrumentos, tamanho_anel=8, intervalo_status=10.0, limite_travamento=10.0, espera_final=10.0):
+    """
+    Roda um processo por instrumento até todos terminarem (ou Ctrl+C).
+
+    Args:
+        instrumentos: Lista de (nome, argumentos de ``aquisicao_headless.py``)
+        tamanho_anel: Frames aguardando processamento em cada instrumento
+        intervalo_status: Segundos entre as linhas de progresso
+        limite_travamento: Segundos sem frames novos para avisar que um instrumento travou
+        espera_final: Segundos dados a cada processo para fechar as gravações ao encerrar
+
+    Returns:
+        Dicionário nome -> resumo da aquisição (ou ``{"erro": mensagem}``)
+    """
+    contexto = multiprocessing.get_context("spawn")
+    parar = contexto.Event()
+    estados = contexto.Queue()
+    t0_monotonico, t0_epoch = time.monotonic(), time.time()
+
+    processos = {}
+    for nome, argumentos in instrumentos:
+        processo = contexto.Process(target=_trabalhador, name=nome, daemon=False,
+                                    args=(nome, argumentos, t0_monotonico, t0_epoch, tamanho_anel, parar, estados))
+        processo.start()
+        processos[nome] = processo
+    print(f"[INFO] {len(processos)} instrumentos iniciados: {', '.join(processos)}", file=sys.stderr)
+
+    interromper = []
+    anterior = signal.signal(signal.SIGINT, lambda *_: interromper.append(True))
+    progresso = {nome: {"frames": 0, "gravados": 0, "descartados": 0} for nome in processos}
+    ultima_mudanca = {nome: time.monotonic() for nome in processos}
+    avisados = set()
+    resultados = {}
+    ultimo_status = time.monotonic()
+    try:
+        while any(p.is_alive() for p in processos.values()) or not estados.empty():
+            if interromper and not parar.is_set():
+                print("[INFO] Encerrando os instrumentos...", file=sys.stderr)
+                parar.set()
+            try:
+                tipo, nome, dados = estados.get(timeout=0.5)
+            except queue.Empty:
+                tipo = None
+            if tipo == "progresso":
+                if dados["frames"] != progresso[nome]["frames"]:
+                    ultima_mudanca[nome] = time.monotonic()
+                    avisados.discard(nome)
+                progresso[nome] = dados
+            elif tipo == "fim":
+                resultados[nome] = dados
+            elif tipo == "erro":
+                resultados[nome] = {"erro": dados}
+                print(f"[ERRO] {nome}: {dados}", file=sys.stderr)
+
+            agora = time.monotonic()
+            for nome, processo in processos.items():
+                if nome in resultados or not processo.is_alive() or nome in avisados:
+                    continue
+                if agora - ultima_mudanca[nome] >= limite_travamento:
+                    avisados.add(nome)
+                    print(f"[WARNING] {nome}: sem frames há {agora - ultima_mudanca[nome]:.0f} s", file=sys.stderr)
+            if agora - ultimo_status >= intervalo_status:
+                ultimo_status = agora
+                print("[INFO] " + " | ".join(
+                    f"{nome} {p['frames']} frames, {p['gravados']} gravados, {p['descartados']} descartados"
+                    for nome, p in progresso.items() if nome not in resultados), file=sys.stderr)
+    finally:
+        parar.set()
+        for nome, processo in processos.items():
+            processo.join(timeout=espera_final)
+            if processo.is_alive():
+                print(f"[WARNING] {nome}: não encerrou em {espera_final:.0f} s; terminando o processo.", file=sys.stderr)
+                processo.terminate()
+                processo.join()
+        signal.signal(signal.SIGINT, anterior)
+
+    for nome, processo in processos.items():
+        if nome not in resultados:
+            resultados[nome] = {"erro": f"processo terminou com código {processo.exitcode}"}
+            print(f"[ERRO] {nome}: processo terminou com código {processo.exitcode}", file=sys.stderr)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aquisição simultânea de vários espectrômetros (um processo por câmera).")
+    parser.add_argument("manifesto", help="JSON com a lista \"instrumentos\" (nome e argumentos de aquisicao_headless.py)")
+    parser.add_argument("--duracao", type=float, help="Duração para os instrumentos que não definem --duracao")
+    parser.add_argument("--quantidade", type=int, help="Espectros para os instrumentos que não definem --quantidade")
+    parser.add_argument("--tamanho-anel", type=int, default=8, help="Frames aguardando processamento por câmera (default: 8)")
+    parser.add_argument("--status", type=float, default=10.0, help="Segundos entre as linhas de progresso (default: 10)")
+    parser.add_argument("--limite-travamento", type=float, default=10.0,
+                        help="Segundos sem frames para avisar que um instrumento travou (default: 10)")
+    args = parser.parse_args()
+
+    instrumentos = []
+    parser_aquisicao = aquisicao_headless.criar_parser()
+    for nome, argumentos in ler_manifesto(args.manifesto):
+        if args.duracao is not None and "--duracao" not in argumentos:
+            argumentos += ["--duracao", str(args.duracao)]
+        if args.quantidade is not None and "--quantidade" not in argumentos:
+            argumentos += ["--quantidade", str(args.quantidade)]
+        # Valida antes de iniciar qualquer processo
+        parser_aquisicao.prog = f"{parser.prog} [{nome}]"
+        argumentos_lidos = parser_aquisicao.parse_args(argumentos)
+        aquisicao_headless.validar_argumentos(parser_aquisicao, argumentos_lidos)
+        if argumentos_lidos.saida == "-":
+            parser.error(f"{nome}: a saída padrão não identifica o instrumento; use uma pasta, *.osarec ou --servidor.")
+        instrumentos.append((nome, argumentos))
+
+    resultados = supervisionar(instrumentos, args.tamanho_anel, args.status, args.limite_travamento)
+    falhas = [nome for nome, resumo in resultados.items() if "erro" in resumo]
+    for nome, resumo in resultados.items():
+        if "erro" not in resumo:
+            print(f"[OK] {nome}: {resumo['gravados']} espectros de {resumo['frames']} frames "
+                  f"({resumo['descartados']} descartados pelo anel)", file=sys.stderr)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
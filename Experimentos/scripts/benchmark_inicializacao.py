@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do tempo de inicialização da interface.
+
+Executa, em um processo Python novo, apenas as importações de nível de
+módulo de ``interface.py`` (sem abrir a janela) com ``-X importtime`` e
+relata o tempo total e os módulos mais caros. Em seguida mede o tempo até o
+primeiro espectro: importações + câmera sintética + ``ExtratorEspectro``.
+
+Os resultados podem ser salvos como referência e comparados depois, para
+detectar regressões (código de saída 1 se o tempo total piorar além da
+tolerância).
+
+Uso típico:
+    python Experimentos/scripts/benchmark_inicializacao.py
+    python Experimentos/scripts/benchmark_inicializacao.py --salvar referencia_inicializacao.json
+    python Experimentos/scripts/benchmark_inicializacao.py --comparar referencia_inicializacao.json --tolerancia 0.25
+"""
+
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+PASTA_SCRIPTS = Path(__file__).resolve().parent
+
+CODIGO_PRIMEIRO_ESPECTRO = """
+import time
+_inicio = time.perf_counter()
+{importacoes}
+_importado = time.perf_counter()
+import numpy as np
+from camera_sintetica import CameraSintetica
+from extrator_espectro import ExtratorEspectro
+camera = CameraSintetica(semente=0)
+extrator = ExtratorEspectro(np.arange(camera.x_inicio, camera.x_fim), camera.coeficientes)
+extrator.obter_espectro(camera.ler().imagem)
+_fim = time.perf_counter()
+print((_importado - _inicio) * 1000.0, (_fim - _inicio) * 1000.0)
+"""
+
+
+def importacoes_de_nivel_superior(caminho):
+    """
+    Retorna as instruções ``import``/``from ... import`` de nível de módulo.
+
+    Args:
+        caminho: Arquivo Python analisado (sem executá-lo)
+
+    Returns:
+        Lista de instruções (texto) na ordem em que aparecem
+    """
+    arvore = ast.parse(Path(caminho).read_text(encoding="utf-8"))
+    return [ast.unparse(no) for no in arvore.body if isinstance(no, (ast.Import, ast.ImportFrom))]
+
+
+def _executar(codigo, importtime=False):
+    comando = [sys.executable]
+    if importtime:
+        comando += ["-X", "importtime"]
+    comando += ["-c", codigo]
+    processo = subprocess.run(comando, cwd=PASTA_SCRIPTS, capture_output=True, text=True)
+    if processo.returncode != 0:
+        ultima = processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else "erro desconhecido"
+        raise RuntimeError(ultima)
+    return processo
+
+
+def analisar_importtime(saida):
+    """
+    Interpreta a saída de ``-X importtime``.
+
+    Returns:
+        Tupla (total_ms, {modulo_de_nivel_superior: cumulativo_ms})
+    """
+    modulos = {}
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        campos = linha[len("import time:"):].split("|")
+        nome = campos[2][1:]
+        # Apenas importações de nível superior (as aninhadas vêm indentadas)
+        if nome.startswith(" "):
+            continue
+        modulos[nome.strip()] = int(campos[1]) / 1000.0
+    return sum(modulos.values()), modulos
+
+
+def medir(importacoes, repeticoes=5):
+    """
+    Mede importações e tempo até o primeiro espectro em ``repeticoes`` processos novos.
+
+    Returns:
+        Dicionário com medianas (ms) e os módulos mais caros da última execução
+    """
+    codigo_importacoes = "\n".join(importacoes)
+    totais, primeiros, modulos = [], [], {}
+    for _ in range(repeticoes):
+        _, modulos = analisar_importtime(_executar(codigo_importacoes, importtime=True).stderr)
+        totais.append(sum(modulos.values()))
+        saida = _executar(CODIGO_PRIMEIRO_ESPECTRO.format(importacoes=codigo_importacoes)).stdout.split()
+        primeiros.append(float(saida[1]))
+    return {
+        "importacoes_ms": statistics.median(totais),
+        "primeiro_espectro_ms": statistics.median(primeiros),
+        "modulos_ms": dict(sorted(modulos.items(), key=lambda item: -item[1])),
+        "python": sys.version.split()[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de inicialização da interface (importações e primeiro espectro).")
+    parser.add_argument("--arquivo", default=str(PASTA_SCRIPTS / "interface.py"), help="Script analisado (default: interface.py)")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos medidos; relata a mediana (default: 5)")
+    parser.add_argument("--top", type=int, default=12, help="Módulos mais caros exibidos (default: 12)")
+    parser.add_argument("--salvar", help="Salva o resultado como referência (JSON)")
+    parser.add_argument("--comparar", help="Compara com uma referência salva")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita na comparação (default: 0.25)")
+    args = parser.parse_args()
+
+    importacoes = importacoes_de_nivel_superior(args.arquivo)
+    try:
+        resultado = medir(importacoes, max(1, args.repeticoes))
+    except RuntimeError as e:
+        print(f"[ERRO] Falha ao importar os módulos de {args.arquivo}: {e}")
+        sys.exit(2)
+
+    print(f"[INFO] Importações de nível de módulo: {resultado['importacoes_ms']:.1f} ms (mediana de {args.repeticoes})")
+    print(f"[INFO] Até o primeiro espectro:         {resultado['primeiro_espectro_ms']:.1f} ms")
+    print("[INFO] Módulos mais caros (cumulativo):")
+    for nome, ms in list(resultado["modulos_ms"].items())[:args.top]:
+        print(f"    {ms:8.1f} ms  {nome}")
+
+    if args.salvar:
+        with open(args.salvar, "w") as f:
+            json.dump(resultado, f, indent=4)
+        print(f"[OK] Referência salva em: {args.salvar}")
+
+    if args.comparar:
+        with open(args.comparar, "r") as f:
+            referencia = json.load(f)
+        regrediu = False
+        for chave in ("importacoes_ms", "primeiro_espectro_ms"):
+            limite = referencia[chave] * (1.0 + args.tolerancia)
+            situacao = "OK" if resultado[chave] <= limite else "REGRESSÃO"
+            regrediu |= situacao != "OK"
+            print(f"[{situacao}] {chave}: {resultado[chave]:.1f} ms (referência {referencia[chave]:.1f} ms, limite {limite:.1f} ms)")
+        sys.exit(1 if regrediu else 0)
+
+
+if __name__ == "__main__":
+    main()
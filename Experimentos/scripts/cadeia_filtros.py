@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cadeia de filtros espectrais configurável, pré-calculada por calibração.
+
+Configurada pela chave ``"filtros"`` de ``interface_start.json``, uma lista
+de etapas aplicadas em ordem:
+
+    [{"tipo": "escuro", "arquivo": "escuro.txt"},
+     {"tipo": "savgol", "janela": 7, "ordem": 2},
+     {"tipo": "responsividade", "arquivo": "responsividade.txt"}]
+
+Tipos disponíveis:
+    "savgol"         -> Savitzky-Golay (``janela``, ``ordem``), bordas como
+                        ``scipy.signal.savgol_filter(mode="interp")``
+    "media"          -> média móvel retangular (``janela``)
+    "gaussiano"      -> gaussiana (``sigma``, truncada em 4 sigma)
+    "mediana"        -> mediana móvel (``janela``)
+    "escuro"         -> subtrai o espectro de escuro (``arquivo`` ou ``valores``)
+    "responsividade" -> divide pela responsividade (``arquivo`` ou ``valores``)
+
+Os coeficientes são calculados uma única vez por tamanho de espectro: as
+convoluções ("savgol", "media", "gaussiano") guardam só o núcleo e são
+aplicadas como convolução em banda, O(n * janela) por quadro (as linhas de
+borda do Savitzky-Golay usam matrizes pequenas, janela x janela); "escuro" e
+"responsividade" consecutivas viram uma única operação ponto a ponto
+``y * escala + deslocamento``. "media", "gaussiano" e "mediana" repetem o
+ponto da borda (modo "nearest"). Arquivos de curva usam o layout ``wl_m;intensidade`` (ou
+``wl_nm;valor``) e são interpolados no eixo ``wl`` atual.
+
+Sem a chave ``"filtros"`` a cadeia equivale ao ``savgol_filter(y, 7, 2)``
+usado até aqui. ``"filtros": []`` (ou ``ativo = False``) grava os dados crus.
+As etapas ficam registradas junto com as gravações para que as análises
+reproduzam exatamente o que foi aplicado ao vivo.
+"""
+
+import numpy as np
+
+
+ETAPAS_PADRAO = ({"tipo": "savgol", "janela": 7, "ordem": 2},)
+
+TIPOS_FILTRO = ("savgol", "media", "gaussiano", "mediana", "escuro", "responsividade")
+
+
+def _correlacionar(y, nucleo):
+    """Pontos internos da convolução centrada com ``nucleo`` (saída com n - janela + 1 pontos)."""
+    m = y.shape[-1] - len(nucleo) + 1
+    saida = nucleo[0] * y[..., :m]
+    for deslocamento, peso in enumerate(nucleo[1:], start=1):
+        saida += peso * y[..., deslocamento:deslocamento + m]
+    return saida
+
+
+def _bloco_savgol(janela, ordem, n):
+    """Bloco ``("banda", nucleo, esquerda, direita)`` equivalente a ``savgol_filter(y, janela, ordem)`` (modo "interp")."""
+    if janela % 2 == 0 or janela <= ordem:
+        raise ValueError(f"Savitzky-Golay: janela ({janela}) deve ser ímpar e maior que a ordem ({ordem}).")
+    if janela > n:
+        raise ValueError(f"Savitzky-Golay: janela ({janela}) maior que o espectro ({n} pontos).")
+    meia = janela // 2
+    # Ajuste polinomial por mínimos quadrados; posições centradas (-meia..meia) para melhor condicionamento
+    vander = np.vander(np.arange(janela, dtype=float) - meia, ordem + 1, increasing=True)
+    projecao = vander @ np.linalg.pinv(vander)        # valor ajustado em cada posição da janela
+    # Bordas: polinômio ajustado à primeira/última janela, avaliado nos pontos da borda
+    return ("banda", projecao[meia], projecao[:meia], projecao[janela - meia:])
+
+
+def _repetir_bordas(y, meia):
+    """``y`` estendido em ``meia`` pontos de cada lado no último eixo, repetindo o ponto da borda."""
+    return np.pad(y, [(0, 0)] * (y.ndim - 1) + [(meia, meia)], mode="edge")
+
+
+def _nucleo_gaussiano(sigma):
+    raio = max(1, int(np.ceil(4.0 * sigma)))
+    x = np.arange(-raio, raio + 1, dtype=float)
+    nucleo = np.exp(-0.5 * (x / sigma) ** 2)
+    return nucleo / nucleo.sum()
+
+
+def _carregar_curva(etapa, wl_nm, n):
+    """Curva de ``etapa["valores"]`` ou ``etapa["arquivo"]`` no eixo ``wl_nm`` atual."""
+    if "valores" in etapa:
+        valores = np.asarray(etapa["valores"], dtype=float)
+        if valores.shape != (n,):
+            raise ValueError(f"{etapa['tipo']}: {valores.size} valores; esperado {n}.")
+        return valores
+    dados = np.loadtxt(etapa["arquivo"], delimiter=";", ndmin=2)
+    if wl_nm is None:
+        # Sem eixo para interpolar: a curva precisa ter exatamente um valor por ponto
+        if dados.shape[0] != n:
+            raise ValueError(f"{etapa['tipo']}: eixo de comprimento de onda necessário para interpolar '{etapa['arquivo']}'.")
+        return dados[:, -1].astype(float)
+    eixo = dados[:, 0] * (1e9 if dados[:, 0].max() < 1e-3 else 1.0)   # metros -> nm
+    ordem = np.argsort(eixo)
+    return np.interp(wl_nm, eixo[ordem], dados[ordem, 1])
+
+
+class CadeiaFiltros:
+    """Etapas de filtragem compiladas em blocos (convoluções, ponto a ponto, medianas) para ``n`` pontos."""
+
+    def __init__(self, etapas=None, wl_nm=None):
+        """
+        Args:
+            etapas: Lista de dicionários ``{"tipo": ..., parâmetros}`` (None = ``ETAPAS_PADRAO``)
+            wl_nm: Eixo de comprimento de onda; necessário para curvas lidas de arquivo
+        """
+        self.etapas = [dict(etapa) for etapa in (ETAPAS_PADRAO if etapas is None else etapas)]
+        for etapa in self.etapas:
+            if etapa.get("tipo") not in TIPOS_FILTRO:
+                raise ValueError(f"Filtro desconhecido: {etapa.get('tipo')}. Use um de {TIPOS_FILTRO}.")
+        self.wl_nm = None if wl_nm is None else np.asarray(wl_nm, dtype=float)
+        self.ativo = True
+        self._blocos = {}
+
+    @classmethod
+    def da_config(cls, config, wl_nm=None):
+        """Cadeia descrita em ``config["filtros"]`` (padrão: Savitzky-Golay 7/2)."""
+        return cls(config.get("filtros"), wl_nm)
+
+    def compilar(self, n):
+        """
+        Pré-calcula os blocos para espectros de ``n`` pontos (feito uma vez por tamanho).
+
+        Returns:
+            Lista de blocos ``("banda", nucleo, esquerda, direita)`` (bordas None =
+            repetir o ponto da borda), ``("pontual", escala, deslocamento)`` ou
+            ``("mediana", janela)``
+        """
+        blocos = self._blocos.get(n)
+        if blocos is not None:
+            return blocos
+
+        blocos = []
+        escala, deslocamento = None, None   # Operação ponto a ponto em construção (None = identidade)
+
+        def fechar_pontual():
+            nonlocal escala, deslocamento
+            if escala is not None or deslocamento is not None:
+                blocos.append(("pontual", escala, deslocamento))
+            escala, deslocamento = None, None
+
+        for etapa in self.etapas:
+            tipo = etapa["tipo"]
+            if tipo == "escuro":
+                escuro = _carregar_curva(etapa, self.wl_nm, n) * float(etapa.get("escala", 1.0))
+                deslocamento = -escuro if deslocamento is None else deslocamento - escuro
+                continue
+            if tipo == "responsividade":
+                curva = _carregar_curva(etapa, self.wl_nm, n)
+                # Pontos sem resposta (curva ~0) não são amplificados indefinidamente
+                correcao = 1.0 / np.maximum(curva, float(etapa.get("minimo", 1e-3)) * curva.max())
+                escala = correcao if escala is None else correcao * escala
+                deslocamento = None if deslocamento is None else correcao * deslocamento
+                continue
+            fechar_pontual()
+            if tipo == "savgol":
+                blocos.append(_bloco_savgol(int(etapa.get("janela", 7)), int(etapa.get("ordem", 2)), n))
+            elif tipo == "media":
+                janela = int(etapa.get("janela", 5)) | 1
+                blocos.append(("banda", np.full(janela, 1.0 / janela), None, None))
+            elif tipo == "gaussiano":
+                blocos.append(("banda", _nucleo_gaussiano(float(etapa.get("sigma", 1.0))), None, None))
+            else:  # mediana: não linear
+                blocos.append(("mediana", int(etapa.get("janela", 5)) | 1))
+        fechar_pontual()
+
+        self._blocos[n] = blocos
+        return blocos
+
+    def aplicar(self, intensidades):
+        """
+        Aplica a cadeia ao longo do último eixo (um espectro ou uma matriz de espectros).
+
+        Returns:
+            Array float com a mesma forma de ``intensidades``
+        """
+        y = np.asarray(intensidades, dtype=float)
+        if not self.ativo:
+            return y.copy()
+        for bloco in self.compilar(y.shape[-1]):
+            if bloco[0] == "pontual":
+                _, escala, deslocamento = bloco
+                y = y * escala if escala is not None else y
+                y = y + deslocamento if deslocamento is not None else y
+            elif bloco[0] == "banda":
+                _, nucleo, esquerda, direita = bloco
+                if esquerda is None:
+                    y = _correlacionar(_repetir_bordas(y, len(nucleo) // 2), nucleo)
+                else:
+                    janela = len(nucleo)
+                    y = np.concatenate((y[..., :janela] @ esquerda.T,
+                                        _correlacionar(y, nucleo),
+                                        y[..., -janela:] @ direita.T), axis=-1)
+            else:
+                janelas = np.lib.stride_tricks.sliding_window_view(_repetir_bordas(y, bloco[1] // 2), bloco[1], axis=-1)
+                y = np.median(janelas, axis=-1)
+        if y is intensidades:
+            y = y.copy()
+        return y
+
+    def descrever(self):
+        """Etapas configuradas (para registrar junto das gravações), ou [] se desativada."""
+        return [dict(etapa) for etapa in self.etapas] if self.ativo else []
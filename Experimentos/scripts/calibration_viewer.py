@@ -12,18 +12,16 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import os
 
+from espectro_io import carregar_espectro
+
 
 def ler_espectro(caminho):
     """
-    Lê arquivo de espectro no formato: comprimento_onda;intensidade
+    Lê arquivo de espectro (TXT do OSA Visível ou CSV do ThorLabs, ver espectro_io).
     Retorna (wavelength_nm, intensity) ou (None, None) se falhar.
     """
     try:
-        data = np.loadtxt(caminho, delimiter=';')
-        wavelength_m = data[:, 0]  # Metros
-        intensity = data[:, 1]
-        wavelength_nm = wavelength_m * 1e9  # Converter para nm
-        return wavelength_nm, intensity
+        return carregar_espectro(caminho)
     except Exception as e:
         print(f"Erro ao ler {caminho}: {e}")
         return None, None
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Câmera sintética que imita os frames do espectrômetro (Osinha).
+
+Desenha uma faixa clara inclinada (ângulo e centro configuráveis) cujo perfil
+ao longo da faixa vem de qualquer espectro, por exemplo os TXT dos LEDs RGB
+em ``Experimentos/Visible_OSA``. Inclui ruído de Poisson e de leitura,
+saturação em 8 bits e deriva lenta de posição e intensidade. É uma
+``FonteFrames``, então serve à interface, ao ``WebcamViewer`` e à
+``aquisicao_headless.py`` sem hardware, em qualquer resolução e taxa.
+
+Os parâmetros verdadeiros (``coeficientes``, ``centro``, ``wl_fit``) ficam
+disponíveis para comparar com ``ajustar_reta_maior_intensidade`` e com a
+calibração por lasers.
+
+O ruído do fundo (Poisson da corrente escura + ruído de leitura) é sorteado
+a cada frame, então a média de N frames reduz o ruído como ``1/sqrt(N)``,
+como numa câmera real. Para não sortear um Poisson por pixel (o passo mais
+caro), o fundo usa uma única gaussiana float32 com a mesma média e variância
+(``fundo + ruido_leitura²``); só a faixa usa Poisson exato.
+"""
+
+import numpy as np
+import cv2
+
+from fontes_frames import FonteFrames
+
+
+def carregar_perfil(caminho):
+    """
+    Lê um espectro no layout ``wl_m;intensidade``.
+
+    Returns:
+        Tupla (wl_nm, intensidade)
+    """
+    dados = np.loadtxt(caminho, delimiter=";")
+    return dados[:, 0] * 1e9, dados[:, 1]
+
+
+def perfil_leds_rgb(wl_nm):
+    """Perfil padrão: três gaussianas nas posições aproximadas dos LEDs RGB (nm)."""
+    wl_nm = np.asarray(wl_nm, dtype=float)
+    perfil = np.zeros_like(wl_nm)
+    for centro, largura, altura in ((455.0, 10.0, 0.8), (525.0, 15.0, 1.0), (625.0, 8.0, 0.7)):
+        perfil += altura * np.exp(-0.5 * ((wl_nm - centro) / largura) ** 2)
+    return perfil
+
+
+class CameraSintetica(FonteFrames):
+    """Faixa espectral inclinada renderizada a cada ``ler()``."""
+
+    def __init__(self, largura=640, altura=480, angulo_graus=-2.0, centro=None, x_inicio=None, x_fim=None,
+                 perfil=None, wl_fit=None, pico=200.0, fundo=4.0, espessura=2.5, ruido_leitura=1.5,
+                 poisson=True, deriva_px_s=0.0, deriva_intensidade_s=0.0, fps=30.0, tempo_real=False,
+                 quantidade=None, semente=None):
+        """
+        Args:
+            largura: Largura do frame em pixels
+            altura: Altura do frame em pixels
+            angulo_graus: Inclinação da faixa (mesmo sinal de ``np.arctan(coeficientes[0])``)
+            centro: Ponto (x, y) por onde a faixa passa (padrão: centro do frame)
+            x_inicio: Primeira coluna iluminada (padrão: 15% da largura)
+            x_fim: Coluna final, exclusiva (padrão: 85% da largura)
+            perfil: Intensidade ao longo da faixa: array (reamostrado para a faixa),
+                tupla (wl_nm, intensidade), caminho de um TXT ``wl_m;intensidade``
+                ou None para ``perfil_leds_rgb``
+            wl_fit: Calibração verdadeira [a, b] com wl = a*x + b (padrão: 380-720 nm na faixa)
+            pico: Nível (0-255) do máximo do perfil, antes do ruído
+            fundo: Nível de fundo (corrente escura)
+            espessura: Desvio padrão da faixa na direção perpendicular, em pixels
+            ruido_leitura: Desvio padrão do ruído de leitura, em níveis de cinza
+            poisson: Aplica ruído de contagem (Poisson) ao sinal
+            deriva_px_s: Deslocamento perpendicular da faixa por segundo de vídeo
+            deriva_intensidade_s: Variação relativa do ganho por segundo de vídeo
+            fps: Taxa simulada (define timestamps e o ritmo em tempo real)
+            tempo_real: Entrega no ritmo de ``fps``; False entrega o mais rápido possível
+            quantidade: Número de frames antes de terminar (None = infinito)
+            semente: Semente do gerador aleatório (reprodutibilidade)
+        """
+        super().__init__(tempo_real=tempo_real)
+        self.largura = int(largura)
+        self.altura = int(altura)
+        self.centro = tuple(centro) if centro is not None else (self.largura / 2.0, self.altura / 2.0)
+        self.x_inicio = int(x_inicio) if x_inicio is not None else int(0.15 * self.largura)
+        self.x_fim = int(x_fim) if x_fim is not None else int(0.85 * self.largura)
+        self.angulo = np.radians(angulo_graus)
+        self.pico = float(pico)
+        self.fundo = float(fundo)
+        self.espessura = float(espessura)
+        self.ruido_leitura = float(ruido_leitura)
+        self.poisson = poisson
+        self.deriva_px_s = float(deriva_px_s)
+        self.deriva_intensidade_s = float(deriva_intensidade_s)
+        self.fps = float(fps)
+        self.quantidade = quantidade
+        self.rng = np.random.default_rng(semente)
+        self._indice = 0
+
+        colunas = np.arange(self.x_inicio, self.x_fim)
+        if wl_fit is None:
+            a = (720.0 - 380.0) / max(1, self.x_fim - 1 - self.x_inicio)
+            wl_fit = [a, 380.0 - a * self.x_inicio]
+        self.wl_fit = [float(wl_fit[0]), float(wl_fit[1])]
+        self.wl = self.wl_fit[0] * colunas + self.wl_fit[1]
+        self.perfil = self._reamostrar_perfil(perfil)
+        self._preparar_faixa(colunas)
+        self._desvio_fundo = np.float32(np.sqrt((self.fundo if self.poisson else 0.0) + self.ruido_leitura ** 2))
+
+    @property
+    def coeficientes(self):
+        """Reta verdadeira da faixa: y = coeficientes[0]*x + coeficientes[1]."""
+        a = np.tan(self.angulo)
+        return np.array([a, self.centro[1] - a * self.centro[0]])
+
+    def _reamostrar_perfil(self, perfil):
+        if perfil is None:
+            valores = perfil_leds_rgb(self.wl)
+        else:
+            if isinstance(perfil, str):
+                perfil = carregar_perfil(perfil)
+            if isinstance(perfil, tuple):
+                wl_nm, intensidade = (np.asarray(v, dtype=float) for v in perfil)
+                ordem = np.argsort(wl_nm)
+                valores = np.interp(self.wl, wl_nm[ordem], intensidade[ordem], left=0.0, right=0.0)
+            else:
+                perfil = np.asarray(perfil, dtype=float)
+                valores = np.interp(np.linspace(0, 1, self.wl.size), np.linspace(0, 1, perfil.size), perfil)
+        valores = np.clip(valores, 0.0, None)
+        maximo = valores.max()
+        return valores / maximo if maximo > 0 else valores
+
+    def _preparar_faixa(self, colunas):
+        """Pré-calcula a janela de linhas (±4σ) em torno da faixa para cada coluna."""
+        a = np.tan(self.angulo)
+        # Distância vertical equivalente a σ perpendicular
+        sigma_vertical = self.espessura / np.cos(self.angulo)
+        meia = int(np.ceil(4 * sigma_vertical)) + 1
+        self._colunas = colunas
+        self._y_base = self.centro[1] + a * (colunas - self.centro[0])
+        self._desloc = np.arange(-meia, meia + 1)
+        self._sigma_vertical = sigma_vertical
+
+    def _sortear_fundo(self):
+        """Fundo novo: gaussiana com a média e a variância de Poisson(fundo) + ruído de leitura."""
+        if self._desvio_fundo == 0:
+            return np.full((self.altura, self.largura), np.rint(self.fundo), dtype=np.int16)
+        fundo = self.rng.standard_normal((self.altura, self.largura), dtype=np.float32)
+        fundo *= self._desvio_fundo
+        fundo += np.float32(self.fundo)
+        return np.rint(fundo, out=fundo).astype(np.int16)
+
+    def _ler(self):
+        if self.quantidade is not None and self._indice >= self.quantidade:
+            return None
+        t = self._indice / self.fps
+        self._indice += 1
+        return self.renderizar(t), t
+
+    def renderizar(self, t=0.0):
+        """Gera o frame BGR (uint8) no tempo de vídeo ``t`` (segundos)."""
+        y_centro = self._y_base + self.deriva_px_s * t / np.cos(self.angulo)
+        linhas = np.floor(y_centro).astype(np.int64)[np.newaxis, :] + self._desloc[:, np.newaxis]
+        distancia = (linhas - y_centro[np.newaxis, :]) / self._sigma_vertical
+        ganho = self.pico * (1.0 + self.deriva_intensidade_s * t)
+        sinal = ganho * self.perfil[np.newaxis, :] * np.exp(-0.5 * distancia * distancia)
+
+        valido = (linhas >= 0) & (linhas < self.altura)
+        colunas = np.broadcast_to(self._colunas[np.newaxis, :], linhas.shape)
+
+        sinal = sinal[valido]
+        sinal = self.rng.poisson(sinal) if self.poisson else np.rint(sinal)
+        # Saturação de 8 bits antes de voltar a int16 (evita estouro com ganhos altos)
+        sinal = np.minimum(sinal, 255).astype(np.int16)
+
+        imagem = self._sortear_fundo()
+        imagem[linhas[valido], colunas[valido]] += sinal
+        cinza = np.clip(imagem, 0, 255).astype(np.uint8)
+        return cv2.cvtColor(cinza, cv2.COLOR_GRAY2BGR)
+
+    def reiniciar(self):
+        super().reiniciar()
+        self._indice = 0
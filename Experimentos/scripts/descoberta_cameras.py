@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Descoberta de webcams em paralelo, com tempo limite por índice e cache.
+
+Cada índice é testado em uma thread própria (abrir + ler um frame); índices
+que não respondem dentro de ``timeout`` são considerados indisponíveis sem
+travar quem chamou. O resultado fica em cache por ``ttl`` segundos, em
+memória e opcionalmente em um JSON, para que a próxima inicialização não
+precise sondar as câmeras de novo. Numa reconexão basta sondar o índice que
+caiu com ``sondar_em_segundo_plano``.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as TempoEsgotado
+
+import cv2
+
+
+RESOLUCOES_COMUNS = ((320, 240), (640, 480), (800, 600), (1280, 720), (1920, 1080), (2560, 1440), (3840, 2160))
+
+
+def arquivo_cache_padrao(nome="cameras_cache.json"):
+    """
+    Caminho do cache na pasta de cache do usuário (``%LOCALAPPDATA%`` no
+    Windows, ``$XDG_CACHE_HOME`` ou ``~/.cache`` nos demais), e não na pasta
+    de onde o programa foi iniciado.
+    """
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "osa_visivel", nome)
+
+
+def sondar_camera(indice, testar_resolucoes=False):
+    """
+    Abre a webcam ``indice``, lê um frame e coleta resolução e FPS.
+
+    Args:
+        indice: Índice da webcam no OpenCV
+        testar_resolucoes: Também testa ``RESOLUCOES_COMUNS`` (lento: reconfigura a câmera)
+
+    Returns:
+        Dicionário com ``indice``, ``disponivel``, ``resolucao``, ``fps``,
+        ``resolucoes`` e ``verificado_em``
+    """
+    info = DescobertaCameras._indisponivel(indice)
+    captura = cv2.VideoCapture(indice)
+    try:
+        validacao, frame = captura.read()
+        if not validacao:
+            return info
+        info["disponivel"] = True
+        info["resolucao"] = [int(frame.shape[1]), int(frame.shape[0])]
+        info["fps"] = float(captura.get(cv2.CAP_PROP_FPS) or 0.0)
+        info["resolucoes"] = [info["resolucao"]]
+        if testar_resolucoes:
+            for largura, altura in RESOLUCOES_COMUNS:
+                captura.set(cv2.CAP_PROP_FRAME_WIDTH, largura)
+                captura.set(cv2.CAP_PROP_FRAME_HEIGHT, altura)
+                obtida = [int(captura.get(cv2.CAP_PROP_FRAME_WIDTH)), int(captura.get(cv2.CAP_PROP_FRAME_HEIGHT))]
+                if obtida not in info["resolucoes"]:
+                    info["resolucoes"].append(obtida)
+            info["resolucoes"].sort()
+    finally:
+        captura.release()
+    return info
+
+
+class DescobertaCameras:
+    """Sonda índices de webcam concorrentemente e guarda o resultado em cache."""
+
+    def __init__(self, max_indices=6, timeout=3.0, ttl=60.0, arquivo_cache=None):
+        """
+        Args:
+            max_indices: Índices testados (0 .. max_indices-1)
+            timeout: Tempo máximo de espera por índice, em segundos
+            ttl: Validade do cache, em segundos
+            arquivo_cache: JSON onde o cache é persistido entre execuções (None = só memória)
+        """
+        self.max_indices = int(max_indices)
+        self.timeout = float(timeout)
+        self.ttl = float(ttl)
+        self.arquivo_cache = arquivo_cache
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._listado_em = 0.0
+        self._carregar_cache()
+
+    # ------------------------------------------------------------------
+    # Sondagem
+    # ------------------------------------------------------------------
+
+    def sondar_em_segundo_plano(self, indice, testar_resolucoes=False):
+        """
+        Sonda ``indice`` em uma thread daemon e atualiza o cache ao terminar.
+
+        Returns:
+            ``concurrent.futures.Future`` com o dicionário de ``sondar_camera``
+        """
+        futuro = Future()
+
+        def tarefa():
+            try:
+                info = sondar_camera(indice, testar_resolucoes)
+            except Exception:
+                info = self._indisponivel(indice)
+            with self._lock:
+                self._cache[indice] = info
+            futuro.set_result(info)
+
+        # Daemon: um driver travado não impede o programa de encerrar
+        threading.Thread(target=tarefa, name=f"osa-sonda-camera-{indice}", daemon=True).start()
+        return futuro
+
+    def sondar(self, indice, testar_resolucoes=False):
+        """Sonda um único índice, esperando no máximo ``timeout`` (indisponível se estourar)."""
+        futuro = self.sondar_em_segundo_plano(indice, testar_resolucoes)
+        try:
+            return futuro.result(self.timeout)
+        except TempoEsgotado:
+            return self._indisponivel(indice)
+
+    def listar(self, forcar=False):
+        """
+        Retorna os índices de webcams disponíveis, sondando todos em paralelo
+        se o cache estiver vencido (ou ``forcar``).
+        """
+        if not forcar and time.time() - self._listado_em < self.ttl:
+            return self.disponiveis()
+
+        futuros = [self.sondar_em_segundo_plano(indice) for indice in range(self.max_indices)]
+        limite = time.monotonic() + self.timeout
+        for indice, futuro in enumerate(futuros):
+            try:
+                futuro.result(max(0.0, limite - time.monotonic()))
+            except TempoEsgotado:
+                with self._lock:
+                    self._cache[indice] = self._indisponivel(indice)
+        self._listado_em = time.time()
+        self._salvar_cache()
+        return self.disponiveis()
+
+    @staticmethod
+    def _indisponivel(indice):
+        return {"indice": indice, "disponivel": False, "resolucao": None, "fps": None,
+                "resolucoes": [], "verificado_em": time.time()}
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def disponiveis(self):
+        """Índices disponíveis segundo o cache atual (não sonda)."""
+        with self._lock:
+            return sorted(i for i, info in self._cache.items() if info["disponivel"])
+
+    def info(self, indice):
+        """Dicionário de ``sondar_camera`` em cache para ``indice`` (ou None)."""
+        with self._lock:
+            return self._cache.get(indice)
+
+    def descrever(self):
+        """Texto curto com resolução e FPS das webcams disponíveis, para o log."""
+        partes = []
+        for indice in self.disponiveis():
+            info = self.info(indice)
+            largura, altura = info["resolucao"]
+            partes.append(f"{indice}: {largura}x{altura} @ {info['fps']:.0f} fps")
+        return ", ".join(partes)
+
+    def invalidar(self):
+        self._listado_em = 0.0
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def _carregar_cache(self):
+        if self.arquivo_cache is None:
+            return
+        try:
+            with open(self.arquivo_cache, "r") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return
+        if time.time() - dados.get("listado_em", 0.0) >= self.ttl:
+            return
+        self._cache = {int(info["indice"]): info for info in dados.get("cameras", [])}
+        self._listado_em = dados["listado_em"]
+
+    def _salvar_cache(self):
+        if self.arquivo_cache is None:
+            return
+        with self._lock:
+            dados = {"listado_em": self._listado_em, "cameras": list(self._cache.values())}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.arquivo_cache)), exist_ok=True)
+            with open(self.arquivo_cache, "w") as f:
+                json.dump(dados, f, indent=4)
+        except OSError:
+            pass
@@ -17,6 +17,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.colors import LogNorm, Normalize
 
+from espectro_io import carregar_pasta, configurar_cache, resumo_cache
+
 
 # ---------------------------------------------------------------------------
 # Configurações
@@ -78,47 +80,13 @@ def _spines_clean(ax):
 # Leitura dos dados
 # ---------------------------------------------------------------------------
 
-def carregar_espectro(arquivo):
-    """Lê ``spectrum*.txt`` (wl em metros, intensidade) e retorna (wl_nm, I)."""
-    dados = np.loadtxt(arquivo, delimiter=";")
-    wl_nm = dados[:, 0] * 1e9
-    intensidade = dados[:, 1]
-    return wl_nm, intensidade
-
-
 def carregar_matriz_temporal(pasta, faixa_nm=FAIXA_VISIVEL_NM):
     """
     Lê todos os ``spectrum*.txt`` de ``pasta`` (em ordem) e devolve:
         wl     -> array 1D de comprimento de onda (nm)
         matriz -> array 2D (n_amostras, n_pontos)
     """
-    pasta = Path(pasta)
-    arquivos = sorted(pasta.glob("spectrum*.txt"))
-    if not arquivos:
-        raise FileNotFoundError(f"Nenhum spectrum*.txt em {pasta}")
-
-    wl_ref, _ = carregar_espectro(arquivos[0])
-    if faixa_nm is not None:
-        mask_ref = (wl_ref >= faixa_nm[0]) & (wl_ref <= faixa_nm[1])
-        wl_ref = wl_ref[mask_ref]
-    else:
-        mask_ref = np.ones_like(wl_ref, dtype=bool)
-
-    matriz = np.empty((len(arquivos), wl_ref.size), dtype=float)
-
-    for i, arquivo in enumerate(arquivos):
-        wl_i, inten_i = carregar_espectro(arquivo)
-        if faixa_nm is not None:
-            mask_i = (wl_i >= faixa_nm[0]) & (wl_i <= faixa_nm[1])
-            inten_i = inten_i[mask_i]
-            wl_i = wl_i[mask_i]
-
-        # Alinha por interpolação caso a grade varie entre arquivos
-        if inten_i.size != wl_ref.size or not np.allclose(wl_i, wl_ref):
-            inten_i = np.interp(wl_ref, wl_i, inten_i)
-
-        matriz[i] = inten_i
-
+    wl_ref, matriz, _ = carregar_pasta(pasta, "spectrum*.txt", faixa_nm)
     return wl_ref, matriz
 
 
@@ -241,7 +209,13 @@ def main():
         default="linear",
         help="Escala de intensidade no colorbar (default: linear).",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Converte todos os arquivos de novo, sem usar nem gravar o cache de espectros (ver espectro_io).",
+    )
     args = parser.parse_args()
+    configurar_cache(ativo=not args.no_cache)
 
     faixa = (float(args.wl_min), float(args.wl_max))
 
@@ -249,6 +223,7 @@ def main():
     for fonte in fontes:
         gerar_espectograma_fonte(fonte, faixa_nm=faixa, escala=args.escala)
 
+    print(f"[INFO] {resumo_cache()}")
     print("[OK] Espectogramas gerados.")
 
 
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura de espectros em arquivo, comum a todas as análises e visualizadores.
+
+Formatos reconhecidos automaticamente:
+    "visivel"  -> TXT do OSA Visível: ``wl;intensidade`` por linha, wl em metros
+    "thorlabs" -> CSV do ThorLabs FTS: cabeçalho ``#...`` e dados ``wl;intensidade``
+                  (nm) entre ``[Data]`` e ``[EndOfFile]``
+    "wavedata" -> CSV WaveData do OSA de bancada: ``Wavelength(A),Level(A),...``
+                  com os traços A, B, C, D, E e I lado a lado (nm)
+
+Todas as funções devolvem arrays float64 com o comprimento de onda em nm,
+qualquer que seja a unidade do arquivo (valores abaixo de 1e-3 são tomados
+como metros). O arquivo é lido de uma vez e convertido por NumPy; só quando
+há linhas malformadas (comentários, campos vazios) a conversão cai para o
+modo linha a linha, descartando o que não é número.
+
+Os espectros já convertidos ficam em um cache em disco, um arquivo
+``.espectros_cache.npz`` por pasta de dados, e são reaproveitados enquanto o
+arquivo de origem tiver o mesmo tamanho e a mesma data de modificação (ou,
+com ``hash_conteudo``, o mesmo SHA-1, o que sobrevive a um ``git checkout``).
+Arquivos alterados são convertidos de novo e substituem a entrada antiga;
+entradas de arquivos apagados somem na próxima gravação. O cache é gravado
+ao fim do processo (também nos processos de ``processamento_paralelo``).
+``configurar_cache(ativo=False)`` (opção ``--no-cache`` dos scripts) ou a
+variável de ambiente ``ESPECTRO_SEM_CACHE=1`` o desligam;
+``ESPECTRO_CACHE_HASH=1`` liga a comparação por conteúdo.
+
+Uso:
+    wl_nm, intensidade = carregar_espectro("spectrum001.txt")
+    wl_nm, matriz, arquivos = carregar_pasta("Temporal", faixa_nm=(380, 780))
+    print(resumo_cache())
+"""
+
+import hashlib
+import json
+import multiprocessing.util
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+FORMATOS = ("visivel", "thorlabs", "wavedata")
+
+TRACOS_WAVEDATA = ("A", "B", "C", "D", "E", "I")
+
+NOME_CACHE = ".espectros_cache.npz"
+
+# Incrementar quando a conversão mudar, para descartar os caches antigos
+VERSAO_CACHE = 1
+
+
+def detectar_formato(dados):
+    """Formato de um arquivo a partir do conteúdo (bytes)."""
+    inicio = dados[:8192]
+    if b"[Data]" in inicio:
+        return "thorlabs"
+    if b"Wavelength" in inicio and b"Level" in inicio:
+        return "wavedata"
+    return "visivel"
+
+
+def _valor(campo):
+    try:
+        return float(campo)
+    except ValueError:
+        return np.nan
+
+
+def converter_colunas(dados, separador=b";", n_colunas=2):
+    """
+    Converte linhas ``v0<sep>v1...`` (bytes) em uma matriz (linhas, n_colunas).
+
+    Linhas com menos de ``n_colunas`` campos são descartadas; campos que não são
+    número viram NaN (e, com duas colunas, a linha inteira é descartada).
+    """
+    dados = dados.strip()
+    if not dados:
+        return np.empty((0, n_colunas))
+    try:
+        valores = np.array(dados.replace(separador, b" ").split(), dtype=float)
+        if valores.size == n_colunas * (dados.count(b"\n") + 1):
+            return valores.reshape(-1, n_colunas)
+    except ValueError:
+        pass
+    linhas = []
+    for linha in dados.splitlines():
+        partes = linha.split(separador)
+        if len(partes) >= n_colunas:
+            linhas.append([_valor(parte) for parte in partes[:n_colunas]])
+    matriz = np.array(linhas, dtype=float).reshape(-1, n_colunas)
+    if n_colunas == 2:
+        matriz = matriz[~np.isnan(matriz).any(axis=1)]
+    return matriz
+
+
+def _em_nm(wl):
+    """Comprimentos de onda em metros (TXT do OSA Visível) passam para nm."""
+    if wl.size and np.nanmax(np.abs(wl)) < 1e-3:
+        return wl * 1e9
+    return wl
+
+
+def _ler_bytes(caminho):
+    with open(caminho, "rb") as f:
+        return f.read()
+
+
+def _tracos_wavedata(dados):
+    inicio = dados.find(b"Level")
+    inicio = dados.find(b"\n", inicio) + 1
+    colunas = converter_colunas(dados[inicio:], b",", 2 * len(TRACOS_WAVEDATA))
+    tracos = {}
+    for i, traco in enumerate(TRACOS_WAVEDATA):
+        wl, intensidade = colunas[:, 2 * i], colunas[:, 2 * i + 1]
+        # Traços vazios ou desligados vêm com campos em branco ou valores sentinela
+        valido = (wl >= 200) & (wl <= 2000) & (np.abs(intensidade) < 1e6)
+        tracos[traco] = (wl[valido], intensidade[valido])
+    return tracos
+
+
+def carregar_tracos(caminho):
+    """
+    Lê todos os traços de um CSV WaveData.
+
+    Returns:
+        Dicionário traço -> (wl_nm, intensidade); traços vazios vêm com arrays vazios
+    """
+    return _tracos_wavedata(_ler_bytes(caminho))
+
+
+def _converter_espectro(dados, caminho, formato, traco):
+    formato = formato or detectar_formato(dados)
+    if formato == "wavedata":
+        wl, intensidade = _tracos_wavedata(dados)[traco]
+    else:
+        if formato == "thorlabs":
+            marcador = dados.find(b"[Data]")
+            if marcador < 0:
+                raise ValueError(f"Seção [Data] ausente em {caminho}")
+            inicio = dados.find(b"\n", marcador) + 1
+            fim = dados.find(b"[EndOfFile]", inicio)
+            dados = dados[inicio:fim if fim >= 0 else len(dados)]
+        elif formato != "visivel":
+            raise ValueError(f"Formato desconhecido: {formato}. Use um de {FORMATOS}.")
+        colunas = converter_colunas(dados)
+        wl, intensidade = colunas[:, 0], colunas[:, 1]
+    if wl.size == 0:
+        raise ValueError(f"Nenhum dado de espectro em {caminho}")
+    return _em_nm(wl), intensidade
+
+
+def _travar(caminho, espera=10.0, abandonada=60.0):
+    """Cria ``caminho`` com exclusividade, esperando outro processo soltá-lo (ou removendo uma trava abandonada)."""
+    limite = time.monotonic() + espera
+    while True:
+        try:
+            return os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(caminho) > abandonada:
+                    os.remove(caminho)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > limite:
+                raise
+            time.sleep(0.01)
+
+
+class CacheEspectros:
+    """Espectros convertidos, por pasta, guardados em ``NOME_CACHE`` dentro de cada pasta."""
+
+    def __init__(self, ativo=True, hash_conteudo=False):
+        self.ativo = ativo
+        self.hash_conteudo = hash_conteudo
+        self.acertos = 0
+        self.convertidos = 0
+        self.desatualizados = 0
+        # pasta -> {(arquivo, formato, traco): {"tamanho", "mtime_ns", "hash", "wl", "intensidade"}}
+        self._pastas = {}
+        self._alteradas = set()
+        self._sem_escrita = set()
+        self._pid_finalizacao = None
+
+    def _entradas(self, pasta):
+        if pasta not in self._pastas:
+            self._pastas[pasta] = self._ler_pasta(pasta)
+        return self._pastas[pasta]
+
+    @staticmethod
+    def _ler_pasta(pasta):
+        arquivo = os.path.join(pasta, NOME_CACHE)
+        try:
+            with np.load(arquivo) as bundle:
+                if int(bundle["versao"]) != VERSAO_CACHE:
+                    return {}
+                indice = json.loads(str(bundle["indice"]))
+                wl, intensidade, limites = bundle["wl"], bundle["intensidade"], bundle["limites"]
+        except (OSError, KeyError, ValueError):
+            return {}
+        entradas = {}
+        for i, entrada in enumerate(indice):
+            chave = (entrada.pop("arquivo"), entrada.pop("formato"), entrada.pop("traco"))
+            entrada["wl"] = wl[limites[i]:limites[i + 1]]
+            entrada["intensidade"] = intensidade[limites[i]:limites[i + 1]]
+            entradas[chave] = entrada
+        return entradas
+
+    def carregar(self, caminho, formato, traco):
+        """Devolve (wl_nm, intensidade) do cache, ou converte o arquivo e guarda o resultado."""
+        caminho = os.path.abspath(caminho)
+        pasta, nome = os.path.split(caminho)
+        estado = os.stat(caminho)
+        chave = (nome, formato or "auto", traco)
+        entradas = self._entradas(pasta)
+        entrada = entradas.get(chave)
+
+        dados = None
+        assinatura = None
+        if entrada is not None and entrada["tamanho"] == estado.st_size:
+            if self.hash_conteudo:
+                dados = _ler_bytes(caminho)
+                assinatura = hashlib.sha1(dados).hexdigest()
+                valida = entrada["hash"] == assinatura
+            else:
+                valida = entrada["mtime_ns"] == estado.st_mtime_ns
+            if valida:
+                self.acertos += 1
+                return entrada["wl"].copy(), entrada["intensidade"].copy()
+        if entrada is not None:
+            self.desatualizados += 1
+
+        if dados is None:
+            dados = _ler_bytes(caminho)
+        wl, intensidade = _converter_espectro(dados, caminho, formato, traco)
+        self.convertidos += 1
+        entradas[chave] = {
+            "tamanho": estado.st_size,
+            "mtime_ns": estado.st_mtime_ns,
+            "hash": assinatura or hashlib.sha1(dados).hexdigest(),
+            "wl": wl,
+            "intensidade": intensidade,
+        }
+        self._marcar_alterada(pasta)
+        return wl.copy(), intensidade.copy()
+
+    def _marcar_alterada(self, pasta):
+        self._alteradas.add(pasta)
+        # Os finalizadores do multiprocessing também rodam ao fim dos processos filhos (o atexit não)
+        if self._pid_finalizacao != os.getpid():
+            self._pid_finalizacao = os.getpid()
+            multiprocessing.util.Finalize(None, self.salvar, exitpriority=0)
+
+    def salvar(self):
+        """Grava as pastas com entradas novas, mescladas com o que outro processo já tiver gravado."""
+        while self._alteradas:
+            pasta = self._alteradas.pop()
+            if pasta in self._sem_escrita:
+                continue
+            trava = os.path.join(pasta, NOME_CACHE + ".lock")
+            try:
+                # Leitura, mescla e gravação sob trava, para processos simultâneos não perderem entradas
+                descritor = _travar(trava)
+                try:
+                    entradas = {**self._ler_pasta(pasta), **self._pastas[pasta]}
+                    entradas = {chave: entrada for chave, entrada in entradas.items()
+                                if os.path.exists(os.path.join(pasta, chave[0]))}
+                    self._gravar_pasta(pasta, entradas)
+                finally:
+                    os.close(descritor)
+                    os.remove(trava)
+            except OSError as e:
+                self._sem_escrita.add(pasta)
+                print(f"[WARNING] Cache de espectros não gravado em {pasta}: {e}", file=sys.stderr)
+                continue
+            self._pastas[pasta] = entradas
+
+    @staticmethod
+    def _gravar_pasta(pasta, entradas):
+        limites = np.cumsum([0] + [entrada["wl"].size for entrada in entradas.values()])
+        indice = [{"arquivo": arquivo, "formato": formato, "traco": traco,
+                   **{campo: entrada[campo] for campo in ("tamanho", "mtime_ns", "hash")}}
+                  for (arquivo, formato, traco), entrada in entradas.items()]
+        vazio = np.empty(0)
+        temporario = os.path.join(pasta, f"{NOME_CACHE}.{os.getpid()}.tmp")
+        try:
+            with open(temporario, "wb") as f:
+                np.savez(f, versao=VERSAO_CACHE, indice=json.dumps(indice), limites=limites,
+                         wl=np.concatenate([vazio] + [entrada["wl"] for entrada in entradas.values()]),
+                         intensidade=np.concatenate([vazio] + [entrada["intensidade"] for entrada in entradas.values()]))
+            os.replace(temporario, os.path.join(pasta, NOME_CACHE))
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    def resumo(self):
+        total = self.acertos + self.convertidos
+        fracao = 100.0 * self.acertos / total if total else 0.0
+        return (f"Cache de espectros: {self.acertos} lidos do cache, {self.convertidos} convertidos "
+                f"({self.desatualizados} desatualizados; {fracao:.1f} % de acertos)")
+
+
+_cache = CacheEspectros(ativo=os.environ.get("ESPECTRO_SEM_CACHE", "0") in ("", "0"),
+                        hash_conteudo=os.environ.get("ESPECTRO_CACHE_HASH", "0") not in ("", "0"))
+
+
+def configurar_cache(ativo=True, hash_conteudo=None):
+    """
+    Liga ou desliga o cache em disco (``ativo=False`` vale também para os
+    processos filhos criados depois) e escolhe se a validade é conferida pelo
+    conteúdo (SHA-1) em vez de tamanho + data de modificação.
+    """
+    _cache.ativo = ativo
+    os.environ["ESPECTRO_SEM_CACHE"] = "0" if ativo else "1"
+    if hash_conteudo is not None:
+        _cache.hash_conteudo = hash_conteudo
+        os.environ["ESPECTRO_CACHE_HASH"] = "1" if hash_conteudo else "0"
+
+
+def estatisticas_cache():
+    """Dicionário com acertos, convertidos e desatualizados deste processo."""
+    return {"acertos": _cache.acertos, "convertidos": _cache.convertidos, "desatualizados": _cache.desatualizados}
+
+
+def somar_estatisticas_cache(estatisticas):
+    """Soma às deste processo as estatísticas vindas de outro (ex.: um processo de ``mapear_arquivos``)."""
+    for chave, valor in estatisticas.items():
+        setattr(_cache, chave, getattr(_cache, chave) + valor)
+
+
+def resumo_cache():
+    """Linha de resumo das estatísticas do cache (ou aviso de que está desligado)."""
+    return _cache.resumo() if _cache.ativo else "Cache de espectros desligado"
+
+
+def salvar_cache():
+    """Grava agora as entradas novas (o fim do processo também grava)."""
+    _cache.salvar()
+
+
+def carregar_espectro(caminho, formato=None, traco="A"):
+    """
+    Lê um espectro em qualquer dos ``FORMATOS``, passando pelo cache em disco.
+
+    Args:
+        caminho: Arquivo de espectro
+        formato: Um de ``FORMATOS`` (None = detecta pelo conteúdo)
+        traco: Traço lido de arquivos WaveData
+
+    Returns:
+        Tupla (wl_nm, intensidade) de arrays float64
+
+    Raises:
+        ValueError: Arquivo sem nenhum ponto numérico
+    """
+    if _cache.ativo:
+        return _cache.carregar(caminho, formato, traco)
+    return _converter_espectro(_ler_bytes(caminho), caminho, formato, traco)
+
+
+def carregar_pasta(pasta, padrao="spectrum*.txt", faixa_nm=None, arquivos=None, formato=None):
+    """
+    Lê todos os espectros de uma pasta para uma única matriz pré-alocada.
+
+    O eixo é o do primeiro arquivo; espectros com outra grade são interpolados
+    nele.
+
+    Args:
+        pasta: Pasta dos espectros
+        padrao: Padrão glob dos arquivos (ordem alfabética)
+        faixa_nm: Tupla (min, max) para recortar o eixo, opcional
+        arquivos: Lista explícita de arquivos (ignora ``pasta``/``padrao``)
+        formato: Formato de todos os arquivos (None = detecta em cada um)
+
+    Returns:
+        Tupla (wl_nm, matriz (n_arquivos, n_pontos), arquivos)
+    """
+    if arquivos is None:
+        arquivos = sorted(Path(pasta).glob(padrao))
+        if not arquivos:
+            raise FileNotFoundError(f"Nenhum {padrao} em {pasta}")
+    arquivos = [Path(arquivo) for arquivo in arquivos]
+
+    wl_ref, primeiro = carregar_espectro(arquivos[0], formato)
+    mascara = np.ones(wl_ref.size, dtype=bool)
+    if faixa_nm is not None:
+        mascara = (wl_ref >= faixa_nm[0]) & (wl_ref <= faixa_nm[1])
+    wl_completo = wl_ref
+    wl_ref = wl_ref[mascara]
+
+    matriz = np.empty((len(arquivos), wl_ref.size))
+    matriz[0] = primeiro[mascara]
+    for i, arquivo in enumerate(arquivos[1:], start=1):
+        wl_i, intensidade = carregar_espectro(arquivo, formato)
+        if wl_i.size == wl_completo.size and np.allclose(wl_i, wl_completo):
+            matriz[i] = intensidade[mascara]
+        else:
+            # Grade diferente da do primeiro arquivo: interpola no eixo de referência
+            ordem = np.argsort(wl_i)
+            matriz[i] = np.interp(wl_ref, wl_i[ordem], intensidade[ordem])
+    return wl_ref, matriz, arquivos
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extração vetorizada do perfil de intensidade ao longo da reta de calibração.
+
+Os índices (linha, coluna) de cada pixel amostrado são calculados uma única
+vez por calibração; a cada frame basta uma indexação avançada do NumPy sobre
+a região de interesse, sem converter o frame inteiro para tons de cinza.
+
+``amostrar_canais`` devolve, da mesma indexação, o espectro em tons de cinza
+e os dos canais R, G e B: os quatro vêm do mesmo frame e ficam alinhados no
+tempo (layout dos arquivos ``spectrumNNN``/``spectrum_r_NNN``/...).
+
+A filtragem (``suavizar``) é feita por uma ``CadeiaFiltros`` pré-calculada;
+a padrão equivale ao ``savgol_filter(y, 7, 2)``.
+"""
+
+import numpy as np
+import cv2
+
+from cadeia_filtros import CadeiaFiltros
+
+# Ordem das linhas de amostrar_canais (cinza + canais do frame BGR)
+CANAIS = ("cinza", "r", "g", "b")
+
+
+class ExtratorEspectro:
+    """
+    Amostra o espectro ao longo da reta ``y = coeficientes[0]*x + coeficientes[1]``.
+
+    Com ``largura_banda > 1`` é feita a média de uma faixa de pixels
+    perpendicular à reta, centrada nela.
+    """
+
+    def __init__(self, x_detection, coeficientes, largura_banda=1, filtros=None):
+        """
+        Args:
+            x_detection: Colunas (pixels) onde o espectro é amostrado
+            coeficientes: Coeficientes (inclinação, intercepto) da reta
+            largura_banda: Número de pixels perpendiculares à reta a serem promediados
+            filtros: ``CadeiaFiltros`` aplicada por ``suavizar`` (None = Savitzky-Golay 7/2)
+        """
+        self.filtros = filtros if filtros is not None else CadeiaFiltros()
+        self.x_detection = None
+        self.coeficientes = None
+        self.largura_banda = None
+        self.indices = None
+        self.atualizar(x_detection, coeficientes, largura_banda)
+
+    def atualizar(self, x_detection, coeficientes, largura_banda=None):
+        """
+        Recalcula os índices apenas se a calibração tiver mudado.
+
+        Returns:
+            True se os índices foram recalculados
+        """
+        x_detection = np.asarray(x_detection, dtype=np.int64)
+        coeficientes = np.asarray(coeficientes, dtype=float)
+        if largura_banda is None:
+            largura_banda = self.largura_banda or 1
+        largura_banda = max(1, int(largura_banda))
+
+        if (self.x_detection is not None
+                and largura_banda == self.largura_banda
+                and np.array_equal(x_detection, self.x_detection)
+                and np.array_equal(coeficientes, self.coeficientes)):
+            return False
+
+        self.x_detection = x_detection
+        self.coeficientes = coeficientes
+        self.largura_banda = largura_banda
+        # Tupla trocada de uma só vez: seguro para leitura em outra thread
+        self.indices = self._calcular_indices()
+        return True
+
+    def _calcular_indices(self):
+        """Gera as matrizes (largura_banda, n) de linhas e colunas amostradas."""
+        a, b = self.coeficientes[0], self.coeficientes[1]
+        x = self.x_detection.astype(float)
+        y = a * x + b
+
+        if self.largura_banda == 1:
+            # Mesmo arredondamento de obter_espectro original
+            return (np.round(y).astype(np.int64)[np.newaxis, :],
+                    self.x_detection[np.newaxis, :])
+
+        # Deslocamentos ao longo da normal unitária (-a, 1)/sqrt(1 + a²)
+        norma = np.sqrt(1.0 + a * a)
+        desloc = np.arange(self.largura_banda, dtype=float) - (self.largura_banda - 1) / 2.0
+        linhas = np.round(y[np.newaxis, :] + desloc[:, np.newaxis] / norma).astype(np.int64)
+        colunas = np.round(x[np.newaxis, :] - desloc[:, np.newaxis] * a / norma).astype(np.int64)
+        return linhas, colunas
+
+    @staticmethod
+    def _validar(linhas, colunas, altura, largura):
+        if (linhas.min() < 0 or linhas.max() >= altura
+                or colunas.min() < 0 or colunas.max() >= largura):
+            raise IndexError("Reta de calibração fora dos limites do frame. Faça a calibração.")
+
+    def amostrar(self, frame):
+        """
+        Retorna as intensidades em tons de cinza (sem filtragem) ao longo da reta.
+
+        Args:
+            frame: Frame BGR (altura, largura, 3) ou já em tons de cinza (altura, largura)
+        """
+        linhas, colunas = self.indices
+        self._validar(linhas, colunas, frame.shape[0], frame.shape[1])
+        pixels = frame[linhas, colunas]
+        if pixels.ndim == 3:
+            # Converte apenas os pixels amostrados, com o mesmo arredondamento do OpenCV
+            pixels = cv2.cvtColor(np.ascontiguousarray(pixels), cv2.COLOR_BGR2GRAY)
+        if pixels.shape[0] == 1:
+            return pixels[0].astype(float)
+        return pixels.mean(axis=0)
+
+    def amostrar_canais(self, frame):
+        """
+        Retorna uma matriz (4, n) com as intensidades cinza, R, G e B (sem filtragem).
+
+        Uma única indexação do frame alimenta os quatro espectros. Em frames já
+        em tons de cinza as quatro linhas são iguais.
+
+        Args:
+            frame: Frame BGR (altura, largura, 3) ou em tons de cinza (altura, largura)
+        """
+        linhas, colunas = self.indices
+        self._validar(linhas, colunas, frame.shape[0], frame.shape[1])
+        pixels = frame[linhas, colunas]
+        if pixels.ndim == 2:
+            cinza = pixels.mean(axis=0)
+            return np.vstack((cinza, cinza, cinza, cinza))
+        pixels = np.ascontiguousarray(pixels)
+        cinza = cv2.cvtColor(pixels, cv2.COLOR_BGR2GRAY).mean(axis=0)
+        bgr = pixels.mean(axis=0)
+        return np.vstack((cinza, bgr[:, 2], bgr[:, 1], bgr[:, 0]))
+
+    def suavizar(self, intensidades):
+        """Aplica a cadeia de filtros ao longo do último eixo (um ou vários espectros)."""
+        return self.filtros.aplicar(intensidades)
+
+    def obter_espectro(self, frame):
+        """Retorna ``(x_detection, intensidades suavizadas)`` como em ``obter_espectro``."""
+        return self.x_detection, self.suavizar(self.amostrar(frame))
+
+    def obter_espectros_canais(self, frame):
+        """Retorna ``(x_detection, matriz (4, n) suavizada)`` na ordem de ``CANAIS``."""
+        return self.x_detection, self.suavizar(self.amostrar_canais(frame))
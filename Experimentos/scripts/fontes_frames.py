@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fontes de frames com interface única: webcam, vídeo gravado, imagem fixa e
+pasta de imagens.
+
+Cada ``ler()`` retorna um ``Frame(seq, timestamp, imagem)`` ou None quando a
+fonte falhou (câmera) ou terminou (vídeo/pasta sem repetição). Nas fontes
+gravadas o timestamp é o tempo do próprio vídeo (``indice / fps``), de modo
+que uma reprodução é determinística: com ``tempo_real=False`` os frames são
+entregues na velocidade máxima de decodificação, com os mesmos ``seq`` e
+``timestamp`` de uma reprodução em tempo real.
+
+Todas as fontes também expõem ``read()``/``release()`` como ``cv2.VideoCapture``.
+"""
+
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import cv2
+
+
+Frame = namedtuple("Frame", ["seq", "timestamp", "imagem"])
+
+EXTENSOES_IMAGEM = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+class FonteFrames:
+    """
+    Base das fontes de frames.
+
+    Subclasses implementam ``_ler()``, que retorna ``(imagem, timestamp)`` ou None.
+    ``ao_vivo`` indica se um None significa falha do dispositivo (True) ou fim
+    da gravação (False).
+    """
+
+    ao_vivo = False
+
+    def __init__(self, tempo_real=False):
+        self.tempo_real = tempo_real
+        self.seq = 0
+        self._inicio_relogio = None
+        self._inicio_midia = None
+
+    def ler(self):
+        """Retorna o próximo ``Frame`` ou None."""
+        lido = self._ler()
+        if lido is None:
+            return None
+        imagem, timestamp = lido
+        if self.tempo_real and not self.ao_vivo:
+            self._ritmar(timestamp)
+        self.seq += 1
+        return Frame(self.seq, timestamp, imagem)
+
+    def _ler(self):
+        raise NotImplementedError
+
+    def _ritmar(self, timestamp):
+        """Espera até o instante de parede correspondente a ``timestamp``."""
+        agora = time.perf_counter()
+        if self._inicio_relogio is None:
+            self._inicio_relogio, self._inicio_midia = agora, timestamp
+            return
+        restante = (timestamp - self._inicio_midia) - (agora - self._inicio_relogio)
+        if restante > 0:
+            time.sleep(restante)
+
+    def reiniciar(self):
+        """Volta ao início (fontes gravadas); ``seq`` recomeça do zero."""
+        self.seq = 0
+        self._inicio_relogio = None
+
+    def read(self):
+        """Compatível com ``cv2.VideoCapture.read``."""
+        frame = self.ler()
+        return (False, None) if frame is None else (True, frame.imagem)
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame = self.ler()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class FonteCamera(FonteFrames):
+    """Webcam ao vivo; o timestamp é o relógio do sistema no momento da leitura."""
+
+    ao_vivo = True
+
+    def __init__(self, indice=0, largura=None, altura=None):
+        """
+        Args:
+            indice: Índice da webcam no OpenCV
+            largura: Largura pedida ao driver (None = padrão da câmera)
+            altura: Altura pedida ao driver (None = padrão da câmera)
+        """
+        super().__init__(tempo_real=True)
+        self.indice = indice
+        self.captura = cv2.VideoCapture(indice)
+        if largura is not None and altura is not None:
+            self.captura.set(cv2.CAP_PROP_FRAME_WIDTH, largura)
+            self.captura.set(cv2.CAP_PROP_FRAME_HEIGHT, altura)
+
+    def _ler(self):
+        validacao, imagem = self.captura.read()
+        if not validacao:
+            return None
+        return imagem, time.time()
+
+    def isOpened(self):
+        return self.captura.isOpened()
+
+    def release(self):
+        self.captura.release()
+
+
+class FonteVideo(FonteFrames):
+    """Vídeo gravado, em tempo real ou na velocidade máxima de decodificação."""
+
+    def __init__(self, caminho, tempo_real=True, repetir=False):
+        """
+        Args:
+            caminho: Arquivo de vídeo
+            tempo_real: Respeita o FPS do arquivo; False entrega os frames o mais rápido possível
+            repetir: Volta ao início ao terminar (os timestamps continuam crescendo)
+        """
+        super().__init__(tempo_real=tempo_real)
+        self.caminho = str(caminho)
+        self.repetir = repetir
+        self.captura = cv2.VideoCapture(self.caminho)
+        self.fps = self.captura.get(cv2.CAP_PROP_FPS) or 30.0
+        self._indice = 0
+
+    def _ler(self):
+        validacao, imagem = self.captura.read()
+        if not validacao and self.repetir and self._indice > 0:
+            self.captura.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            validacao, imagem = self.captura.read()
+        if not validacao:
+            return None
+        timestamp = self._indice / self.fps
+        self._indice += 1
+        return imagem, timestamp
+
+    def reiniciar(self):
+        super().reiniciar()
+        self.captura.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._indice = 0
+
+    def isOpened(self):
+        return self.captura.isOpened()
+
+    def release(self):
+        self.captura.release()
+
+
+class FonteImagem(FonteFrames):
+    """Uma imagem fixa entregue repetidamente, como um vídeo de ``fps`` quadros por segundo."""
+
+    def __init__(self, caminho, fps=30.0, tempo_real=True, quantidade=None):
+        """
+        Args:
+            caminho: Arquivo de imagem
+            fps: Taxa simulada (define os timestamps e o ritmo em tempo real)
+            tempo_real: Entrega no ritmo de ``fps``; False entrega o mais rápido possível
+            quantidade: Número de frames antes de terminar (None = infinito)
+        """
+        super().__init__(tempo_real=tempo_real)
+        self.caminho = str(caminho)
+        self.imagem = cv2.imread(self.caminho)
+        if self.imagem is None:
+            raise FileNotFoundError(f"Não foi possível ler a imagem {caminho}")
+        self.fps = float(fps)
+        self.quantidade = quantidade
+        self._indice = 0
+
+    def _ler(self):
+        if self.quantidade is not None and self._indice >= self.quantidade:
+            return None
+        timestamp = self._indice / self.fps
+        self._indice += 1
+        return self.imagem, timestamp
+
+    def reiniciar(self):
+        super().reiniciar()
+        self._indice = 0
+
+
+class FontePastaImagens(FonteFrames):
+    """Pasta de imagens lida em ordem alfabética, como um vídeo de ``fps`` quadros por segundo."""
+
+    def __init__(self, pasta, fps=30.0, tempo_real=False, repetir=False):
+        """
+        Args:
+            pasta: Pasta com as imagens
+            fps: Taxa simulada (define os timestamps e o ritmo em tempo real)
+            tempo_real: Entrega no ritmo de ``fps``; False entrega o mais rápido possível
+            repetir: Volta à primeira imagem ao chegar ao fim
+        """
+        super().__init__(tempo_real=tempo_real)
+        self.arquivos = sorted(p for p in Path(pasta).iterdir() if p.suffix.lower() in EXTENSOES_IMAGEM)
+        if not self.arquivos:
+            raise FileNotFoundError(f"Nenhuma imagem encontrada em {pasta}")
+        self.fps = float(fps)
+        self.repetir = repetir
+        self._indice = 0
+
+    def _ler(self):
+        posicao = self._indice % len(self.arquivos)
+        if self._indice >= len(self.arquivos) and not self.repetir:
+            return None
+        imagem = cv2.imread(str(self.arquivos[posicao]))
+        if imagem is None:
+            return None
+        timestamp = self._indice / self.fps
+        self._indice += 1
+        return imagem, timestamp
+
+    def reiniciar(self):
+        super().reiniciar()
+        self._indice = 0
+
+
+def abrir_fonte(origem, tempo_real=True, repetir=False, fps=30.0, largura=None, altura=None):
+    """
+    Escolhe a fonte a partir de ``origem``.
+
+    Args:
+        origem: Índice de webcam (int ou texto numérico), "sintetica"
+            (``CameraSintetica`` com parâmetros padrão), pasta de imagens,
+            arquivo de imagem ou arquivo de vídeo
+        tempo_real: Ritmo das fontes gravadas (ver ``FonteFrames``)
+        repetir: Repetição de vídeos e pastas ao chegar ao fim
+        fps: Taxa simulada de imagens e pastas
+        largura: Largura pedida à webcam
+        altura: Altura pedida à webcam
+
+    Returns:
+        Instância de ``FonteFrames``
+    """
+    if isinstance(origem, int) or str(origem).isdigit():
+        return FonteCamera(int(origem), largura, altura)
+    if origem == "sintetica":
+        # Importado aqui: camera_sintetica depende deste módulo
+        from camera_sintetica import CameraSintetica
+        return CameraSintetica(largura or 640, altura or 480, fps=fps, tempo_real=tempo_real)
+    caminho = Path(origem)
+    if caminho.is_dir():
+        return FontePastaImagens(caminho, fps=fps, tempo_real=tempo_real, repetir=repetir)
+    if caminho.suffix.lower() in EXTENSOES_IMAGEM:
+        return FonteImagem(caminho, fps=fps, tempo_real=tempo_real, quantidade=None if repetir else 1)
+    if not caminho.exists():
+        raise FileNotFoundError(f"Fonte não encontrada: {origem}")
+    return FonteVideo(caminho, tempo_real=tempo_real, repetir=repetir)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gravação disparada por mudança, para aquisições temporais longas.
+
+Em vez de gravar um espectro a cada período fixo, ``GatilhoGravacao``
+compara cada espectro com o último gravado e só manda gravar quando alguma
+métrica passa do seu limiar:
+
+    "rms"      -> variação RMS da intensidade (unidades do espectro)
+    "pico_nm"  -> deslocamento do pico principal, em nm (vértice da parábola)
+    "potencia" -> variação relativa da potência integrada (0.01 = 1 %)
+
+Um quadro-chave é gravado a cada ``keyframe_s`` segundos mesmo sem mudança.
+Os intervalos ignorados ficam em um CSV compacto
+(``inicio;fim;ignorados;max_rms;max_pico_nm;max_potencia``), então nada se
+perde sobre o que mudou (ou não) entre dois arquivos gravados.
+
+``decidir`` já conta o espectro como gravado; quem grava de forma assíncrona
+(e pode descartar o espectro) usa ``avaliar`` e só chama ``confirmar``
+depois que a gravação foi aceita, para a referência não avançar à toa.
+
+Configuração em ``interface_start.json``:
+    "gravacao_por_mudanca": {"rms": 1.0, "pico_nm": 0.2, "potencia": 0.01, "keyframe_s": 60}
+"""
+
+import os
+
+import numpy as np
+
+
+METRICAS = ("rms", "pico_nm", "potencia")
+
+CABECALHO_LOG = "inicio;fim;ignorados;max_rms;max_pico_nm;max_potencia\n"
+
+
+def _pico_nm(wl_nm, y):
+    """Posição do máximo com refinamento parabólico de 3 pontos, em nm."""
+    k = int(np.argmax(y))
+    if 0 < k < len(y) - 1:
+        curvatura = y[k - 1] - 2.0 * y[k] + y[k + 1]
+        if curvatura < 0:
+            delta = 0.5 * (y[k - 1] - y[k + 1]) / curvatura
+            return float(np.interp(k + delta, np.arange(len(wl_nm)), wl_nm))
+    return float(wl_nm[k])
+
+
+class GatilhoGravacao:
+    """Decide, espectro a espectro, se vale a pena gravar."""
+
+    def __init__(self, wl_nm, rms=None, pico_nm=None, potencia=None, keyframe_s=60.0, arquivo_log=None):
+        """
+        Args:
+            wl_nm: Eixo de comprimento de onda dos espectros
+            rms: Limiar de variação RMS (None = métrica desligada)
+            pico_nm: Limiar de deslocamento do pico, em nm (None = desligada)
+            potencia: Limiar de variação relativa da potência integrada (None = desligada)
+            keyframe_s: Intervalo máximo entre gravações, em segundos (None = sem quadros-chave)
+            arquivo_log: CSV onde os intervalos ignorados são anotados (None = não anota)
+        """
+        self.wl = np.asarray(wl_nm, dtype=float)
+        # Pesos da regra do trapézio: potência integrada = pesos @ y
+        self._pesos = np.zeros_like(self.wl)
+        self._pesos[:-1] += np.diff(self.wl) / 2.0
+        self._pesos[1:] += np.diff(self.wl) / 2.0
+        self.limiares = {"rms": rms, "pico_nm": pico_nm, "potencia": potencia}
+        if all(limiar is None for limiar in self.limiares.values()):
+            self.limiares["rms"] = 1.0
+        self.keyframe_s = keyframe_s
+        self.arquivo_log = arquivo_log
+        self._log = None
+        self.referencia = None
+        self._pico_referencia = None
+        self._potencia_referencia = None
+        self.ultimo_salvo = None
+        self._intervalo = None
+        self.salvos = 0
+        self.ignorados = 0
+
+    @classmethod
+    def da_config(cls, config, wl_nm, arquivo_log=None):
+        """Gatilho descrito em ``config["gravacao_por_mudanca"]``, ou None se ausente."""
+        opcoes = config.get("gravacao_por_mudanca")
+        if not opcoes:
+            return None
+        opcoes = opcoes if isinstance(opcoes, dict) else {}
+        return cls(wl_nm, opcoes.get("rms"), opcoes.get("pico_nm"), opcoes.get("potencia"),
+                   opcoes.get("keyframe_s", 60.0), arquivo_log)
+
+    def metricas(self, espectro):
+        """Métricas do espectro em relação ao último gravado (só as que têm limiar)."""
+        y = np.asarray(espectro, dtype=float)
+        valores = {}
+        if self.limiares["rms"] is not None:
+            valores["rms"] = float(np.sqrt(np.mean((y - self.referencia) ** 2)))
+        if self.limiares["pico_nm"] is not None:
+            valores["pico_nm"] = abs(_pico_nm(self.wl, y) - self._pico_referencia)
+        if self.limiares["potencia"] is not None:
+            potencia = float(self._pesos @ y)
+            valores["potencia"] = abs(potencia - self._potencia_referencia) / max(abs(self._potencia_referencia), 1e-12)
+        return valores
+
+    def decidir(self, espectro, timestamp):
+        """
+        ``avaliar`` seguido de ``confirmar`` quando o espectro deve ser gravado.
+
+        Args:
+            espectro: Espectro 1D (ou matriz de canais; a métrica usa a primeira linha)
+            timestamp: Instante do espectro, em segundos
+
+        Returns:
+            Tupla (salvar, motivo): motivo é "primeiro", "keyframe", a métrica que
+            passou do limiar, ou None quando o espectro é ignorado
+        """
+        salvar, motivo = self.avaliar(espectro, timestamp)
+        if salvar:
+            self.confirmar(espectro, timestamp)
+        return salvar, motivo
+
+    def avaliar(self, espectro, timestamp):
+        """
+        Como ``decidir``, mas um espectro a gravar só passa a ser a referência
+        em ``confirmar``. Espectros ignorados entram no intervalo do log.
+        """
+        y = self._linha(espectro)
+
+        if self.referencia is None:
+            return True, "primeiro"
+        if self.keyframe_s is not None and timestamp - self.ultimo_salvo >= self.keyframe_s:
+            return True, "keyframe"
+
+        valores = self.metricas(y)
+        for metrica, valor in valores.items():
+            if valor >= self.limiares[metrica]:
+                return True, metrica
+
+        # Ignorado: estende o intervalo atual guardando o maior valor de cada métrica
+        if self._intervalo is None:
+            self._intervalo = {"inicio": timestamp, "fim": timestamp, "ignorados": 0,
+                               **{metrica: 0.0 for metrica in METRICAS}}
+        self._intervalo["fim"] = timestamp
+        self._intervalo["ignorados"] += 1
+        for metrica, valor in valores.items():
+            self._intervalo[metrica] = max(self._intervalo[metrica], valor)
+        self.ignorados += 1
+        return False, None
+
+    def confirmar(self, espectro, timestamp):
+        """Registra ``espectro`` como gravado: passa a ser a referência das próximas comparações."""
+        y = self._linha(espectro)
+        self._fechar_intervalo()
+        self.referencia = y.copy()
+        if self.limiares["pico_nm"] is not None:
+            self._pico_referencia = _pico_nm(self.wl, y)
+        if self.limiares["potencia"] is not None:
+            self._potencia_referencia = float(self._pesos @ y)
+        self.ultimo_salvo = timestamp
+        self.salvos += 1
+
+    @staticmethod
+    def _linha(espectro):
+        y = np.asarray(espectro, dtype=float)
+        return y[0] if y.ndim == 2 else y
+
+    def _fechar_intervalo(self):
+        intervalo, self._intervalo = self._intervalo, None
+        if intervalo is None or self.arquivo_log is None:
+            return
+        if self._log is None:
+            novo = not os.path.exists(self.arquivo_log)
+            self._log = open(self.arquivo_log, "a")
+            if novo:
+                self._log.write(CABECALHO_LOG)
+        # Métricas desligadas ficam vazias
+        maximos = ";".join("" if self.limiares[metrica] is None else f"{intervalo[metrica]:.6g}" for metrica in METRICAS)
+        self._log.write(f"{intervalo['inicio']:.6f};{intervalo['fim']:.6f};{intervalo['ignorados']};{maximos}\n")
+        self._log.flush()
+
+    def resumo(self):
+        total = self.salvos + self.ignorados
+        fracao = 100.0 * self.ignorados / total if total else 0.0
+        return f"{self.salvos} espectros gravados, {self.ignorados} ignorados sem mudança ({fracao:.1f} %)"
+
+    def fechar(self):
+        """Anota o intervalo ignorado pendente e fecha o log."""
+        self._fechar_intervalo()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
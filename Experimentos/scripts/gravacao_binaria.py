@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Container binário append-only para aquisições temporais (pasta ``*.osarec``).
+
+Estrutura da pasta:
+    cabecalho.json    -> versão, dtype, nº de pontos, casas decimais, calibrações
+    wl_m.npy          -> eixo de comprimento de onda compartilhado (metros, float64)
+    intensidades.bin  -> matriz (n_espectros, n_pontos) crua, uma linha por espectro
+                         ((n_espectros, n_canais, n_pontos) se o cabeçalho
+                         listar "canais": cinza, R, G e B do mesmo frame)
+    metadados.bin     -> registro por linha: timestamp, índice do frame,
+                         profundidade da média e id da calibração
+
+``intensidades.bin`` e ``metadados.bin`` só crescem por anexação e são lidos
+com ``np.memmap``. A importação/exportação do layout TXT (``wl_m;intensidade``)
+é sem perdas com o dtype padrão float64, de modo que ``analise.py``,
+``espectograma.py`` e ``analise2paper.py`` continuam funcionando sobre os TXT
+exportados.
+
+Uso típico:
+    python Experimentos/scripts/gravacao_binaria.py importar Visible_OSA/Temporal temporal.osarec
+    python Experimentos/scripts/gravacao_binaria.py exportar temporal.osarec pasta_txt
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from gravador_espectros import formatar_espectro, nome_arquivo_canal
+
+
+VERSAO = 2  # 2: campo opcional "canais" (registros com vários canais)
+ARQ_CABECALHO = "cabecalho.json"
+ARQ_WL = "wl_m.npy"
+ARQ_INTENSIDADES = "intensidades.bin"
+ARQ_METADADOS = "metadados.bin"
+
+# Mesma ordem de ``extrator_espectro.CANAIS`` (não importado aqui para não exigir o OpenCV)
+ORDEM_CANAIS = ("cinza", "r", "g", "b")
+
+DTYPE_METADADOS = np.dtype([
+    ("timestamp", "<f8"),
+    ("indice_frame", "<i8"),
+    ("profundidade_media", "<i4"),
+    ("id_calibracao", "<i4"),
+])
+
+
+class GravacaoEspectros:
+    """Leitura (memmap) e anexação de espectros em um container ``*.osarec``."""
+
+    def __init__(self, pasta, modo="r"):
+        """
+        Args:
+            pasta: Pasta do container
+            modo: "r" para leitura ou "a" para anexar novos espectros
+        """
+        self.pasta = Path(pasta)
+        self.modo = modo
+        with open(self.pasta / ARQ_CABECALHO, "r", encoding="utf-8") as f:
+            self.cabecalho = json.load(f)
+        if self.cabecalho.get("versao", 0) > VERSAO:
+            raise ValueError(f"Versão de gravação não suportada: {self.cabecalho.get('versao')}")
+        self.dtype = np.dtype(self.cabecalho["dtype"]).newbyteorder("<")
+        self.n_pontos = int(self.cabecalho["n_pontos"])
+        self.canais = self.cabecalho.get("canais")
+        self.forma_registro = (len(self.canais), self.n_pontos) if self.canais else (self.n_pontos,)
+        self.wl_m = np.load(self.pasta / ARQ_WL)
+
+        self._arq_int = None
+        self._arq_meta = None
+        if modo == "a":
+            self._arq_int = open(self.pasta / ARQ_INTENSIDADES, "ab")
+            self._arq_meta = open(self.pasta / ARQ_METADADOS, "ab")
+            self._n_anexados = self.n_espectros
+
+    @classmethod
+    def criar(cls, pasta, wl_m, dtype="float64", casas=14, calibracao=None, nomes=None, canais=None):
+        """
+        Cria um container vazio e o abre para anexação.
+
+        Args:
+            pasta: Pasta a ser criada (não pode existir com conteúdo)
+            wl_m: Eixo de comprimento de onda em metros
+            dtype: Tipo das intensidades ("float64" é sem perdas em relação ao TXT)
+            casas: Casas decimais usadas ao exportar para TXT
+            calibracao: Dicionário com a calibração inicial (id 0), opcional
+            nomes: Nomes dos arquivos TXT de origem (usados na exportação), opcional
+            canais: Nomes dos canais de cada registro (ex.: ``extrator_espectro.CANAIS``), opcional
+        """
+        pasta = Path(pasta)
+        pasta.mkdir(parents=True, exist_ok=True)
+        if (pasta / ARQ_CABECALHO).exists():
+            raise FileExistsError(f"Já existe uma gravação em {pasta}")
+        wl_m = np.asarray(wl_m, dtype="<f8")
+        cabecalho = {
+            "formato": "osarec",
+            "versao": VERSAO,
+            "n_pontos": int(wl_m.size),
+            "dtype": np.dtype(dtype).str,
+            "casas": int(casas),
+            "calibracoes": {"0": calibracao or {}},
+            "criado_em": time.time(),
+        }
+        if nomes is not None:
+            cabecalho["nomes"] = list(nomes)
+        if canais is not None:
+            cabecalho["canais"] = list(canais)
+        np.save(pasta / ARQ_WL, wl_m)
+        (pasta / ARQ_INTENSIDADES).touch()
+        (pasta / ARQ_METADADOS).touch()
+        _escrever_cabecalho(pasta, cabecalho)
+        return cls(pasta, modo="a")
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    @property
+    def wl_nm(self):
+        return self.wl_m * 1e9
+
+    @property
+    def n_espectros(self):
+        """Linhas completas presentes nos dois arquivos (robusto a gravação interrompida)."""
+        bytes_int = os.path.getsize(self.pasta / ARQ_INTENSIDADES)
+        bytes_meta = os.path.getsize(self.pasta / ARQ_METADADOS)
+        return min(bytes_int // (self.dtype.itemsize * int(np.prod(self.forma_registro))),
+                   bytes_meta // DTYPE_METADADOS.itemsize)
+
+    @property
+    def intensidades(self):
+        """Matriz (n_espectros, n_pontos) — ou (n_espectros, n_canais, n_pontos) — mapeada em memória, somente leitura."""
+        n = self.n_espectros
+        if n == 0:
+            return np.empty((0,) + self.forma_registro, dtype=self.dtype)
+        return np.memmap(self.pasta / ARQ_INTENSIDADES, dtype=self.dtype, mode="r", shape=(n,) + self.forma_registro)
+
+    @property
+    def metadados(self):
+        """Array estruturado (n_espectros,) com ``DTYPE_METADADOS``, mapeado em memória."""
+        n = self.n_espectros
+        if n == 0:
+            return np.empty(0, dtype=DTYPE_METADADOS)
+        return np.memmap(self.pasta / ARQ_METADADOS, dtype=DTYPE_METADADOS, mode="r", shape=(n,))
+
+    def calibracao(self, id_calibracao):
+        return self.cabecalho["calibracoes"].get(str(int(id_calibracao)))
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def registrar_calibracao(self, calibracao):
+        """Adiciona uma calibração ao cabeçalho e retorna o seu id."""
+        self._exigir_escrita()
+        novo_id = max(int(k) for k in self.cabecalho["calibracoes"]) + 1
+        self.cabecalho["calibracoes"][str(novo_id)] = calibracao
+        _escrever_cabecalho(self.pasta, self.cabecalho)
+        return novo_id
+
+    def anexar(self, intensidade, timestamp=None, indice_frame=None, profundidade_media=1, id_calibracao=0):
+        """
+        Anexa um espectro ao final da gravação.
+
+        Args:
+            intensidade: Array 1D com ``n_pontos`` valores (``(n_canais, n_pontos)`` com canais)
+            timestamp: Instante da aquisição (padrão: agora)
+            indice_frame: Índice do frame de origem (padrão: número da linha)
+            profundidade_media: Número de espectros promediados
+            id_calibracao: Id da calibração no cabeçalho
+        """
+        self._exigir_escrita()
+        intensidade = np.asarray(intensidade, dtype=self.dtype)
+        if intensidade.shape != self.forma_registro:
+            raise ValueError(f"Espectro com forma {intensidade.shape}; esperado {self.forma_registro}.")
+        registro = np.zeros(1, dtype=DTYPE_METADADOS)
+        registro["timestamp"] = time.time() if timestamp is None else timestamp
+        registro["indice_frame"] = self._n_anexados if indice_frame is None else indice_frame
+        registro["profundidade_media"] = profundidade_media
+        registro["id_calibracao"] = id_calibracao
+        # Intensidades antes dos metadados: uma linha só "existe" quando ambos estão completos
+        self._arq_int.write(intensidade.tobytes())
+        self._arq_meta.write(registro.tobytes())
+        self._n_anexados += 1
+
+    def anexar_lote(self, matriz, metadados):
+        """Anexa vários espectros de uma vez (``metadados`` com ``DTYPE_METADADOS``)."""
+        self._exigir_escrita()
+        matriz = np.asarray(matriz, dtype=self.dtype).reshape((-1,) + self.forma_registro)
+        metadados = np.asarray(metadados, dtype=DTYPE_METADADOS)
+        if len(metadados) != len(matriz):
+            raise ValueError("Número de metadados diferente do número de espectros.")
+        self._arq_int.write(matriz.tobytes())
+        self._arq_meta.write(metadados.tobytes())
+        self._n_anexados += len(matriz)
+
+    def flush(self):
+        if self._arq_int is not None:
+            self._arq_int.flush()
+            self._arq_meta.flush()
+
+    def fechar(self):
+        if self._arq_int is not None:
+            self._arq_int.close()
+            self._arq_meta.close()
+            self._arq_int = None
+            self._arq_meta = None
+
+    def _exigir_escrita(self):
+        if self._arq_int is None:
+            raise IOError(f"Gravação {self.pasta} não está aberta para anexação.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+
+def _escrever_cabecalho(pasta, cabecalho):
+    temporario = Path(pasta) / (ARQ_CABECALHO + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(cabecalho, f, indent=4)
+    os.replace(temporario, Path(pasta) / ARQ_CABECALHO)
+
+
+def abrir_gravacao(pasta):
+    """Atalho: retorna ``(wl_nm, intensidades_memmap, metadados_memmap)``."""
+    gravacao = GravacaoEspectros(pasta)
+    return gravacao.wl_nm, gravacao.intensidades, gravacao.metadados
+
+
+# ---------------------------------------------------------------------------
+# Importação / exportação do layout TXT
+# ---------------------------------------------------------------------------
+
+def _casas_decimais(arquivo):
+    """Detecta as casas decimais da notação científica na primeira linha do arquivo."""
+    with open(arquivo, "r") as f:
+        primeira = f.readline()
+    match = re.search(r"\.(\d+)[eE]", primeira)
+    return len(match.group(1)) if match else 14
+
+
+def _frame_e_canal(nome):
+    """
+    Nome do frame e canal de um arquivo (inverso de ``nome_arquivo_canal``):
+    ``spectrum001.txt`` e ``spectrum_r_001.txt`` -> ``("spectrum001", "cinza")`` e
+    ``("spectrum001", "r")``.
+    """
+    stem = Path(nome).stem
+    match = re.match(r"^(.*)_(" + "|".join(ORDEM_CANAIS[1:]) + r")_(.*)$", stem)
+    if match:
+        return match.group(1) + match.group(3), match.group(2)
+    return stem, "cinza"
+
+
+def _ordem_natural(chave):
+    """Ordena ``spectrum9`` antes de ``spectrum10`` (números comparados pelo valor)."""
+    return [int(parte) if parte.isdigit() else parte for parte in re.split(r"(\d+)", chave)]
+
+
+def importar_txt(pasta_txt, destino, padrao="spectrum*.txt", dtype="float64"):
+    """
+    Converte uma pasta de ``spectrum*.txt`` em um container ``*.osarec``.
+
+    Todos os arquivos precisam compartilhar o mesmo eixo de comprimento de onda.
+    Cada frame é identificado pelo nome inteiro do arquivo (sem a marca do
+    canal) e os registros seguem a ordem natural desses nomes. O índice do
+    frame é o número do nome nos arquivos numerados pelo contador
+    (``spectrum001.txt``) e a posição na ordem nos demais (nomes por data). O
+    timestamp de cada linha é a data de modificação do arquivo. Pastas RGB
+    (``spectrum001.txt`` junto de ``spectrum_r_001.txt``, ``_g_`` e ``_b_``)
+    viram uma gravação com "canais": um registro por frame com todos os
+    canais encontrados.
+
+    Returns:
+        GravacaoEspectros aberta para leitura
+    """
+    por_chave = {}
+    frames = {}
+    for arquivo in Path(pasta_txt).glob(padrao):
+        frame, canal = _frame_e_canal(arquivo.name)
+        # Sem os "-", que nome_arquivo_canal remove dos nomes por data nos arquivos de canal
+        chave = frame.replace("-", "")
+        frames.setdefault(chave, frame)
+        frame = por_chave.setdefault(chave, {})
+        if canal in frame:
+            raise ValueError(f"{arquivo.name} e {frame[canal].name} correspondem ao mesmo frame/canal em {pasta_txt}")
+        frame[canal] = arquivo
+    if not por_chave:
+        raise FileNotFoundError(f"Nenhum {padrao} em {pasta_txt}")
+
+    encontrados = set().union(*por_chave.values())
+    canais = [canal for canal in ORDEM_CANAIS if canal in encontrados]
+    chaves = sorted(por_chave, key=_ordem_natural)
+    for chave in chaves:
+        faltando = [canal for canal in canais if canal not in por_chave[chave]]
+        if faltando:
+            raise ValueError(f"Frame '{chave}' sem o(s) canal(is) {', '.join(faltando)} em {pasta_txt}")
+    registros = [[por_chave[chave][canal] for canal in canais] for chave in chaves]
+
+    # Nomes do contador (prefixo + número): o número é o índice do frame; nomes por data usam a posição
+    numeros = [re.fullmatch(r"[^\d-]*(\d+)", frames[chave]) for chave in chaves]
+    if all(numeros) and len({int(m.group(1)) for m in numeros}) == len(chaves):
+        indices = [int(m.group(1)) for m in numeros]
+    else:
+        indices = list(range(len(chaves)))
+
+    primeiro = registros[0][0]
+    wl_m = np.loadtxt(primeiro, delimiter=";")[:, 0]
+    matriz = np.empty((len(indices), len(canais), wl_m.size), dtype=float)
+    metadados = np.zeros(len(indices), dtype=DTYPE_METADADOS)
+    for k, (indice, arquivos) in enumerate(zip(indices, registros)):
+        for c, arquivo in enumerate(arquivos):
+            dados = np.loadtxt(arquivo, delimiter=";")
+            if dados.shape[0] != wl_m.size or not np.array_equal(dados[:, 0], wl_m):
+                raise ValueError(f"{arquivo.name}: eixo de comprimento de onda diferente de {primeiro.name}")
+            matriz[k, c] = dados[:, 1]
+        metadados[k]["timestamp"] = arquivos[0].stat().st_mtime
+        metadados[k]["indice_frame"] = indice
+
+    calibracao = {"origem": str(Path(pasta_txt)), "importado_em": time.time()}
+    # Com canais, a exportação refaz os nomes de cada canal a partir do nome do registro
+    with GravacaoEspectros.criar(destino, wl_m, dtype=dtype, casas=_casas_decimais(primeiro), calibracao=calibracao,
+                                 nomes=[arquivos[0].name for arquivos in registros],
+                                 canais=None if canais == ["cinza"] else canais) as gravacao:
+        gravacao.anexar_lote(matriz, metadados)
+    return GravacaoEspectros(destino)
+
+
+def exportar_txt(origem, pasta_destino, prefixo="spectrum"):
+    """
+    Recria os arquivos ``wl_m;intensidade`` a partir de um container.
+
+    Usa os nomes originais quando a gravação veio de ``importar_txt``; caso
+    contrário, ``<prefixo><indice_frame:03>.txt``. Gravações com canais geram
+    um arquivo por canal (``spectrum001.txt``, ``spectrum_r_001.txt``, ...),
+    derivados do nome original do registro quando houver.
+
+    Returns:
+        Lista de caminhos gravados
+    """
+    gravacao = GravacaoEspectros(origem)
+    pasta_destino = Path(pasta_destino)
+    pasta_destino.mkdir(parents=True, exist_ok=True)
+
+    intensidades = gravacao.intensidades
+    metadados = gravacao.metadados
+    nomes = gravacao.cabecalho.get("nomes")
+    originais = nomes is not None and len(nomes) == len(intensidades)
+    if not originais:
+        nomes = [f"{prefixo}{int(m['indice_frame']):03}.txt" for m in metadados]
+
+    casas = gravacao.cabecalho.get("casas", 14)
+    caminhos = []
+    for nome, registro, meta in zip(nomes, intensidades, metadados):
+        if gravacao.canais:
+            base, sufixo = prefixo, f"{int(meta['indice_frame']):03}.txt"
+            if originais:
+                # Nome original de um canal (spectrum_r_001.txt) ou do cinza (spectrum001.txt)
+                match = re.match(r"^(.*)_(" + "|".join(ORDEM_CANAIS[1:]) + r")_(.*)$", nome)
+                if match:
+                    base, sufixo = match.group(1), match.group(3)
+                elif nome.startswith(prefixo):
+                    sufixo = nome[len(prefixo):]
+            arquivos = [(pasta_destino / nome_arquivo_canal(base, canal, sufixo), linha)
+                        for canal, linha in zip(gravacao.canais, registro)]
+        else:
+            arquivos = [(pasta_destino / nome, registro)]
+        for caminho, linha in arquivos:
+            with open(caminho, "w") as f:
+                f.write(formatar_espectro(gravacao.wl_m, linha, casas, escala=1.0))
+            caminhos.append(caminho)
+    return caminhos
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Container binário de espectros temporais (*.osarec).")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_imp = sub.add_parser("importar", help="TXT -> osarec")
+    p_imp.add_argument("pasta_txt")
+    p_imp.add_argument("destino")
+    p_imp.add_argument("--padrao", default="spectrum*.txt", help="Padrão glob dos arquivos (default: spectrum*.txt)")
+    p_imp.add_argument("--dtype", default="float64", choices=["float64", "float32"],
+                       help="float64 é sem perdas; float32 ocupa metade do espaço")
+
+    p_exp = sub.add_parser("exportar", help="osarec -> TXT")
+    p_exp.add_argument("origem")
+    p_exp.add_argument("pasta_destino")
+    p_exp.add_argument("--prefixo", default="spectrum")
+
+    p_info = sub.add_parser("info", help="Resumo de uma gravação")
+    p_info.add_argument("origem")
+
+    args = parser.parse_args()
+
+    if args.comando == "importar":
+        gravacao = importar_txt(args.pasta_txt, args.destino, padrao=args.padrao, dtype=args.dtype)
+        print(f"[OK] {gravacao.n_espectros} espectros importados em: {gravacao.pasta}")
+    elif args.comando == "exportar":
+        caminhos = exportar_txt(args.origem, args.pasta_destino, prefixo=args.prefixo)
+        print(f"[OK] {len(caminhos)} arquivos exportados em: {args.pasta_destino}")
+    else:
+        gravacao = GravacaoEspectros(args.origem)
+        wl = gravacao.wl_nm
+        print(f"[INFO] {gravacao.n_espectros} espectros × {gravacao.n_pontos} pontos ({gravacao.dtype})")
+        print(f"[INFO] Faixa espectral: {wl.min():.2f} - {wl.max():.2f} nm")
+        print(f"[INFO] Calibrações: {len(gravacao.cabecalho['calibracoes'])}")
+        if gravacao.canais:
+            print(f"[INFO] Canais por registro: {', '.join(gravacao.canais)}")
+
+
+if __name__ == "__main__":
+    main()
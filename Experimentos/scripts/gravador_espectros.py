@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gravação assíncrona e em lotes dos espectros ``wavelength_m;intensity``.
+
+A thread do Tk apenas enfileira (caminho, wl, intensidade); uma thread de
+escrita retira lotes da fila, formata cada espectro em uma única operação
+e grava os arquivos. Também aceita anexar espectros a um container binário
+``*.osarec`` (ver ``gravacao_binaria.py``). Erros e resumos de gravação
+ficam disponíveis em ``mensagens()`` para serem exibidos no LogWidget.
+"""
+
+import queue
+import threading
+
+import numpy as np
+
+
+def formatar_espectro(wl_nm, intensidade, casas=14, escala=1e-9):
+    """
+    Formata um espectro no layout ``wl_m;intensidade`` (uma linha por ponto).
+
+    Produz o mesmo texto de ``f"{xi:.{n}e};{yi:.{n}e}\\n"`` ponto a ponto,
+    mas com uma única operação de formatação. Use ``escala=1.0`` se o eixo
+    já estiver em metros.
+    """
+    dados = np.column_stack((np.asarray(wl_nm, dtype=float) * escala,
+                             np.asarray(intensidade, dtype=float)))
+    linha = f"%.{casas}e;%.{casas}e\n"
+    return (linha * len(dados)) % tuple(dados.ravel().tolist())
+
+
+def nome_arquivo_canal(prefixo, canal, sufixo):
+    """
+    Nome do arquivo de um canal no layout dos conjuntos de dados.
+
+    ``("spectrum", "cinza", "001.txt")`` -> ``spectrum001.txt`` e
+    ``("spectrum", "r", "001.txt")`` -> ``spectrum_r_001.txt``.
+    """
+    if canal == "cinza":
+        return f"{prefixo}{sufixo}"
+    return f"{prefixo}_{canal}_{sufixo.lstrip('-')}"
+
+
+class GravadorEspectros:
+    """Fila limitada + thread de escrita em lotes."""
+
+    def __init__(self, tamanho_fila=256, tamanho_lote=32, casas=14):
+        """
+        Args:
+            tamanho_fila: Espectros aguardando gravação antes de aplicar contrapressão
+            tamanho_lote: Máximo de espectros gravados por iteração da thread
+            casas: Casas decimais da notação científica
+        """
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.tamanho_lote = tamanho_lote
+        self.casas = casas
+        self._mensagens = queue.SimpleQueue()
+        self._thread = None
+        self.salvos = 0
+        self.descartados = 0
+        self.erros = 0
+
+    def iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._laco, name="osa-gravador", daemon=True)
+        self._thread.start()
+
+    def salvar(self, caminho, wl_nm, intensidade, timeout=0.05):
+        """
+        Enfileira um espectro para gravação.
+
+        Se a fila estiver cheia, espera até ``timeout`` segundos (contrapressão)
+        e então descarta o espectro.
+
+        Returns:
+            True se o espectro foi enfileirado
+        """
+        return self._enfileirar(("txt", str(caminho), wl_nm, intensidade), f"'{caminho}'", timeout)
+
+    def salvar_canais(self, caminhos, wl_nm, intensidades, timeout=0.05):
+        """
+        Enfileira os canais de um mesmo frame (um arquivo por linha de
+        ``intensidades``) como um único item: ou todos entram na fila, ou nenhum.
+
+        Returns:
+            True se os canais foram enfileirados
+        """
+        caminhos = [str(caminho) for caminho in caminhos]
+        return self._enfileirar(("canais", caminhos, wl_nm, intensidades), f"'{caminhos[0]}' (+{len(caminhos) - 1} canais)", timeout)
+
+    def salvar_binario(self, gravacao, intensidade, timeout=0.05, **metadados):
+        """
+        Enfileira um espectro para ser anexado a ``gravacao`` (``GravacaoEspectros``).
+
+        Args:
+            gravacao: Container aberto para anexação
+            intensidade: Array 1D com as intensidades
+            metadados: Repassados para ``GravacaoEspectros.anexar``
+                (timestamp, indice_frame, profundidade_media, id_calibracao)
+
+        Returns:
+            True se o espectro foi enfileirado
+        """
+        return self._enfileirar(("bin", gravacao, intensidade, metadados), f"espectro de '{gravacao.pasta}'", timeout)
+
+    def fechar_gravacao(self, gravacao):
+        """Fecha ``gravacao`` depois que os espectros já enfileirados forem anexados."""
+        self.iniciar()
+        self.fila.put(("fechar", gravacao))
+
+    def _enfileirar(self, item, descricao, timeout):
+        self.iniciar()
+        try:
+            self.fila.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            self.descartados += 1
+            self._mensagens.put(f"[WARNING] Fila de gravação cheia: {descricao} descartado.")
+            return False
+
+    @property
+    def pendentes(self):
+        return self.fila.qsize()
+
+    def mensagens(self):
+        """Retorna (e consome) as mensagens produzidas pela thread de escrita."""
+        saida = []
+        while True:
+            try:
+                saida.append(self._mensagens.get_nowait())
+            except queue.Empty:
+                return saida
+
+    def fechar(self, timeout=None):
+        """Grava tudo o que estiver na fila e encerra a thread."""
+        if self._thread is None:
+            return
+        self.fila.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _laco(self):
+        while True:
+            lote = [self.fila.get()]
+            while len(lote) < self.tamanho_lote:
+                try:
+                    lote.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+            encerrar = None in lote
+            self._gravar_lote([item for item in lote if item is not None])
+            if encerrar:
+                return
+
+    def _gravar_lote(self, lote):
+        ultimo = None
+        gravados = 0
+        anexados = set()
+        for tipo, *dados in lote:
+            try:
+                if tipo == "txt":
+                    caminho, wl_nm, intensidade = dados
+                    texto = formatar_espectro(wl_nm, intensidade, self.casas)
+                    with open(caminho, "w") as arquivo:
+                        arquivo.write(texto)
+                    gravados += 1
+                    ultimo = caminho
+                elif tipo == "canais":
+                    caminhos, wl_nm, intensidades = dados
+                    for caminho, intensidade in zip(caminhos, intensidades):
+                        texto = formatar_espectro(wl_nm, intensidade, self.casas)
+                        with open(caminho, "w") as arquivo:
+                            arquivo.write(texto)
+                        gravados += 1
+                        ultimo = caminho
+                elif tipo == "bin":
+                    gravacao, intensidade, metadados = dados
+                    gravacao.anexar(intensidade, **metadados)
+                    anexados.add(gravacao)
+                    gravados += 1
+                    ultimo = str(gravacao.pasta)
+                elif tipo == "fechar":
+                    gravacao, = dados
+                    anexados.discard(gravacao)
+                    gravacao.fechar()
+                    self._mensagens.put(f"[OK] Gravação '{gravacao.pasta}' encerrada ({gravacao.n_espectros} espectros).")
+            except Exception as e:
+                self.erros += 1
+                destino = dados[0] if tipo == "txt" else dados[0][0] if tipo == "canais" else dados[0].pasta
+                self._mensagens.put(f"[ERROR] Falha ao salvar '{destino}': {e}")
+        # Um flush por lote, não por espectro
+        for gravacao in anexados:
+            try:
+                gravacao.flush()
+            except Exception as e:
+                self.erros += 1
+                self._mensagens.put(f"[ERROR] Falha ao salvar '{gravacao.pasta}': {e}")
+        self.salvos += gravados
+        if gravados == 1:
+            self._mensagens.put(f"Espectro salvo como '{ultimo}'.")
+        elif gravados > 1:
+            self._mensagens.put(f"{gravados} espectros salvos (último: '{ultimo}').")
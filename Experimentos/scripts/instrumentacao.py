@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cronômetros por etapa do pipeline ao vivo, com percentis e FPS móveis.
+
+Uso:
+    inst = Instrumentacao(ativo=True)
+    with inst.etapa("extracao"):
+        ...
+    inst.marcar("exibidos")          # conta quadros para o FPS
+    inst.linha_resumo()              # texto curto para o LogWidget
+    inst.exportar("sessao.csv")      # ou .json
+
+Desativada, ``etapa()`` devolve sempre o mesmo contexto vazio e ``marcar()``
+retorna de imediato, então os pontos de medição podem ficar no código.
+Os registros podem vir de várias threads (captura, processamento, Tk).
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class _ContextoNulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULO = _ContextoNulo()
+
+
+class _Cronometro:
+    __slots__ = ("instrumentacao", "nome", "inicio")
+
+    def __init__(self, instrumentacao, nome):
+        self.instrumentacao = instrumentacao
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.instrumentacao.registrar(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+
+class Instrumentacao:
+    """Janelas móveis de duração por etapa + contadores de quadros para FPS."""
+
+    def __init__(self, ativo=False, janela=512, max_amostras_sessao=1_000_000):
+        """
+        Args:
+            ativo: Começa registrando
+            janela: Amostras por etapa usadas nos percentis móveis
+            max_amostras_sessao: Limite do histórico exportável (o mais antigo é descartado)
+        """
+        self.ativo = ativo
+        self.janela = int(janela)
+        self._lock = threading.Lock()
+        self._duracoes = {}
+        self._marcas = {}
+        self._sessao = deque(maxlen=int(max_amostras_sessao))
+        self.inicio_sessao = time.time()
+
+    def reiniciar(self):
+        with self._lock:
+            self._duracoes = {}
+            self._marcas = {}
+            self._sessao.clear()
+        self.inicio_sessao = time.time()
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def etapa(self, nome):
+        """Contexto que mede a duração de uma etapa (no-op se desativada)."""
+        if not self.ativo:
+            return _NULO
+        return _Cronometro(self, nome)
+
+    def registrar(self, nome, segundos):
+        """Registra uma duração medida externamente (ex.: latência captura -> tela)."""
+        if not self.ativo:
+            return
+        with self._lock:
+            janela = self._duracoes.get(nome)
+            if janela is None:
+                janela = self._duracoes[nome] = deque(maxlen=self.janela)
+            janela.append(segundos)
+            self._sessao.append((time.time(), nome, segundos))
+
+    def marcar(self, nome):
+        """Conta um evento (quadro capturado, exibido...) para o cálculo de FPS."""
+        if not self.ativo:
+            return
+        with self._lock:
+            marcas = self._marcas.get(nome)
+            if marcas is None:
+                marcas = self._marcas[nome] = deque(maxlen=self.janela)
+            marcas.append(time.perf_counter())
+
+    # ------------------------------------------------------------------
+    # Consulta e exportação
+    # ------------------------------------------------------------------
+
+    def resumo(self):
+        """
+        Returns:
+            Dicionário ``{"etapas": {nome: {n, media_ms, p50_ms, p95_ms, p99_ms, max_ms}},
+            "fps": {nome: fps}}`` calculado sobre as janelas móveis
+        """
+        with self._lock:
+            duracoes = {nome: np.array(janela) for nome, janela in self._duracoes.items()}
+            marcas = {nome: list(janela) for nome, janela in self._marcas.items()}
+        etapas = {}
+        for nome, valores in duracoes.items():
+            if valores.size == 0:
+                continue
+            p50, p95, p99 = np.percentile(valores, (50, 95, 99)) * 1000.0
+            etapas[nome] = {
+                "n": int(valores.size),
+                "media_ms": float(valores.mean() * 1000.0),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(valores.max() * 1000.0),
+            }
+        fps = {}
+        for nome, instantes in marcas.items():
+            if len(instantes) >= 2 and instantes[-1] > instantes[0]:
+                fps[nome] = (len(instantes) - 1) / (instantes[-1] - instantes[0])
+        return {"etapas": etapas, "fps": fps}
+
+    def linha_resumo(self):
+        """Texto compacto para o LogWidget: FPS e p50/p95/p99 (ms) de cada etapa."""
+        resumo = self.resumo()
+        partes = [f"{nome} {valor:.1f} fps" for nome, valor in resumo["fps"].items()]
+        partes += [f"{nome} {e['p50_ms']:.1f}/{e['p95_ms']:.1f}/{e['p99_ms']:.1f}"
+                   for nome, e in resumo["etapas"].items()]
+        if not partes:
+            return "[INFO] Instrumentação: sem amostras."
+        return "[INFO] " + " | ".join(partes) + "  (ms p50/p95/p99)"
+
+    def exportar(self, caminho):
+        """
+        Exporta a sessão: ``.csv`` com ``timestamp;etapa;duracao_ms`` por amostra,
+        ou ``.json`` com o resumo e as amostras.
+        """
+        with self._lock:
+            amostras = list(self._sessao)
+        caminho = str(caminho)
+        if caminho.lower().endswith(".json"):
+            dados = {
+                "inicio_sessao": self.inicio_sessao,
+                "resumo": self.resumo(),
+                "amostras": [{"timestamp": t, "etapa": nome, "duracao_ms": s * 1000.0} for t, nome, s in amostras],
+            }
+            with open(caminho, "w") as f:
+                json.dump(dados, f, indent=4)
+        else:
+            with open(caminho, "w") as f:
+                f.write("timestamp;etapa;duracao_ms\n")
+                f.writelines(f"{t:.6f};{nome};{s * 1000.0:.4f}\n" for t, nome, s in amostras)
+        return len(amostras)
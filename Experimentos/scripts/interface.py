@@ -2,25 +2,38 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, Label, Toplevel
 import numpy as np
 import json
-import scipy.signal
-from scipy.signal import find_peaks
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.pyplot as plt
 import cv2
 from PIL import Image, ImageTk
 import os
-import copy
 import time
 from datetime import datetime
 import re
-import webbrowser
-from matplotlib.collections import PolyCollection
+from collections import namedtuple
+# scipy.signal, matplotlib.pyplot, mpl_toolkits.mplot3d e webbrowser são importados
+# no primeiro uso (picos, janelas pop-up, relevo 3D, site); ver benchmark_inicializacao.py
+from extrator_espectro import ExtratorEspectro, CANAIS
+from cadeia_filtros import CadeiaFiltros
+from pipeline_captura import PipelineAquisicao
+from fontes_frames import FonteCamera, FonteVideo, FonteImagem
+from camera_sintetica import CameraSintetica
+from slot_frame import SlotFrame
+from retificador import Retificador
+from descoberta_cameras import DescobertaCameras, arquivo_cache_padrao
+from media_movel import MediaMovel
+from renderizador_espectro import RenderizadorEspectro
+from gravador_espectros import GravadorEspectros, nome_arquivo_canal
+from gravacao_binaria import GravacaoEspectros
+from instrumentacao import Instrumentacao
+from rastreador_picos import RastreadorPicos
+from servidor_espectros import ServidorEspectros
+from gatilho_gravacao import GatilhoGravacao
+from espectro_io import carregar_espectro
 # import threading
 
 # Variáveis globais para cache
-poly_collection = None
+renderizador = None
 gradient_cache = None
 SHOW_GRADIENT = True
 
@@ -36,7 +49,17 @@ def precompute_gradient(wl):
     return colors
 
 count_save_spectra = 0 # Variável global para contar o número de espectros salvos
-global_frame = None    # Para se obter a qualquer momento o frame atual, caso disponível
+ultimo_persistir_contador = 0.0
+gravador = GravadorEspectros() # Gravação dos espectros em thread separada
+gravacao_atual = None  # Container *.osarec aberto quando formato_gravacao == "binario"
+gatilho_atual = None   # Gravação por mudança da coleta atual (chave "gravacao_por_mudanca")
+instrumentacao = Instrumentacao()  # Tempos por etapa (tecla 't' liga/desliga, 'l' mostra no log)
+ultimo_log_instrumentacao = 0.0
+rastreador = None  # Picos seguidos ao vivo (tecla 'k' liga/desliga)
+rotulo_rastreio = None  # Rótulo com a deriva dos picos seguidos (criado em osa_start)
+servidor_espectros = None  # Publicação local dos espectros (chave "servidor_espectros" do JSON)
+ultima_leitura_rastreio = 0.0
+slot_frame = SlotFrame()  # Para se obter a qualquer momento o frame atual (view somente leitura), caso disponível
 log_element = None
 buffer_msg = ""
 
@@ -51,20 +74,23 @@ def printf(msg="", prt=True):
     else:
         buffer_msg += msg + "\n"
 
-def listar_webcams():
-    index = 0
-    webcams_disponiveis = []
-    
-    while True:
-        cap = cv2.VideoCapture(index)
-        if not cap.read()[0]:  # Tenta capturar uma imagem
-            break  # Sai do loop se não houver mais câmeras disponíveis
-        else:
-            webcams_disponiveis.append(index)
-        cap.release()
-        index += 1
-    
-    return webcams_disponiveis
+# Sondagem paralela das webcams, com cache em disco válido por 60 s
+descoberta = DescobertaCameras(max_indices=6, timeout=3.0, ttl=60.0, arquivo_cache=arquivo_cache_padrao())
+reconexao = None  # Future da sondagem da webcam que parou de responder
+inicio_reconexao = 0.0  # Instante (monotonic) do início da sondagem atual ou do último aviso de demora
+
+def listar_webcams(forcar=False):
+    """
+    Retorna os índices das webcams disponíveis (todas sondadas em paralelo).
+
+    :param forcar: Ignora o cache e sonda novamente.
+    """
+    return descoberta.listar(forcar=forcar)
+
+def find_peaks(*args, **kwargs):
+    """scipy.signal.find_peaks, importado apenas na primeira detecção de picos."""
+    from scipy.signal import find_peaks as _find_peaks
+    return _find_peaks(*args, **kwargs)
 
 # Função para carregar configurações do JSON
 def carregar_configuracoes():
@@ -93,8 +119,59 @@ def default_calibration(config):
     config["wl_fit"]             = config["default"]["wl_fit"]
     salvar_configuracoes(config)
 
+def forma_media():
+    """Forma de cada amostra da média: (4, n) com "canais_rgb" (cinza, R, G, B), senão n."""
+    return (len(CANAIS), len(wl)) if config.get("canais_rgb", False) else len(wl)
+
+# Extrator e buffer usados pela thread de processamento, sempre da mesma configuração
+ConfiguracaoProcessamento = namedtuple("ConfiguracaoProcessamento", ["extrator", "buffer"])
+
+def publicar_processamento():
+    """
+    Publica, numa única atribuição, a configuração lida por processar_frame.
+
+    O extrator é novo (nunca alterado depois de publicado) e compartilha a cadeia
+    de filtros do extrator principal, para a tecla 'c' valer também ao vivo.
+    """
+    global processamento
+    processamento = ConfiguracaoProcessamento(
+        ExtratorEspectro(x_detection, coeficientes, config.get("largura_banda", 1), filtros=extrator.filtros),
+        buffer)
+
+def iniciar_servidor_espectros():
+    """
+    Abre o servidor local de espectros se config["servidor_espectros"] estiver definido
+    (porta, ou {"host": ..., "porta": ..., "dtype": ...}).
+    """
+    global servidor_espectros
+    opcoes = config.get("servidor_espectros")
+    if not opcoes or servidor_espectros is not None:
+        return
+    if not isinstance(opcoes, dict):
+        opcoes = {"porta": int(opcoes)}
+    try:
+        servidor_espectros = ServidorEspectros(opcoes.get("host", "127.0.0.1"), opcoes.get("porta", 5055),
+                                               dtype=opcoes.get("dtype", "<f4"))
+        servidor_espectros.iniciar()
+    except OSError as e:
+        servidor_espectros = None
+        printf(f"[ERROR] Servidor de espectros não iniciado: {e}")
+        return
+    anunciar_servidor_espectros()
+    host, porta = servidor_espectros.endereco
+    printf(f"[INFO] Publicando espectros em {host}:{porta}")
+
+def anunciar_servidor_espectros():
+    """Envia aos assinantes o eixo wl e a calibração atuais."""
+    if servidor_espectros is None:
+        return
+    servidor_espectros.definir_cabecalho(wl, CANAIS if config.get("canais_rgb", False) else None,
+                                         coeficientes=[float(c) for c in coeficientes],
+                                         wl_fit=[float(c) for c in wl_fit],
+                                         filtros=extrator.filtros.descrever())
+
 def start_config(config):
-    global x_detection, coeficientes, coeficientes, centro, wl_fit, wl, buffer_size, buffer, count_save_spectra, WEBCAM_ON, WEBCAM_NUMBER, FRAME_WIDTH, FRAME_HEIGHT, SAVE_SPECTRA, SAVE_ONLY_ONE_SPECTRA, file_dir, start_save_time, last_save_time, COUNT_OR_TIME, DARK, SHOW_FRAME_GRAPH
+    global x_detection, coeficientes, coeficientes, centro, wl_fit, wl, buffer_size, buffer, count_save_spectra, WEBCAM_ON, WEBCAM_NUMBER, FRAME_WIDTH, FRAME_HEIGHT, SAVE_SPECTRA, SAVE_ONLY_ONE_SPECTRA, file_dir, start_save_time, last_save_time, COUNT_OR_TIME, DARK, SHOW_FRAME_GRAPH, renderizador, gradient_cache
     if config["WEBCAM_ON"]:
         x_detection = np.arange(config["x_detection_start"], config["x_detection_end"])
     else:
@@ -104,8 +181,27 @@ def start_config(config):
     centro = tuple(config["centro"])
     wl_fit = config["wl_fit"]
     wl = wl_fit[0] * x_detection + wl_fit[1]
+    extrator.atualizar(x_detection, coeficientes, config.get("largura_banda", 1))
+    filtros = CadeiaFiltros.da_config(config, wl)
+    filtros.ativo = extrator.filtros.ativo   # Mantém a visão crua ('c') ao reconfigurar
+    extrator.filtros = filtros
+    # Eixo wl novo: o renderizador (linha, degradê e fundo em cache) é recriado no próximo quadro
+    if renderizador is not None:
+        try:
+            renderizador.remover()
+            ax.set_xlim(min(wl), max(wl))
+        except Exception as e:
+            print(f"Erro na renderização: {e}")
+        renderizador = None
+    gradient_cache = None
+    # Os picos seguidos estão em pixels do eixo antigo: encerra o rastreio (exporta o histórico)
+    if rastreador is not None:
+        alternar_rastreio()
+    anunciar_servidor_espectros()
+    encerrar_gravacao()  # Nova calibração/diretório: a próxima coleta abre outro container
     buffer_size = config["buffer_size"]
-    buffer = np.zeros((buffer_size, len(wl)))
+    buffer = MediaMovel(buffer_size, forma_media(), modo=config.get("modo_media", "media"))
+    publicar_processamento()
     count_save_spectra = config["count_save_spectra"]
     WEBCAM_ON     = config["WEBCAM_ON"]
     WEBCAM_NUMBER = config["WEBCAM_NUMBER"]
@@ -234,14 +330,19 @@ if config["WEBCAM_ON"]:
 else:
     k_ESCALAR = 3
     x_detection = np.arange(int(k_ESCALAR*config["default"]["x_detection_start"]), int(k_ESCALAR*config["default"]["x_detection_end"]))
-line = None
 coeficientes = np.array(config["coeficientes"])
 centro = tuple(config["centro"])
 wl_fit = config["wl_fit"]
 wl = wl_fit[0] * x_detection + wl_fit[1]
+# Extratores com índices pré-calculados (principal e o usado na calibração com lasers)
+extrator = ExtratorEspectro(x_detection, coeficientes, config.get("largura_banda", 1),
+                            filtros=CadeiaFiltros.da_config(config, wl))
+extrator_calibracao = ExtratorEspectro(x_detection, coeficientes, config.get("largura_banda", 1))
+# Faixa de pré-visualização 300x40 retificada sem girar o frame inteiro
+retificador = Retificador(coeficientes, centro, 300, 40)
 buffer_size = config["buffer_size"]
-buffer = np.zeros((buffer_size, len(wl)))
-i = 0
+buffer = MediaMovel(buffer_size, forma_media(), modo=config.get("modo_media", "media"))
+publicar_processamento()
 count_save_spectra = config["count_save_spectra"]
 WEBCAM_ON     = config["WEBCAM_ON"]
 WEBCAM_NUMBER = config["WEBCAM_NUMBER"]
@@ -264,6 +365,8 @@ image_path = "data/img.png"
 # Exibe as webcams disponíveis
 webcams_found = listar_webcams()
 printf(f"Webcams disponíveis: {webcams_found}")
+if webcams_found:
+    printf(f"[INFO] {descoberta.descrever()}")
 if len(webcams_found) == 0:
     webcams_found.append("Vídeo")
     WEBCAM_ON = False
@@ -286,60 +389,135 @@ def atualiza_fonte_de_dados():
     fonte_de_dados = "Fonte de dados: "
     if WEBCAM_ON:
         fonte_de_dados += f"webcam [{config["WEBCAM_NUMBER"]}]."
+    elif config.get("camera_sintetica") is not None:
+        fonte_de_dados += "câmera sintética."
     else:
         fonte_de_dados += f"imagem." if IMAGE_FRAME else f"vídeo."
     if label_fonte_de_dados is not None:
         label_fonte_de_dados.config(text=fonte_de_dados)
 
-def save_spectra_txt(x, y):
-    global count_save_spectra, file_dir, config, COUNT_OR_TIME, last_save_time
+def save_spectra_txt(x, y, indice_frame=None):
+    global count_save_spectra, file_dir, config, COUNT_OR_TIME, last_save_time, gatilho_atual
 
     if (time.time() - last_save_time)*1000 < config["time_to_save_spectra"]:
         return
 
     now = datetime.now()
+    instante = time.time()
+
+    # Coleta contínua com "gravacao_por_mudanca": só grava se o espectro mudou (ou no quadro-chave)
+    gatilho = None
+    if SAVE_SPECTRA and config.get("gravacao_por_mudanca"):
+        if gatilho_atual is None:
+            gatilho_atual = GatilhoGravacao.da_config(config, wl, file_dir + now.strftime("ignorados-%Y-%m-%d-%H-%M-%S") + ".csv")
+        gatilho = gatilho_atual
+        salvar, _ = gatilho.avaliar(y, instante)
+        if not salvar:
+            last_save_time = time.time()
+            return
     
+    if config.get("formato_gravacao", "txt") == "binario":
+        # A referência do gatilho só avança se o espectro entrou na fila
+        if salvar_espectro_binario(y, indice_frame) and gatilho is not None:
+            gatilho.confirmar(y, instante)
+        last_save_time = time.time()
+        return
+
     # Gerar o nome do arquivo com base no contador
     filename = file_dir + (f"{config['spectrum_file_name']}{count_save_spectra:03}.txt" if COUNT_OR_TIME else (now.strftime("spectrum-%Y-%m-%d-%H-%M-%S-%f")[:-3] + ".txt"))
     
-    # Incrementar o contador para o próximo arquivo
-    if COUNT_OR_TIME:
-        count_save_spectra += 1
-    
-    # Abrir o arquivo no modo de escrita
-    with open(filename, 'w') as file:
-        # Iterar sobre os valores de x e y e escrever no formato especificado
-        n = 14
-        for xi, yi in zip(x, y):
-            xi = xi*1e-9
-            file.write(f"{xi:.{n}e};{yi:.{n}e}\n")
+    # Gravação feita pela thread do gravador (avisos chegam por gravador.mensagens())
+    if np.ndim(y) == 2:
+        # Cinza + R, G, B do mesmo frame: spectrumNNN.txt, spectrum_r_NNN.txt, ...
+        prefixo = config['spectrum_file_name'] if COUNT_OR_TIME else "spectrum"
+        sufixo = filename[len(file_dir) + len(prefixo):]
+        # Todos os canais entram na fila juntos, ou nenhum: o número do frame não fica com canais faltando
+        enfileirado = gravador.salvar_canais([file_dir + nome_arquivo_canal(prefixo, canal, sufixo) for canal in CANAIS],
+                                             x, y, timeout=timeout_gravacao())
+    else:
+        enfileirado = gravador.salvar(filename, x, y, timeout=timeout_gravacao())
     
-    printf(f"Espectro salvo como '{filename}'.")
+    # Só avança o contador se o espectro entrou na fila: um descarte não deixa buracos na numeração
+    if COUNT_OR_TIME and enfileirado:
+        count_save_spectra += 1
+    if enfileirado and gatilho is not None:
+        gatilho.confirmar(y, instante)
     last_save_time = time.time()
 
-# Função para ler os dados do arquivo e retornar duas listas: frequência e ganho
+def timeout_gravacao():
+    """Espera pela fila de gravação: um espectro pedido avulso nunca é descartado; na coleta contínua, 50 ms."""
+    return None if SAVE_ONLY_ONE_SPECTRA and not SAVE_SPECTRA else 0.05
+
+def salvar_espectro_binario(y, indice_frame=None):
+    """
+    Anexa o espectro ao container binário da coleta atual, criando-o se necessário.
+
+    :param y: Intensidades (mesmo eixo ``wl`` de toda a coleta); matriz (4, n) com os canais.
+    :param indice_frame: Número de sequência do frame de origem (padrão: contador de espectros salvos).
+    :return: True se o espectro entrou na fila de gravação.
+    """
+    global gravacao_atual, count_save_spectra
+    if gravacao_atual is None:
+        pasta = file_dir + datetime.now().strftime("gravacao-%Y-%m-%d-%H-%M-%S") + ".osarec"
+        calibracao = {
+            "coeficientes": [float(c) for c in coeficientes],
+            "wl_fit": [float(c) for c in wl_fit],
+            "x_detection": [int(x_detection[0]), int(x_detection[-1]) + 1],
+            "buffer_size": buffer_size,
+            "modo_media": config.get("modo_media", "media"),
+            "filtros": extrator.filtros.descrever(),
+        }
+        try:
+            gravacao_atual = GravacaoEspectros.criar(pasta, np.asarray(wl) * 1e-9, calibracao=calibracao,
+                                                     canais=CANAIS if np.ndim(y) == 2 else None)
+        except Exception as e:
+            printf(f"[ERROR] Falha ao criar gravação '{pasta}': {e}")
+            return False
+        printf(f"Gravando espectros em '{pasta}'.")
+    if gravador.salvar_binario(gravacao_atual, y, timeout=timeout_gravacao(), timestamp=time.time(),
+                               indice_frame=count_save_spectra if indice_frame is None else indice_frame,
+                               profundidade_media=len(buffer)):
+        count_save_spectra += 1
+        return True
+    return False
+
+def encerrar_gravacao():
+    """Fecha o container binário e o gatilho de gravação da coleta atual (após gravar o que estiver na fila)."""
+    global gravacao_atual, gatilho_atual
+    if gatilho_atual is not None:
+        printf(f"[INFO] Gravação por mudança: {gatilho_atual.resumo()}")
+        gatilho_atual.fechar()
+        gatilho_atual = None
+    if gravacao_atual is not None:
+        gravador.fechar_gravacao(gravacao_atual)
+        gravacao_atual = None
+
+def persistir_contador(forcar=False):
+    """
+    Grava count_save_spectra no JSON no máximo a cada "intervalo_persistencia_ms".
+
+    :param forcar: Grava imediatamente (fim da coleta ou encerramento).
+    """
+    global ultimo_persistir_contador
+    config["count_save_spectra"] = count_save_spectra
+    if forcar or (time.time() - ultimo_persistir_contador)*1000 >= config.get("intervalo_persistencia_ms", 5000):
+        salvar_configuracoes(config)
+        ultimo_persistir_contador = time.time()
+
+# Função para ler os dados do arquivo e retornar dois arrays: frequência (em metros, como nos TXT) e ganho
 def ler_dados_arquivo(caminho_arquivo):
-    frequencias = []
-    ganhos = []
-    
     try:
-        with open(caminho_arquivo, 'r') as arquivo:
-            for linha in arquivo:
-                # Separar a linha pelos pontos e vírgulas
-                dados = linha.strip().split(';')
-                if len(dados) == 2:
-                    # Converter os valores para float e adicionar às listas
-                    frequencias.append(float(dados[0]))
-                    ganhos.append(float(dados[1]))
+        wl_nm, ganhos = carregar_espectro(caminho_arquivo)
+        return wl_nm * 1e-9, ganhos
     except FileNotFoundError:
         messagebox.showerror("Erro", f"O arquivo {caminho_arquivo} não foi encontrado.")
     except Exception as e:
         messagebox.showerror("Erro", f"Ocorreu um erro ao ler o arquivo: {e}")
-    
-    return frequencias, ganhos
+    return np.array([]), np.array([])
 
 # Função para plotar os dados
 def plotar_espectro(frequencias, ganhos):
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 6))
     
     # Converter frequências para a mesma escala de wl_res
@@ -363,30 +541,30 @@ def ajustar_reta_maior_intensidade(frame, limiar):
     return coeficientes, (float(np.mean(x)), float(np.mean(y)))
 
 def rotacionar_e_cortar_imagem(imagem, coeficientes, ponto_central, largura_saida, altura_saida):
-    angulo_graus = np.degrees(np.arctan(coeficientes[0]))
-    linhas, colunas = imagem.shape[:2]
-    matriz_rotacao = cv2.getRotationMatrix2D(ponto_central, angulo_graus, 1)
-    imagem_rotacionada = cv2.warpAffine(imagem, matriz_rotacao, (colunas, linhas))
-    x1, y1 = int(ponto_central[0] - largura_saida / 2), int(ponto_central[1] - altura_saida / 2)
-    x2, y2 = int(ponto_central[0] + largura_saida / 2), int(ponto_central[1] + altura_saida / 2)
-    return imagem_rotacionada[y1:y2, x1:x2]
+    """
+    Retorna a faixa largura_saida x altura_saida alinhada à reta, centrada em ponto_central.
+
+    Apenas os pixels da faixa são interpolados (ver retificador.py); retorna None
+    se a faixa sair do frame.
+    """
+    retificador.atualizar(coeficientes, ponto_central, largura_saida, altura_saida)
+    return retificador.retificar(imagem)
 
 def obter_espectro(frame, coeficientes, x_detect=None):
     global x_detection
     if x_detect is None:
-        x_detect = x_detection
-    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    intensidades = [gray_frame[int(np.round(coeficientes[0] * x + coeficientes[1])), x] for x in x_detect]
-    return x_detect, scipy.signal.savgol_filter(intensidades, 7, 2)
+        extrator.atualizar(x_detection, coeficientes)
+        return extrator.obter_espectro(frame)
+    extrator_calibracao.atualizar(x_detect, coeficientes)
+    return extrator_calibracao.obter_espectro(frame)
 
 def obter_espectro2(frame, coeficientes):
-    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    intensidades = [gray_frame[int(np.round(coeficientes[0] * x + coeficientes[1])), x] for x in x_detection]
-    return x_detection, scipy.signal.savgol_filter(intensidades, 7, 2)
+    extrator.atualizar(x_detection, coeficientes)
+    return extrator.obter_espectro(frame)
 
 def obter_espectro_calibracao(gray_frame, coeficientes):
-    intensidades = [gray_frame[int(np.round(coeficientes[0] * x + coeficientes[1])), x] for x in x_detection]
-    return x_detection, scipy.signal.savgol_filter(intensidades, 7, 2)
+    extrator.atualizar(x_detection, coeficientes)
+    return extrator.obter_espectro(gray_frame)
 
 def constrain(val, min_val, max_val):
     return min(max_val, max(min_val, val))
@@ -408,6 +586,7 @@ class WebcamViewer:
         self.deve_calibrar = deve_calibrar
         self.limiar = limiar
         self.frame = None
+        self.versao_frame = None
         self.show_RGB = show_RGB
         self.SHOW_LINE = False
         self.SHOW_CALIBRATION_AREA = False
@@ -562,9 +741,8 @@ class WebcamViewer:
         cv2.line(frame, start_point, end_point, color, thickness)
     
     def plot_image_as_3d_surface(self):
-        global global_frame
-
-        frame = copy.deepcopy(global_frame)
+        # Somente leitura: cvtColor abaixo já gera um array novo
+        _, frame = slot_frame.emprestar()
         if frame is None:
             print("Erro: O frame global está vazio.")
             return
@@ -581,6 +759,8 @@ class WebcamViewer:
         z = img_array
         
         # Plotar o relevo
+        import matplotlib.pyplot as plt
+        from mpl_toolkits.mplot3d import Axes3D  # Registra a projeção '3d'
         fig = plt.figure(figsize=(10, 7))
         ax = fig.add_subplot(111, projection='3d')
         ax.plot_surface(x, y, z, cmap='gray', edgecolor='none')
@@ -594,8 +774,14 @@ class WebcamViewer:
         plt.show()
 
     def update_frame(self):
-        global global_frame
-        self.frame = copy.deepcopy(global_frame)
+        versao, frame = slot_frame.emprestar()
+        if versao == self.versao_frame:
+            # Nenhum frame novo desde o último redesenho
+            self.window.after(self.time_rate, self.update_frame)
+            return
+        self.versao_frame = versao
+        # View somente leitura; as anotações são feitas sobre a saída de cvtColor
+        self.frame = frame
 
         try:
             # Converte o frame para o formato RGB
@@ -991,17 +1177,101 @@ class LogWidget:
 
 count_error = 0
 
-def update():
-    global i, buffer, wl, wl_fit, buffer_size, line, fig, ax, canvas, config, x_detection, centro, count_error, webcam, FRAME_WIDTH, FRAME_HEIGHT, SAVE_SPECTRA, SAVE_ONLY_ONE_SPECTRA, WEBCAM_NUMBER, webcams_found, global_frame, WEBCAM_ON, IMAGE_FRAME, start_save_time
+def abrir_fonte_captura(indice=None):
+    """
+    Abre a webcam selecionada (ou a câmera sintética, data/video.mp4 ou data/img.png)
+    e a entrega ao pipeline de aquisição.
 
-    if IMAGE_FRAME and not WEBCAM_ON:
-        frame = cv2.imread(image_path)
-        validacao = True
+    Sem webcam, "camera_sintetica" no JSON (dicionário com os argumentos de
+    CameraSintetica, ex.: {"largura": 1280, "altura": 720, "perfil": "spectrum000.txt"})
+    substitui o vídeo de demonstração.
+    """
+    if WEBCAM_ON:
+        webcam.trocar_fonte(FonteCamera(WEBCAM_NUMBER if indice is None else indice))
+    elif config.get("camera_sintetica") is not None:
+        webcam.trocar_fonte(CameraSintetica(**{"tempo_real": True, **config["camera_sintetica"]}))
+    elif IMAGE_FRAME:
+        webcam.trocar_fonte(FonteImagem(image_path, fps=50.0))  # Mesmo ritmo do root.after(20, update)
     else:
-        validacao, frame = webcam.read()
+        webcam.trocar_fonte(FonteVideo("data/video.mp4", tempo_real=True, repetir=True))
+
+def processar_frame(frame):
+    """
+    Estágio de processamento do pipeline (executado fora da thread do Tk):
+    extrai o espectro do frame e o acumula no buffer de média.
+
+    :return: Espectro médio das últimas buffer_size amostras (matriz (4, n) com "canais_rgb").
+    """
+    # Lida uma vez por frame: start_config (thread do Tk) só troca a referência inteira
+    atual = processamento
+    with instrumentacao.etapa("extracao"):
+        # A forma do buffer decide: trocar "canais_rgb" recria o buffer em start_config
+        bruto = atual.extrator.amostrar_canais(frame) if len(atual.buffer.forma) == 2 else atual.extrator.amostrar(frame)
+    with instrumentacao.etapa("filtros"):
+        intensidade = atual.extrator.suavizar(bruto)
+    with instrumentacao.etapa("media"):
+        return atual.buffer.adicionar(intensidade)
+
+def alternar_instrumentacao():
+    """Liga/desliga os cronômetros por etapa; ao desligar, exporta a sessão em CSV para file_dir."""
+    global ultimo_log_instrumentacao
+    if not instrumentacao.ativo:
+        instrumentacao.reiniciar()
+        instrumentacao.ativo = True
+        ultimo_log_instrumentacao = time.time()
+        printf("[INFO] Instrumentação ativada.")
+        return
+    instrumentacao.ativo = False
+    printf(instrumentacao.linha_resumo())
+    caminho = file_dir + datetime.now().strftime("instrumentacao-%Y-%m-%d-%H-%M-%S") + ".csv"
+    try:
+        n = instrumentacao.exportar(caminho)
+        printf(f"[OK] {n} amostras de tempo exportadas para '{caminho}'.")
+    except Exception as e:
+        printf(f"[ERROR] Falha ao exportar a instrumentação: {e}")
+
+def alternar_rastreio():
+    """
+    Liga/desliga o rastreamento contínuo de picos.
+
+    Os picos vêm de config["picos_rastreados"] (nm) ou, na falta dele, são os
+    config["numero_picos_rastreados"] mais proeminentes do espectro atual.
+    Ao desligar, exporta o histórico em CSV para file_dir.
+    """
+    global rastreador
+    if rastreador is None:
+        opcoes = {"meia_janela": config.get("janela_rastreio", 30), "metodo": config.get("metodo_rastreio", "centroide")}
+        if config.get("picos_rastreados"):
+            rastreador = RastreadorPicos(wl, config["picos_rastreados"], **opcoes)
+        elif glob_spec is not None:
+            rastreador = RastreadorPicos.a_partir_do_espectro(wl, glob_spec, config.get("numero_picos_rastreados", 3), **opcoes)
+        if rastreador is None:
+            printf("NOTA: Nenhum PICO encontrado para rastrear")
+            return
+        centros = ", ".join(f"{c:.2f}" for c in np.interp(rastreador.posicoes, np.arange(len(wl)), wl))
+        printf(f"[INFO] Rastreando {rastreador.n_picos} picos: {centros} nm")
+        rotulo_rastreio.place(relx=1.0, x=-10, y=10, anchor="ne")
+        return
+    printf(rastreador.linha_deriva())
+    caminho = file_dir + datetime.now().strftime("rastreio-%Y-%m-%d-%H-%M-%S") + ".csv"
+    try:
+        n = rastreador.exportar(caminho)
+        printf(f"[OK] {n} amostras de rastreio exportadas para '{caminho}'.")
+    except Exception as e:
+        printf(f"[ERROR] Falha ao exportar o rastreio: {e}")
+    rastreador = None
+    rotulo_rastreio.place_forget()
+
+def update():
+    global buffer, wl, wl_fit, buffer_size, renderizador, fig, ax, canvas, config, x_detection, centro, count_error, webcam, FRAME_WIDTH, FRAME_HEIGHT, SAVE_SPECTRA, SAVE_ONLY_ONE_SPECTRA, WEBCAM_NUMBER, webcams_found, WEBCAM_ON, IMAGE_FRAME, start_save_time, reconexao, inicio_reconexao, ultimo_log_instrumentacao, ultima_leitura_rastreio
+    inicio_tick = time.perf_counter()
+
+    # Apenas o resultado mais recente do pipeline é exibido
+    resultado = webcam.ultimo_resultado()
 
-    if validacao:
-        global_frame = frame
+    if resultado is not None:
+        frame = resultado["frame"]
+        slot_frame.publicar(frame, resultado["timestamp"])
         height, width, _ = frame.shape
         if FRAME_WIDTH != int(width) or FRAME_HEIGHT != int(height):
             # if width > FRAME_WIDTH:
@@ -1019,13 +1289,15 @@ def update():
                 reiniciar()
         rotated_frame = frame
         try:
-            rotated_frame = rotacionar_e_cortar_imagem(frame, coeficientes, centro, 300, 40)
+            with instrumentacao.etapa("previa_recorte"):
+                rotated_frame = rotacionar_e_cortar_imagem(frame, coeficientes, centro, 300, 40)
             
             # Verifique se rotated_frame não é None
             if rotated_frame is not None and rotated_frame.shape[0] == 40 and rotated_frame.shape[1] == 300:
-                imgtk = ImageTk.PhotoImage(image=Image.fromarray(cv2.cvtColor(rotated_frame, cv2.COLOR_BGR2RGB)))
-                webcam_label.imgtk = imgtk
-                webcam_label.configure(image=imgtk)
+                with instrumentacao.etapa("previa_exibicao"):
+                    imgtk = ImageTk.PhotoImage(image=Image.fromarray(cv2.cvtColor(rotated_frame, cv2.COLOR_BGR2RGB)))
+                    webcam_label.imgtk = imgtk
+                    webcam_label.configure(image=imgtk)
             else:
                 # print("{}\t A imagem está vazia ou não pôde ser processada.".format(count_error))
                 printf("[WARNING] Não é possível exibir espectro. Faça a calibração. O programa será reiniciado com as configurações padrão.")
@@ -1039,71 +1311,88 @@ def update():
         except cv2.error as e:
             print("Erro ao processar a imagem:", e)
         
-        try:
-            _, intensidade = obter_espectro(frame, coeficientes)
-        except Exception as e:
+        if resultado["erro"] is not None:
             printf("[ERROR]: Faça a calibração")
-            print(e)
-            _, intensidade = x_detection, np.zeros_like(x_detection)
+            print(resultado["erro"])
             # Reiniciar todo o programa
             default_calibration(config)
             reiniciar()
             # python = sys.executable              # Obtém o caminho do interpretador Python em execução
             # os.execl(python, python, *sys.argv)  # Substitui o processo atual por um novo com os mesmos argumentos
-        buffer[i, :] = intensidade
-        i = (i + 1) % buffer_size
 
-        if i > 0:  # Só calcula a média se i for maior que zero
+        if resultado["espectro"] is not None:
             global glob_spec
-            spec = glob_spec = np.mean(buffer[:i, :], axis=0) if i < buffer_size else np.mean(buffer, axis=0)
-            # Modifique a seção de plotagem:
-            if SHOW_GRADIENT:
+            espectro = resultado["espectro"]
+            # Com "canais_rgb" o gráfico, picos e rastreio usam a linha em tons de cinza
+            spec = glob_spec = espectro[0] if espectro.ndim == 2 else espectro
+            if rastreador is not None and len(spec) == len(rastreador.wl):
+                with instrumentacao.etapa("rastreio"):
+                    rastreador.atualizar(spec, resultado["timestamp"])
+                # Leitura de deriva a ~4 Hz: atualizar o Label a cada quadro custa mais que o rastreio
+                if time.time() - ultima_leitura_rastreio >= 0.25:
+                    rotulo_rastreio.configure(text=rastreador.linha_deriva())
+                    ultima_leitura_rastreio = time.time()
+            # Renderizador criado uma vez; depois só atualiza linha e degradê via blit
+            if renderizador is None:
+                global gradient_cache
                 try:
-                    global poly_collection, gradient_cache
-                    
-                    # Pré-calcula o gradiente apenas uma vez
-                    if gradient_cache is None:
-                        gradient_cache = precompute_gradient(wl)
-                    
-                    # Cria vértices para PolyCollection
-                    verts = []
-                    for j in range(len(wl)-1):
-                        verts.append([(wl[j], 0), (wl[j], spec[j]), (wl[j+1], spec[j+1]), (wl[j+1], 0)])
-                    
-                    # Atualiza a coleção ao invés de recriar
-                    if poly_collection is None:
-                        poly_collection = PolyCollection(verts, facecolors=gradient_cache, edgecolors='none')
-                        ax.add_collection(poly_collection)
-                    else:
-                        poly_collection.set_verts(verts)
-                    
-                    # Mantém a linha principal
-                    if line is None:
-                        line, = ax.plot(wl, spec, color='white', lw=1.5, alpha=0.8) if DARK else ax.plot(wl, spec, color='gray', lw=1.5, alpha=0.8)
+                    if SHOW_GRADIENT:
+                        # Pré-calcula o gradiente apenas uma vez
+                        if gradient_cache is None:
+                            gradient_cache = precompute_gradient(wl)
+                        renderizador = RenderizadorEspectro(ax, canvas, wl, cores=gradient_cache, cor_linha='white' if DARK else 'gray', alpha=0.8, fps_maximo=config.get("fps_maximo_grafico", 30))
                     else:
-                        line.set_ydata(spec)
-                        
+                        renderizador = RenderizadorEspectro(ax, canvas, wl, cor_linha='b', fps_maximo=config.get("fps_maximo_grafico", 30))
                 except Exception as e:
                     print(f"Erro na renderização: {e}")
-
-            if line is None:
-                line, = ax.plot(wl, spec, color='black', lw=1.5, alpha=0.8) if SHOW_GRADIENT else ax.plot(wl, spec, color='b')
-            else:
-                line.set_ydata(spec)
             
+            if servidor_espectros is not None:
+                # Só enfileira para os assinantes: o envio é feito pelas threads do servidor
+                with instrumentacao.etapa("publicacao"):
+                    servidor_espectros.publicar(espectro, resultado["timestamp"])
+
             if SAVE_SPECTRA and config["total_time_save_spectra"] != 0.0:
                 SAVE_SPECTRA = time.time() - start_save_time < config["total_time_save_spectra"]
+                if not SAVE_SPECTRA:
+                    persistir_contador(forcar=True)
+                    encerrar_gravacao()
                 
             if SAVE_SPECTRA or SAVE_ONLY_ONE_SPECTRA:
-                save_spectra_txt(wl, spec)
-                config["count_save_spectra"] = count_save_spectra
-                salvar_configuracoes(config)
+                with instrumentacao.etapa("gravacao"):
+                    save_spectra_txt(wl, espectro, indice_frame=resultado["seq"])
+                    persistir_contador(forcar=SAVE_ONLY_ONE_SPECTRA)
+                if SAVE_ONLY_ONE_SPECTRA and not SAVE_SPECTRA:
+                    encerrar_gravacao()
             SAVE_ONLY_ONE_SPECTRA = False
-            canvas.draw()
-    elif not WEBCAM_ON:
-        webcam.set(cv2.CAP_PROP_POS_FRAMES, 0)
-    else:
-        webcams_found = listar_webcams()
+            if renderizador is not None:
+                try:
+                    with instrumentacao.etapa("renderizacao"):
+                        desenhado = renderizador.desenhar(spec)
+                    if desenhado:
+                        instrumentacao.marcar("exibidos")
+                        instrumentacao.registrar("latencia", time.perf_counter() - resultado["capturado_em"])
+                except Exception as e:
+                    print(f"Erro na renderização: {e}")
+    elif webcam.falha or reconexao is not None:
+        # Sonda só a webcam perdida, sem travar a interface
+        if reconexao is None:
+            printf(f"[WARNING] Webcam {WEBCAM_NUMBER} parou de responder. Verificando...")
+            webcam.trocar_fonte(None)
+            reconexao = descoberta.sondar_em_segundo_plano(WEBCAM_NUMBER)
+            inicio_reconexao = time.monotonic()
+            root.after(20, update)
+            return
+        if not reconexao.done():
+            limite = config.get("timeout_reconexao_s", 10.0)
+            if time.monotonic() - inicio_reconexao > limite:
+                # Driver travado no VideoCapture: uma nova sondagem também travaria (e acumularia threads);
+                # continua esperando a atual e só avisa de novo a cada intervalo
+                printf(f"[WARNING] Webcam {WEBCAM_NUMBER} não respondeu em {limite:.0f} s. Aguardando o driver...")
+                inicio_reconexao = time.monotonic()
+            root.after(20, update)
+            return
+        reconexao = None
+        webcams_found = descoberta.disponiveis()
         printf(f"Webcams disponíveis: {webcams_found}")
         if len(webcams_found) == 0:
             webcams_found.append("Vídeo")
@@ -1114,8 +1403,18 @@ def update():
             max_cam = len(webcams_found) - 1
         if WEBCAM_NUMBER > max_cam:
             WEBCAM_NUMBER = config["WEBCAM_NUMBER"] = max_cam
-        webcam = cv2.VideoCapture(WEBCAM_NUMBER) if WEBCAM_ON else cv2.VideoCapture("data/video.mp4")
+        abrir_fonte_captura()
         atualiza_fonte_de_dados()
+
+    # Resumos e erros da thread de gravação
+    for msg in gravador.mensagens():
+        printf(msg)
+
+    if instrumentacao.ativo:
+        instrumentacao.registrar("tick", time.perf_counter() - inicio_tick)
+        if time.time() - ultimo_log_instrumentacao >= config.get("intervalo_instrumentacao_s", 5.0):
+            printf(instrumentacao.linha_resumo())
+            ultimo_log_instrumentacao = time.time()
     
     root.after(20, update)
 
@@ -1233,8 +1532,7 @@ def abrir_janela_edicao():
     ttk.Button(janela_edicao, text="Aplicar configurações", command=aplicar).grid(row=18, columnspan=2)
 
     def fazer_calibracao():
-        global global_frame
-        WebcamViewer().make_calibration(global_frame)
+        WebcamViewer().make_calibration(slot_frame.emprestar()[1])
 
     ttk.Button(janela_edicao, text="Calibrar com luz branca", command=fazer_calibracao).grid(row=19, columnspan=2)
 
@@ -1265,8 +1563,7 @@ def abrir_janela_webcam():
         global WEBCAM_ON, webcam, centro
         WEBCAM_ON = not WEBCAM_ON
         config["WEBCAM_ON"] = WEBCAM_ON
-        webcam.release()
-        webcam = cv2.VideoCapture(WEBCAM_NUMBER) if WEBCAM_ON else cv2.VideoCapture("data/video.mp4")
+        abrir_fonte_captura()
         centro = config["centro"]
         atualiza_fonte_de_dados()
         salvar_configuracoes(config)
@@ -1295,14 +1592,12 @@ def abrir_janela_webcam():
             try:
                 if selected_webcam_index.get() == webcams_found[-1]:
                     WEBCAM_ON = False
-                    webcam.release()
-                    webcam = cv2.VideoCapture("data/video.mp4")
                     IMAGE_FRAME = False
+                    abrir_fonte_captura()
                     printf("Exibição de vídeo".format(selected_webcam_index))
                 elif WEBCAM_ON:
                     WEBCAM_NUMBER = config["WEBCAM_NUMBER"] = int(selected_webcam_index.get())
-                    webcam.release()
-                    webcam = cv2.VideoCapture(WEBCAM_NUMBER)
+                    abrir_fonte_captura(WEBCAM_NUMBER)
                     centro = config["centro"]
                     printf("A webcam {} foi selecionada".format(selected_webcam_index.get()))
                     salvar_configuracoes(config)
@@ -1336,6 +1631,7 @@ def abrir_janela_webcam():
         def exibir_video_ou_imagem(nada):
             global IMAGE_FRAME, config
             IMAGE_FRAME = (selected_midea.get() == midea[1])
+            abrir_fonte_captura()
             atualiza_fonte_de_dados()
 
         # Label de título
@@ -1442,6 +1738,8 @@ def abrir_janela_configuracoes():
         SAVE_SPECTRA = save_on_var.get()
         if SAVE_SPECTRA:
             start_save_time = time.time()
+        else:
+            encerrar_gravacao()
     
     def save_one_spectra():
         global SAVE_SPECTRA, SAVE_ONLY_ONE_SPECTRA, save_only_var, last_save_time
@@ -1645,7 +1943,7 @@ def abrir_janela_read_file_spectra():
     def atualizar_visualizacao():
         caminho_arquivo = entrada_endereco.get()
         frequencias, ganhos = ler_dados_arquivo(caminho_arquivo)
-        if frequencias and ganhos:
+        if len(frequencias) and len(ganhos):
             plotar_espectro(frequencias, ganhos)
 
     # Botão para selecionar o arquivo via gerenciador de arquivos
@@ -1676,6 +1974,11 @@ def open_calibration_window():
 
 def on_closing():
     webcam.release()
+    if servidor_espectros is not None:
+        servidor_espectros.fechar()
+    encerrar_gravacao()
+    gravador.fechar()
+    persistir_contador(forcar=True)
     root.destroy()
 
 def on_closing_all():
@@ -1683,9 +1986,9 @@ def on_closing_all():
     exit()
 
 def osa_start():
-    global line, i, config, root, webcam_label, open_button_canva, fig, ax, canvas, webcam, fonte_de_dados, label_fonte_de_dados, log_element, DARK, poly_collection, gradient_cache, SHOW_FRAME_GRAPH
-    line = None
-    i = 0
+    global renderizador, config, root, webcam_label, open_button_canva, fig, ax, canvas, webcam, fonte_de_dados, label_fonte_de_dados, log_element, DARK, gradient_cache, SHOW_FRAME_GRAPH, rotulo_rastreio
+    renderizador = None
+    buffer.reiniciar()
     # count_save_spectra = 0
     # global_frame = None   
     config = carregar_configuracoes()
@@ -1694,7 +1997,6 @@ def osa_start():
     atualiza_fonte_de_dados()
 
     # Variáveis globais para cache
-    poly_collection = None
     gradient_cache = None
 
     
@@ -1708,6 +2010,7 @@ def osa_start():
 
     # Função para abrir o website no navegador padrão
     def open_website():
+        import webbrowser
         webbrowser.open("https://github.com/Jakson-Almeida")
 
     # Função para trocar a imagem ao passar o mouse
@@ -1742,8 +2045,14 @@ def osa_start():
     log_element = LogWidget(root, size=(46, 9), buffer=300, theme="white", element=open_button_canva, start_pose=(-300, 20), add_str=">>> ")
     printf("")
 
+    # Leitura de deriva do rastreamento de picos (visível só com o rastreio ligado)
+    rotulo_rastreio = tk.Label(root, justify=tk.LEFT, anchor="w", font=("Consolas", 9), bg="white")
+    if rastreador is not None:  # Tema/degradê recriam a janela com o rastreio ligado
+        rotulo_rastreio.configure(text=rastreador.linha_deriva())
+        rotulo_rastreio.place(relx=1.0, x=-10, y=10, anchor="ne")
+
     def key_pressed(event):
-        global SHOW_GRADIENT, poly_collection, gradient_cache, SHOW_FRAME_GRAPH
+        global SHOW_GRADIENT, renderizador, gradient_cache, SHOW_FRAME_GRAPH
         key = event.keysym
         if key == 'd':
             change_theme()
@@ -1759,9 +2068,23 @@ def osa_start():
         elif key == 'y':
             SHOW_FRAME_GRAPH = not SHOW_FRAME_GRAPH
             show_frame_graph(None) if SHOW_FRAME_GRAPH else hide_frame_graph(None)
+        elif key == 'f':
+            est = webcam.estatisticas()
+            printf(f"Frames: {est['capturados']} capturados | {est['processados']} processados | {est['descartados']} descartados")
+        elif key == 't':
+            alternar_instrumentacao()
+        elif key == 'l':
+            printf(instrumentacao.linha_resumo())
+        elif key == 'k':
+            alternar_rastreio()
+        elif key == 'c':
+            # Dados crus (sem filtros) na tela e nos arquivos até apertar 'c' de novo
+            encerrar_gravacao()
+            extrator.filtros.ativo = not extrator.filtros.ativo
+            printf("Filtros " + ("ativados." if extrator.filtros.ativo else "desativados (dados crus)."))
 
     def change_theme(is_dark=None):
-        global DARK, fig, ax, poly_collection, gradient_cache
+        global DARK, fig, ax, renderizador, gradient_cache
         if is_dark is not None:
             DARK = is_dark
         else:
@@ -1979,7 +2302,12 @@ def osa_start():
     btn_root_4.pack()
     btn_root_5.pack()
 
-    webcam = cv2.VideoCapture(WEBCAM_NUMBER) if WEBCAM_ON else cv2.VideoCapture("data/video.mp4")
+    # Captura e extração rodam em threads próprias; update() só exibe o resultado mais recente
+    instrumentacao.ativo = config.get("instrumentacao", False)
+    webcam = PipelineAquisicao(processar_frame, tamanho_anel=config.get("tamanho_anel", 8), instrumentacao=instrumentacao)
+    iniciar_servidor_espectros()
+    abrir_fonte_captura()
+    webcam.iniciar()
 
     root.protocol("WM_DELETE_WINDOW", on_closing_all)
     update()
@@ -1994,6 +2322,7 @@ def reiniciar():
         # Aqui você pode adicionar sua lógica de reinicialização
         # Por exemplo, reexecutar o arquivo atual (simulado aqui)
         root.destroy()
+        webcam.release()
         start_config(config)
         osa_start()
 
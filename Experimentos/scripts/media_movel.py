@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Média móvel dos espectros ao vivo com custo O(len(wl)) por atualização.
+
+Modos disponíveis (mesma interface):
+    "media"   -> média das últimas N amostras via soma acumulada, com
+                 ressincronização exata periódica para limitar o erro de
+                 ponto flutuante
+    "ema"     -> média móvel exponencial com alfa = 2/(N + 1)
+    "mediana" -> mediana das últimas N amostras (O(N·len(wl)), robusta a outliers)
+"""
+
+import numpy as np
+
+
+MODOS_MEDIA = ("media", "ema", "mediana")
+
+
+class MediaMovel:
+    """Janela deslizante de espectros com média, EMA ou mediana."""
+
+    def __init__(self, tamanho, n_pontos, modo="media", ressincronizar_a_cada=None):
+        """
+        Args:
+            tamanho: Número de espectros na janela (buffer_size)
+            n_pontos: Número de pontos de cada espectro, ou a forma de cada amostra
+                (ex.: ``(4, n)`` para cinza + R, G e B promediados juntos)
+            modo: "media", "ema" ou "mediana"
+            ressincronizar_a_cada: Atualizações entre recálculos exatos da soma
+                (padrão: ``tamanho``, o que mantém o custo amortizado O(len(wl)))
+        """
+        if modo not in MODOS_MEDIA:
+            raise ValueError(f"Modo de média inválido: {modo}. Use um de {MODOS_MEDIA}.")
+        self.tamanho = max(1, int(tamanho))
+        self.n_pontos = n_pontos
+        self.forma = tuple(int(n) for n in np.atleast_1d(n_pontos))
+        self.modo = modo
+        self.ressincronizar_a_cada = int(ressincronizar_a_cada or self.tamanho)
+        self.alfa = 2.0 / (self.tamanho + 1.0)
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Esvazia a janela."""
+        self._janela = np.zeros((self.tamanho,) + self.forma)
+        self._soma = np.zeros(self.forma)
+        self._ema = None
+        self._pos = 0
+        self.contagem = 0
+        self._desde_ressincronizacao = 0
+
+    def __len__(self):
+        return self.contagem
+
+    def adicionar(self, espectro):
+        """
+        Insere um espectro e retorna a média atual.
+
+        Args:
+            espectro: Array com a forma ``n_pontos`` (1D na maioria dos casos)
+        """
+        espectro = np.asarray(espectro, dtype=float)
+
+        if self.modo == "ema":
+            if self._ema is None:
+                self._ema = espectro.copy()
+            else:
+                self._ema += self.alfa * (espectro - self._ema)
+            self.contagem = min(self.contagem + 1, self.tamanho)
+            return self._ema.copy()
+
+        linha = self._janela[self._pos]
+        if self.contagem == self.tamanho:
+            self._soma -= linha
+        else:
+            self.contagem += 1
+        linha[:] = espectro
+        self._soma += espectro
+        self._pos = (self._pos + 1) % self.tamanho
+
+        self._desde_ressincronizacao += 1
+        if self._desde_ressincronizacao >= self.ressincronizar_a_cada:
+            self.ressincronizar()
+
+        return self.media()
+
+    def ressincronizar(self):
+        """Recalcula a soma exatamente a partir da janela (descarta o erro acumulado)."""
+        self._soma = self._janela[:self.contagem].sum(axis=0)
+        self._desde_ressincronizacao = 0
+
+    def media(self):
+        """Retorna a média (ou EMA/mediana) atual, ou None se a janela estiver vazia."""
+        if self.contagem == 0:
+            return None
+        if self.modo == "ema":
+            return self._ema.copy()
+        if self.modo == "mediana":
+            return np.median(self._janela[:self.contagem], axis=0)
+        return self._soma / self.contagem
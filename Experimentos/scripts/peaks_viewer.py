@@ -15,6 +15,8 @@ from matplotlib.collections import PolyCollection
 from matplotlib.widgets import SpanSelector
 import os
 
+from espectro_io import carregar_espectro
+
 
 def wavelength_to_rgb(wavelength, gamma=0.8, dark=False):
     """
@@ -130,26 +132,13 @@ def ajustar_curva(wl_nm, spec, modelo="gaussian"):
 
 def ler_dados_arquivo(caminho_arquivo):
     """
-    Lê arquivo de espectro (uma linha por ponto: wavelength;intensity).
-    Retorna (wl_metros, intensidade) ou ([], []) em caso de erro.
+    Lê arquivo de espectro (TXT do OSA Visível ou CSV do ThorLabs, ver espectro_io).
+    Retorna (wl_nm, intensidade) ou arrays vazios em caso de erro.
     """
-    frequencias = []
-    ganhos = []
     try:
-        with open(caminho_arquivo, "r", encoding="utf-8", errors="replace") as arquivo:
-            for linha in arquivo:
-                dados = linha.strip().split(";")
-                if len(dados) >= 2:
-                    try:
-                        frequencias.append(float(dados[0]))
-                        ganhos.append(float(dados[1]))
-                    except ValueError:
-                        continue
-    except FileNotFoundError:
-        return [], []
+        return carregar_espectro(caminho_arquivo)
     except Exception:
-        return [], []
-    return frequencias, ganhos
+        return np.array([]), np.array([])
 
 
 def detectar_picos(intensidade, prominence=5, valley=False):
@@ -308,15 +297,13 @@ def main():
             return
         spectra_data = []
         for path in paths:
-            wl_m, spec = ler_dados_arquivo(path)
-            if not wl_m or not spec:
+            wl_nm, spec = ler_dados_arquivo(path)
+            if wl_nm.size == 0:
                 messagebox.showwarning(
                     "Aviso",
                     f"Não foi possível ler dados de:\n{os.path.basename(path)}",
                 )
                 continue
-            wl_nm = np.array(wl_m) * 1e9
-            spec = np.array(spec)
             spectra_data.append((path, wl_nm, spec))
         if not spectra_data:
             messagebox.showwarning("Aviso", "Nenhum espectro válido carregado.")
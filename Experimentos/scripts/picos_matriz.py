@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção de picos em uma série temporal inteira de uma vez.
+
+Com a pasta temporal carregada em uma matriz ``(n_espectros, n_pontos)``
+(``espectro_io.carregar_pasta``, ``espectograma.carregar_matriz_temporal``),
+``detectar_picos_matriz`` encontra os máximos locais, a proeminência e a
+largura à meia altura de todas as linhas com operações vetorizadas, em vez de
+um ``find_peaks`` por espectro. O resultado é o mesmo de
+``scipy.signal.find_peaks(linha, prominence=...)`` (máximos em platô pelo
+ponto médio, proeminência e bases como em ``peak_prominences``, largura como
+em ``peak_widths(rel_height=0.5)``).
+
+As buscas da proeminência (próximo ponto mais alto que o pico de cada lado) e
+da meia altura (próximo ponto abaixo dela) são feitas por saltos de 2^k sobre
+tabelas de máximos e mínimos por bloco, então custam O(log n_pontos) passadas
+de NumPy para todos os picos juntos. As linhas são processadas em blocos para
+limitar a memória das tabelas.
+
+A tabela devolvida é colunar (dicionário de arrays, um elemento por pico, em
+ordem de espectro e pixel) e vira um DataFrame com ``pd.DataFrame(tabela)``:
+    espectro    -> índice da linha da matriz
+    pixel       -> índice do pico na linha
+    wl          -> posição sub-pixel do pico (vértice da parábola), em nm
+    altura      -> intensidade no pixel do pico
+    prominencia -> proeminência
+    fwhm_nm     -> largura à meia proeminência, em nm
+
+Uso:
+    python Experimentos/scripts/picos_matriz.py Experimentos/Visible_OSA/Temporal --verificar
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from espectro_io import carregar_pasta, configurar_cache, resumo_cache
+
+
+COLUNAS = ("espectro", "pixel", "wl", "altura", "prominencia", "fwhm_nm")
+
+# Elementos da matriz por bloco de linhas (cada nível das tabelas ocupa um bloco)
+ELEMENTOS_POR_BLOCO = 1 << 20
+
+# Passos de um pixel dados em cada busca antes de passar aos saltos de 2^k
+VARREDURA_LINEAR = 8
+
+
+def _maximos_locais(matriz):
+    """
+    Máximos locais de todas as linhas, com platôs pelo ponto médio como em ``find_peaks``.
+
+    Returns:
+        Tupla (linhas, pixels) em ordem de linha e pixel
+    """
+    passo = np.diff(matriz, axis=1)
+    # Só os passos não nulos importam: um pico é uma subida seguida (após um platô opcional) de uma descida
+    linhas, colunas = np.nonzero(passo)
+    sinais = passo[linhas, colunas] > 0
+    pico = sinais[:-1] & ~sinais[1:] & (linhas[:-1] == linhas[1:])
+    esquerda = colunas[:-1][pico] + 1
+    direita = colunas[1:][pico]
+    return linhas[:-1][pico], (esquerda + direita) // 2
+
+
+def _tabela(plano, operacao, niveis):
+    """``tabela[k, i]`` = ``operacao`` de ``plano[i:i + 2**k]`` (truncado no fim do array)."""
+    tabela = np.empty((niveis, plano.size))
+    tabela[0] = plano
+    for k in range(1, niveis):
+        salto = 1 << (k - 1)
+        operacao(tabela[k - 1, :-salto], tabela[k - 1, salto:], out=tabela[k, :-salto])
+        tabela[k, -salto:] = tabela[k - 1, -salto:]
+    return tabela
+
+
+def _alcance(plano, tabelas, posicao, limite, sentido, limiar, acima):
+    """
+    Anda de ``posicao`` no ``sentido`` (-1 ou 1), sem passar de ``limite``,
+    enquanto os pontos ficam ``> limiar`` (``acima``) ou ``<= limiar``.
+
+    Os primeiros passos são de um pixel (quase todas as buscas terminam perto
+    do pico); as buscas que restam seguem por saltos de 2^k sobre as tabelas
+    de máximos e mínimos por bloco.
+
+    Args:
+        tabelas: Função nome ("max" ou "min") -> tabela de ``_tabela``, montada sob demanda
+
+    Returns:
+        Tupla (último índice alcançado, mínimo de ``plano`` entre ``posicao`` e ele)
+    """
+    alcance = posicao.copy()
+    minimo = plano[posicao]
+    ativos = np.arange(posicao.size)
+    for _ in range(VARREDURA_LINEAR):
+        proximo = alcance[ativos] + sentido
+        dentro = (proximo >= limite[ativos]) if sentido < 0 else (proximo <= limite[ativos])
+        valor = plano[np.where(dentro, proximo, alcance[ativos])]
+        segue = dentro & ((valor > limiar[ativos]) if acima else (valor <= limiar[ativos]))
+        ativos = ativos[segue]
+        alcance[ativos] = proximo[segue]
+        minimo[ativos] = np.minimum(minimo[ativos], valor[segue])
+        if ativos.size == 0:
+            return alcance, minimo
+
+    # O bloco todo satisfaz a condição quando o seu mínimo está acima do limiar (ou o seu máximo não passa dele)
+    condicao, minimos = (tabelas("min"), tabelas("min")) if acima else (tabelas("max"), tabelas("min"))
+    ultimo = plano.size - 1
+    pos, lim, thr, menor = alcance[ativos], limite[ativos], limiar[ativos], minimo[ativos]
+    for k in range(len(condicao) - 1, -1, -1):
+        alvo = pos + sentido * (1 << k)
+        inicio_bloco = np.clip(alvo if sentido < 0 else pos + 1, 0, ultimo)
+        dentro = (alvo >= lim) if sentido < 0 else (alvo <= lim)
+        bloco = condicao[k, inicio_bloco]
+        pode = dentro & ((bloco > thr) if acima else (bloco <= thr))
+        pos = np.where(pode, alvo, pos)
+        menor = np.where(pode, np.minimum(menor, minimos[k, inicio_bloco]), menor)
+    alcance[ativos], minimo[ativos] = pos, menor
+    return alcance, minimo
+
+
+def _picos_bloco(matriz, prominence):
+    n_pontos = matriz.shape[1]
+    linhas, pixels = _maximos_locais(matriz)
+    vazio = np.empty(0)
+    if linhas.size == 0:
+        return linhas, pixels, vazio, vazio, vazio, vazio, vazio
+
+    plano = np.ascontiguousarray(matriz, dtype=float).ravel()
+    posicao = linhas * n_pontos + pixels
+    inicio_linha = linhas * n_pontos
+    fim_linha = inicio_linha + n_pontos - 1
+    altura = plano[posicao]
+
+    niveis = max(1, int(np.ceil(np.log2(n_pontos))))
+    montadas = {}
+
+    def tabelas(nome):
+        if nome not in montadas:
+            montadas[nome] = _tabela(plano, np.maximum if nome == "max" else np.minimum, niveis)
+        return montadas[nome]
+
+    # Proeminência: de cada lado, o menor valor até o próximo ponto mais alto que o pico (ou a borda)
+    _, minimo_esquerda = _alcance(plano, tabelas, posicao, inicio_linha, -1, altura, False)
+    _, minimo_direita = _alcance(plano, tabelas, posicao, fim_linha, 1, altura, False)
+    prominencia = altura - np.maximum(minimo_esquerda, minimo_direita)
+
+    mantem = prominencia >= prominence
+    linhas, pixels, posicao, altura, prominencia = (
+        linhas[mantem], pixels[mantem], posicao[mantem], altura[mantem], prominencia[mantem])
+    inicio_linha, fim_linha = inicio_linha[mantem], fim_linha[mantem]
+    if linhas.size == 0:
+        return linhas, pixels, vazio, vazio, vazio, vazio, vazio
+
+    # Meia altura: o primeiro ponto <= referência de cada lado fica sempre dentro das bases da proeminência
+    referencia = altura - 0.5 * prominencia
+    acima_esquerda, _ = _alcance(plano, tabelas, posicao, inicio_linha, -1, referencia, True)
+    acima_direita, _ = _alcance(plano, tabelas, posicao, fim_linha, 1, referencia, True)
+    i = acima_esquerda - 1
+    cruzamento_esquerda = (i - inicio_linha) + (referencia - plano[i]) / (plano[i + 1] - plano[i])
+    i = acima_direita + 1
+    cruzamento_direita = (i - inicio_linha) - (referencia - plano[i]) / (plano[i - 1] - plano[i])
+
+    # Vértice da parábola pelos vizinhos do pico (o pico nunca está na borda)
+    y0, y2 = plano[posicao - 1], plano[posicao + 1]
+    curvatura = y0 - 2.0 * altura + y2
+    deslocamento = np.zeros(linhas.size)
+    concavo = curvatura < 0
+    deslocamento[concavo] = 0.5 * (y0[concavo] - y2[concavo]) / curvatura[concavo]
+    return linhas, pixels, pixels + deslocamento, altura, prominencia, cruzamento_esquerda, cruzamento_direita
+
+
+def detectar_picos_matriz(wl_nm, matriz, prominence=5):
+    """
+    Detecta os picos de todas as linhas de ``matriz``.
+
+    Args:
+        wl_nm: Eixo de comprimento de onda (n_pontos) comum às linhas
+        matriz: Array (n_espectros, n_pontos) de intensidades
+        prominence: Proeminência mínima, como em ``find_peaks(prominence=...)``
+
+    Returns:
+        Dicionário coluna -> array com as ``COLUNAS``, um elemento por pico
+    """
+    wl = np.asarray(wl_nm, dtype=float)
+    matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+    n_espectros, n_pontos = matriz.shape
+    if wl.size != n_pontos:
+        raise ValueError(f"Eixo com {wl.size} pontos para espectros de {n_pontos} pontos")
+
+    eixo = np.arange(n_pontos)
+    partes = {coluna: [] for coluna in COLUNAS}
+    linhas_por_bloco = max(1, ELEMENTOS_POR_BLOCO // max(1, n_pontos))
+    for inicio in range(0, n_espectros, linhas_por_bloco):
+        linhas, pixels, sub_pixel, altura, prominencia, esquerda, direita = _picos_bloco(
+            matriz[inicio:inicio + linhas_por_bloco], prominence)
+        partes["espectro"].append(linhas + inicio)
+        partes["pixel"].append(pixels)
+        partes["wl"].append(np.interp(sub_pixel, eixo, wl))
+        partes["altura"].append(altura)
+        partes["prominencia"].append(prominencia)
+        partes["fwhm_nm"].append(np.abs(np.interp(direita, eixo, wl) - np.interp(esquerda, eixo, wl)))
+
+    tabela = {coluna: np.concatenate(valores) for coluna, valores in partes.items()}
+    tabela["espectro"] = tabela["espectro"].astype(int)
+    tabela["pixel"] = tabela["pixel"].astype(int)
+    return tabela
+
+
+def verificar_find_peaks(wl_nm, matriz, tabela, prominence=5):
+    """
+    Compara a tabela com ``find_peaks``/``peak_widths`` linha a linha.
+
+    Returns:
+        Lista de mensagens com as diferenças (vazia quando tudo confere)
+    """
+    from scipy.signal import find_peaks, peak_widths
+
+    eixo = np.arange(len(wl_nm))
+    diferencas = []
+    for linha, y in enumerate(np.atleast_2d(matriz)):
+        picos, info = find_peaks(y, prominence=prominence)
+        sel = tabela["espectro"] == linha
+        if not np.array_equal(picos, tabela["pixel"][sel]):
+            diferencas.append(f"espectro {linha}: picos {picos.tolist()} != {tabela['pixel'][sel].tolist()}")
+            continue
+        if not np.allclose(info["prominences"], tabela["prominencia"][sel]):
+            diferencas.append(f"espectro {linha}: proeminências diferentes")
+        _, _, esquerda, direita = peak_widths(y, picos, rel_height=0.5,
+                                              prominence_data=(info["prominences"], info["left_bases"], info["right_bases"]))
+        fwhm = np.abs(np.interp(direita, eixo, wl_nm) - np.interp(esquerda, eixo, wl_nm))
+        if not np.allclose(fwhm, tabela["fwhm_nm"][sel]):
+            diferencas.append(f"espectro {linha}: larguras diferentes")
+    return diferencas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detecta os picos de todos os espectros de uma pasta temporal de uma vez.")
+    parser.add_argument("pasta", help="Pasta com os espectros da série temporal")
+    parser.add_argument("--padrao", default=None, help="Padrão glob dos arquivos (default: spectrum*.txt, ou *.csv se não houver)")
+    parser.add_argument("--prominence", type=float, default=5.0, help="Proeminência mínima dos picos (default: 5)")
+    parser.add_argument("--saida", help="CSV onde gravar a tabela de picos (separador ';')")
+    parser.add_argument("--verificar", action="store_true", help="Confere o resultado com scipy.signal.find_peaks")
+    parser.add_argument("--no-cache", action="store_true", help="Converte os arquivos sem usar o cache de espectros")
+    args = parser.parse_args()
+    configurar_cache(ativo=not args.no_cache)
+
+    try:
+        wl, matriz, arquivos = carregar_pasta(args.pasta, args.padrao or "spectrum*.txt")
+    except FileNotFoundError:
+        if args.padrao is not None:
+            raise
+        wl, matriz, arquivos = carregar_pasta(args.pasta, "*.csv")
+    print(f"[INFO] {matriz.shape[0]} espectros, {matriz.shape[1]} pontos ({resumo_cache()})", file=sys.stderr)
+
+    t = time.perf_counter()
+    tabela = detectar_picos_matriz(wl, matriz, args.prominence)
+    print(f"[OK] {tabela['pixel'].size} picos em {time.perf_counter() - t:.3f} s", file=sys.stderr)
+
+    if args.verificar:
+        diferencas = verificar_find_peaks(wl, matriz, tabela, args.prominence)
+        for mensagem in diferencas[:20]:
+            print(f"[ERRO] {mensagem}", file=sys.stderr)
+        if diferencas:
+            sys.exit(1)
+        print("[OK] Igual a scipy.signal.find_peaks em todos os espectros", file=sys.stderr)
+
+    if args.saida:
+        with open(args.saida, "w") as f:
+            f.write("arquivo;" + ";".join(COLUNAS) + "\n")
+            for i in range(tabela["pixel"].size):
+                linha = tabela["espectro"][i]
+                f.write(f"{arquivos[linha].name};{linha};{tabela['pixel'][i]};{tabela['wl'][i]:.6f};"
+                        f"{tabela['altura'][i]:.6g};{tabela['prominencia'][i]:.6g};{tabela['fwhm_nm'][i]:.6f}\n")
+        print(f"[OK] Tabela salva em: {args.saida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
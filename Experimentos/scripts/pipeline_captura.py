@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline de aquisição em threads, desacoplado do laço ``update()`` do Tk.
+
+Uma thread produtora é dona da fonte de frames (``fontes_frames.py``) e
+insere os frames em um anel limitado; uma thread de processamento transforma cada frame em espectro
+e guarda apenas o resultado mais recente, que a thread do Tk consulta quando
+for redesenhar. Assim, um redesenho ou uma escrita em disco lenta não fazem
+a câmera perder frames.
+"""
+
+import threading
+import time
+from collections import deque
+
+from instrumentacao import Instrumentacao
+
+
+class AnelFrames:
+    """Fila circular limitada; quando cheia, o item mais antigo é descartado."""
+
+    def __init__(self, capacidade=8):
+        self._fila = deque(maxlen=max(1, int(capacidade)))
+        self._cond = threading.Condition()
+        self.descartados = 0
+
+    def inserir(self, item):
+        with self._cond:
+            if len(self._fila) == self._fila.maxlen:
+                self.descartados += 1
+            self._fila.append(item)
+            self._cond.notify()
+
+    def retirar(self, timeout=None):
+        """Retira o item mais antigo, esperando até ``timeout`` segundos. Retorna None se vazio."""
+        with self._cond:
+            if not self._fila:
+                self._cond.wait(timeout)
+            if not self._fila:
+                return None
+            return self._fila.popleft()
+
+    def limpar(self):
+        with self._cond:
+            self._fila.clear()
+
+    def __len__(self):
+        return len(self._fila)
+
+
+class PipelineAquisicao:
+    """
+    Captura e processamento em threads separadas.
+
+    ``processar(frame)`` é chamado na thread de processamento e seu retorno é
+    entregue em ``ultimo_resultado()`` como um dicionário com as chaves
+    ``seq``, ``timestamp``, ``capturado_em`` (``time.perf_counter()`` da
+    captura), ``frame``, ``espectro`` e ``erro``.
+    """
+
+    def __init__(self, processar, tamanho_anel=8, instrumentacao=None):
+        """
+        Args:
+            processar: Função frame -> espectro executada na thread de processamento
+            tamanho_anel: Número máximo de frames aguardando processamento
+            instrumentacao: ``Instrumentacao`` para as etapas "leitura" e
+                "processamento" (None = desativada)
+        """
+        self.processar = processar
+        self.anel = AnelFrames(tamanho_anel)
+        self.instrumentacao = instrumentacao if instrumentacao is not None else Instrumentacao()
+
+        self._fonte = None
+        self._lock_fonte = threading.Lock()
+
+        self._resultado = None
+        self._lock_resultado = threading.Lock()
+
+        self._parar = threading.Event()
+        self._threads = []
+        self.pausado = False
+        self.falha = False
+        self.fim = False
+
+        self.frames_capturados = 0
+        self.frames_processados = 0
+        self.erros_processamento = 0
+        self.resultados_nao_exibidos = 0
+
+    # ------------------------------------------------------------------
+    # Fonte de frames
+    # ------------------------------------------------------------------
+
+    def trocar_fonte(self, fonte):
+        """
+        Substitui a fonte de captura, liberando a anterior.
+
+        Args:
+            fonte: ``FonteFrames`` (o ritmo de vídeos e imagens é definido pela própria fonte)
+        """
+        with self._lock_fonte:
+            antiga = self._fonte
+            self._fonte = fonte
+            self.falha = False
+            self.fim = False
+        if antiga is not None and antiga is not fonte:
+            antiga.release()
+        self.anel.limpar()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def iniciar(self):
+        if self._threads:
+            return
+        self._parar.clear()
+        self._threads = [
+            threading.Thread(target=self._laco_captura, name="osa-captura", daemon=True),
+            threading.Thread(target=self._laco_processamento, name="osa-processamento", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def parar(self, timeout=1.0):
+        self._parar.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def release(self):
+        """Para as threads e libera a fonte (mesmo nome de ``cv2.VideoCapture.release``)."""
+        self.parar()
+        with self._lock_fonte:
+            if self._fonte is not None:
+                self._fonte.release()
+            self._fonte = None
+
+    # ------------------------------------------------------------------
+    # Threads
+    # ------------------------------------------------------------------
+
+    def _laco_captura(self):
+        while not self._parar.is_set():
+            if self.pausado or self.falha or self.fim or self._fonte is None:
+                time.sleep(0.01)
+                continue
+            with self._lock_fonte:
+                if self._fonte is None:
+                    continue
+                with self.instrumentacao.etapa("leitura"):
+                    frame = self._fonte.ler()
+                if frame is None:
+                    # Câmera: falha do dispositivo; gravação: chegou ao fim
+                    if self._fonte.ao_vivo:
+                        self.falha = True
+                    else:
+                        self.fim = True
+                    continue
+            self.frames_capturados += 1
+            self.instrumentacao.marcar("capturados")
+            self.anel.inserir((frame, time.perf_counter()))
+
+    def _laco_processamento(self):
+        while not self._parar.is_set():
+            item = self.anel.retirar(timeout=0.1)
+            if item is None:
+                continue
+            (seq, timestamp, frame), capturado_em = item
+            espectro, erro = None, None
+            try:
+                with self.instrumentacao.etapa("processamento"):
+                    espectro = self.processar(frame)
+            except Exception as e:
+                erro = e
+                self.erros_processamento += 1
+            self.frames_processados += 1
+            with self._lock_resultado:
+                if self._resultado is not None:
+                    self.resultados_nao_exibidos += 1
+                self._resultado = {
+                    "seq": seq,
+                    "timestamp": timestamp,
+                    "capturado_em": capturado_em,
+                    "frame": frame,
+                    "espectro": espectro,
+                    "erro": erro,
+                }
+
+    # ------------------------------------------------------------------
+    # Consulta (thread do Tk)
+    # ------------------------------------------------------------------
+
+    def ultimo_resultado(self):
+        """Retorna o resultado mais recente ainda não consumido, ou None."""
+        with self._lock_resultado:
+            resultado = self._resultado
+            self._resultado = None
+        return resultado
+
+    def estatisticas(self):
+        """Contadores de frames capturados, processados e descartados."""
+        return {
+            "capturados": self.frames_capturados,
+            "processados": self.frames_processados,
+            "descartados": self.anel.descartados,
+            "nao_exibidos": self.resultados_nao_exibidos,
+            "erros": self.erros_processamento,
+        }
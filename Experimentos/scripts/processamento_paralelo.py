@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Processamento de muitos arquivos de espectro em paralelo, por processos.
+
+``mapear_arquivos(arquivos, funcao, jobs)`` aplica ``funcao(arquivo)`` a cada
+arquivo e devolve os resultados na ordem dos arquivos, qualquer que seja o
+número de processos: o resultado é o mesmo do laço serial. Os arquivos são
+enviados aos processos em lotes, para que o custo de comunicação não domine
+quando cada arquivo é pequeno. Uma exceção em um arquivo fica registrada só
+para ele, sem interromper os demais.
+
+``funcao`` precisa ser serializável (função de módulo ou ``functools.partial``
+de uma), como exige ``concurrent.futures.ProcessPoolExecutor``. As
+estatísticas do cache de espectros (``espectro_io.estatisticas_cache``)
+acumuladas nos processos são somadas às do processo principal, para que
+``resumo_cache()`` reflita as leituras feitas em paralelo.
+
+Uso:
+    for arquivo, resultado, erro in mapear_arquivos(arquivos, partial(processar, prominence=5), jobs=0):
+        ...
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from espectro_io import estatisticas_cache, somar_estatisticas_cache
+
+
+def numero_processos(jobs):
+    """``jobs`` <= 0 (ou None) usa todos os núcleos."""
+    if jobs is None or jobs <= 0:
+        return os.cpu_count() or 1
+    return int(jobs)
+
+
+def _processar_lote(funcao, lote):
+    """Roda ``funcao`` em cada arquivo do lote, guardando a mensagem de erro no lugar do resultado."""
+    saidas = []
+    for arquivo in lote:
+        try:
+            saidas.append((funcao(arquivo), None))
+        except Exception as e:
+            saidas.append((None, str(e)))
+    return saidas
+
+
+def _processar_lote_com_cache(funcao, lote):
+    """``_processar_lote`` mais a variação das estatísticas do cache neste processo durante o lote."""
+    antes = estatisticas_cache()
+    saidas = _processar_lote(funcao, lote)
+    depois = estatisticas_cache()
+    return saidas, {chave: depois[chave] - antes[chave] for chave in depois}
+
+
+def mapear_arquivos(arquivos, funcao, jobs=1, tamanho_lote=None):
+    """
+    Aplica ``funcao`` a cada arquivo, em paralelo quando ``jobs`` != 1.
+
+    Args:
+        arquivos: Sequência de caminhos
+        funcao: Função arquivo -> resultado (serializável)
+        jobs: Número de processos (1 = no próprio processo, <= 0 = todos os núcleos)
+        tamanho_lote: Arquivos por tarefa enviada a um processo (None = automático)
+
+    Yields:
+        Tuplas (arquivo, resultado, erro) na ordem de ``arquivos``; ``erro`` é a
+        mensagem da exceção (e ``resultado`` é None) quando o arquivo falhou
+    """
+    arquivos = list(arquivos)
+    jobs = min(numero_processos(jobs), max(1, len(arquivos)))
+    if jobs == 1:
+        for arquivo in arquivos:
+            (resultado, erro), = _processar_lote(funcao, [arquivo])
+            yield arquivo, resultado, erro
+        return
+
+    if tamanho_lote is None:
+        # ~4 lotes por processo equilibram a carga sem multiplicar as mensagens
+        tamanho_lote = min(64, max(1, -(-len(arquivos) // (4 * jobs))))
+    lotes = [arquivos[i:i + tamanho_lote] for i in range(0, len(arquivos), tamanho_lote)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for lote, (saidas, estatisticas) in zip(lotes, executor.map(_processar_lote_com_cache, repeat(funcao), lotes)):
+            somar_estatisticas_cache(estatisticas)
+            for arquivo, (resultado, erro) in zip(lote, saidas):
+                yield arquivo, resultado, erro
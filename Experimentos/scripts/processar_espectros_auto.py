@@ -11,6 +11,8 @@ import numpy as np
 from scipy.optimize import curve_fit
 from datetime import datetime
 
+from espectro_io import carregar_espectro
+
 
 # ========== DEFINIÇÕES DE INTERVALOS ==========
 
@@ -69,54 +71,17 @@ INTERVALOS_OSA = {
 # ========== FUNÇÕES DE LEITURA DE ESPECTROS ==========
 
 def ler_espectro_osa_visivel(caminho):
-    """Lê espectro OSA Visível (wl em metros)."""
-    wl_m = []
-    intensity = []
+    """Lê espectro OSA Visível (wl em metros no arquivo, devolvido em nm)."""
     try:
-        with open(caminho, "r", encoding="utf-8", errors="replace") as f:
-            for linha in f:
-                partes = linha.strip().split(";")
-                if len(partes) >= 2:
-                    try:
-                        wl_m.append(float(partes[0]))
-                        intensity.append(float(partes[1]))
-                    except ValueError:
-                        continue
+        return carregar_espectro(caminho, "visivel")
     except Exception:
         return None, None
-    if not wl_m:
-        return None, None
-    wl_nm = np.array(wl_m) * 1e9  # Converte para nm
-    return wl_nm, np.array(intensity)
 
 
 def ler_espectro_thorlabs(caminho):
     """Lê espectro ThorLabs CSV (wl em nm)."""
     try:
-        with open(caminho, "r", encoding="utf-8", errors="ignore") as f:
-            linhas = f.readlines()
-        inicio_dados = None
-        for idx, linha in enumerate(linhas):
-            if "[Data]" in linha:
-                inicio_dados = idx + 1
-                break
-        if inicio_dados is None:
-            return None, None
-        wl_nm = []
-        intensity = []
-        for linha in linhas[inicio_dados:]:
-            linha = linha.strip()
-            if linha and not linha.startswith("#"):
-                partes = linha.split(";")
-                if len(partes) >= 2:
-                    try:
-                        wl_nm.append(float(partes[0]))
-                        intensity.append(float(partes[1]))
-                    except ValueError:
-                        continue
-        if not wl_nm:
-            return None, None
-        return np.array(wl_nm), np.array(intensity)
+        return carregar_espectro(caminho, "thorlabs")
     except Exception:
         return None, None
 
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rastreamento contínuo de picos com refinamento sub-pixel.
+
+Cada pico é seguido dentro de uma janela de ``2*meia_janela+1`` pontos
+centrada na posição do quadro anterior, então o custo por quadro é
+O(picos x janela), sem buscar o espectro inteiro. Todas as janelas são
+tratadas de uma vez como uma matriz ``(picos, janela)``:
+
+- centro: vértice da parábola pelos três pontos em torno do máximo
+  (``metodo="parabola"``) ou centroide da janela acima do mínimo
+  (``metodo="centroide"``);
+- altura: valor no vértice da parábola (ou máximo da janela);
+- FWHM: cruzamentos de meia altura interpolados linearmente, relativos
+  ao mínimo da janela.
+
+O histórico (centro, altura e FWHM por pico) fica em um anel de tamanho
+fixo, usado para a leitura de deriva ao vivo e para exportar em CSV.
+"""
+
+import numpy as np
+
+
+class RastreadorPicos:
+    """Segue um conjunto fixo de picos quadro a quadro."""
+
+    def __init__(self, wl_nm, centros_nm, meia_janela=30, metodo="parabola", proeminencia_minima=5.0, capacidade=3600):
+        """
+        Args:
+            wl_nm: Comprimentos de onda de cada ponto do espectro (crescentes)
+            centros_nm: Posições iniciais dos picos, em nm
+            meia_janela: Pontos de cada lado da posição anterior; a janela deve cobrir o pico até
+                abaixo da meia altura para que a FWHM seja medida (NaN caso contrário)
+            metodo: "parabola" ou "centroide"
+            proeminencia_minima: Abaixo disso (máximo - mínimo da janela) o pico é dado como perdido no quadro
+            capacidade: Amostras guardadas no histórico de cada pico
+        """
+        if metodo not in ("parabola", "centroide"):
+            raise ValueError(f"Método de refinamento desconhecido: {metodo}")
+        self.wl = np.asarray(wl_nm, dtype=float)
+        self.meia_janela = int(meia_janela)
+        self.metodo = metodo
+        self.proeminencia_minima = float(proeminencia_minima)
+        self._indices = np.arange(len(self.wl), dtype=float)
+        self._deslocamentos = np.arange(-self.meia_janela, self.meia_janela + 1)
+        if len(self.wl) < len(self._deslocamentos):
+            raise ValueError("Espectro menor que a janela de rastreamento")
+
+        # Posições em índice fracionário do espectro: semente do próximo quadro
+        self.posicoes = np.interp(np.asarray(centros_nm, dtype=float), self.wl, self._indices)
+        self.referencia_nm = None
+
+        self.capacidade = int(capacidade)
+        n_picos = len(self.posicoes)
+        self._tempos = np.full(self.capacidade, np.nan)
+        self._centros = np.full((self.capacidade, n_picos), np.nan)
+        self._alturas = np.full((self.capacidade, n_picos), np.nan)
+        self._larguras = np.full((self.capacidade, n_picos), np.nan)
+        self._proximo = 0
+        self.amostras = 0
+
+    @classmethod
+    def a_partir_do_espectro(cls, wl_nm, espectro, quantidade=3, proeminencia=5, **kwargs):
+        """
+        Semeia o rastreador com os ``quantidade`` picos mais proeminentes de ``espectro``.
+
+        Returns:
+            RastreadorPicos, ou None se nenhum pico for encontrado
+        """
+        from scipy.signal import find_peaks
+
+        picos, info = find_peaks(np.asarray(espectro, dtype=float), prominence=proeminencia)
+        if len(picos) == 0:
+            return None
+        escolhidos = np.sort(picos[np.argsort(info["prominences"])[::-1][:quantidade]])
+        return cls(wl_nm, np.asarray(wl_nm, dtype=float)[escolhidos], **kwargs)
+
+    @property
+    def n_picos(self):
+        return len(self.posicoes)
+
+    # ------------------------------------------------------------------
+    # Rastreamento
+    # ------------------------------------------------------------------
+
+    def atualizar(self, espectro, timestamp):
+        """
+        Localiza os picos em ``espectro`` a partir das posições anteriores.
+
+        Args:
+            espectro: Intensidades, alinhadas com ``wl_nm``
+            timestamp: Instante do quadro, em segundos
+
+        Returns:
+            Tupla (centros_nm, alturas, fwhm_nm); NaN para picos perdidos neste quadro
+        """
+        y = np.asarray(espectro, dtype=float)
+        m = self.meia_janela
+        largura = 2 * m + 1
+        linhas = np.arange(self.n_picos)
+
+        base = np.clip(np.rint(self.posicoes).astype(int), m, len(y) - 1 - m)
+        janelas = y[base[:, np.newaxis] + self._deslocamentos]          # (picos, janela)
+        minimos = janelas.min(axis=1)
+        k = np.clip(janelas.argmax(axis=1), 1, largura - 2)
+        y0 = janelas[linhas, k]
+        ym = janelas[linhas, k - 1]
+        yp = janelas[linhas, k + 1]
+
+        if self.metodo == "parabola":
+            curvatura = ym - 2.0 * y0 + yp
+            with np.errstate(divide="ignore", invalid="ignore"):
+                delta = np.where(curvatura < 0, 0.5 * (ym - yp) / curvatura, 0.0)
+            delta = np.clip(delta, -0.5, 0.5)
+            alturas = y0 - 0.25 * (ym - yp) * delta
+            relativo = k + delta
+        else:
+            pesos = janelas - minimos[:, np.newaxis]
+            soma = pesos.sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                relativo = np.where(soma > 0, (pesos * np.arange(largura)).sum(axis=1) / soma, k)
+            alturas = janelas.max(axis=1)
+
+        # FWHM: último ponto abaixo da meia altura à esquerda do máximo e primeiro à direita
+        meia = (minimos + (alturas - minimos) / 2.0)[:, np.newaxis]
+        colunas = np.arange(largura)
+        abaixo = janelas < meia
+        esquerda = abaixo & (colunas < k[:, np.newaxis])
+        direita = abaixo & (colunas > k[:, np.newaxis])
+        tem_esq = esquerda.any(axis=1)
+        tem_dir = direita.any(axis=1)
+        ie = largura - 1 - esquerda[:, ::-1].argmax(axis=1)
+        id_ = direita.argmax(axis=1)
+        ie1 = np.minimum(ie + 1, largura - 1)
+        id0 = np.maximum(id_ - 1, 0)
+        meia = meia[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_esq = ie + (meia - janelas[linhas, ie]) / (janelas[linhas, ie1] - janelas[linhas, ie])
+            x_dir = id0 + (janelas[linhas, id0] - meia) / (janelas[linhas, id0] - janelas[linhas, id_])
+        x_esq = np.where(tem_esq, x_esq, np.nan) + base - m
+        x_dir = np.where(tem_dir, x_dir, np.nan) + base - m
+        fwhm = np.interp(x_dir, self._indices, self.wl) - np.interp(x_esq, self._indices, self.wl)
+
+        posicoes = base - m + relativo
+        centros = np.interp(posicoes, self._indices, self.wl)
+
+        # Pico perdido (janela plana): mantém a semente anterior e registra NaN
+        valido = (janelas.max(axis=1) - minimos) >= self.proeminencia_minima
+        self.posicoes = np.where(valido, posicoes, self.posicoes)
+        centros = np.where(valido, centros, np.nan)
+        alturas = np.where(valido, alturas, np.nan)
+        fwhm = np.where(valido, fwhm, np.nan)
+        if self.referencia_nm is None and valido.all():
+            self.referencia_nm = centros.copy()
+
+        i = self._proximo
+        self._tempos[i] = timestamp
+        self._centros[i] = centros
+        self._alturas[i] = alturas
+        self._larguras[i] = fwhm
+        self._proximo = (i + 1) % self.capacidade
+        self.amostras += 1
+        return centros, alturas, fwhm
+
+    # ------------------------------------------------------------------
+    # Histórico e deriva
+    # ------------------------------------------------------------------
+
+    def historico(self):
+        """
+        Returns:
+            Dicionário com ``timestamp`` (n,) e ``centro_nm``, ``altura``,
+            ``fwhm_nm`` (n, picos), em ordem cronológica
+        """
+        n = min(self.amostras, self.capacidade)
+        ordem = (np.arange(n) + (self._proximo - n)) % self.capacidade
+        return {
+            "timestamp": self._tempos[ordem],
+            "centro_nm": self._centros[ordem],
+            "altura": self._alturas[ordem],
+            "fwhm_nm": self._larguras[ordem],
+        }
+
+    def deriva(self):
+        """
+        Returns:
+            Tupla (deriva_nm, taxa_nm_min): deslocamento do último centro em relação
+            ao primeiro quadro com todos os picos, e inclinação do ajuste linear do
+            centro no tempo sobre o histórico
+        """
+        hist = self.historico()
+        centros = hist["centro_nm"]
+        if len(centros) == 0 or self.referencia_nm is None:
+            vazio = np.full(self.n_picos, np.nan)
+            return vazio, vazio.copy()
+        deriva = centros[-1] - self.referencia_nm
+
+        t = hist["timestamp"][:, np.newaxis] - hist["timestamp"][0]
+        valido = ~np.isnan(centros)
+        contagem = valido.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_medio = np.where(valido, t, 0.0).sum(axis=0) / contagem
+            c_medio = np.where(valido, centros, 0.0).sum(axis=0) / contagem
+            dt = np.where(valido, t - t_medio, 0.0)
+            dc = np.where(valido, centros - c_medio, 0.0)
+            taxa = (dt * dc).sum(axis=0) / (dt * dt).sum(axis=0) * 60.0
+        return deriva, taxa
+
+    def linha_deriva(self):
+        """Texto curto com centro, deriva e taxa de cada pico, para a leitura ao vivo."""
+        hist = self.historico()
+        if len(hist["timestamp"]) == 0:
+            return "Rastreio: sem amostras"
+        deriva, taxa = self.deriva()
+        partes = []
+        for i, (centro, fwhm) in enumerate(zip(hist["centro_nm"][-1], hist["fwhm_nm"][-1])):
+            if np.isnan(centro):
+                partes.append(f"P{i + 1}: perdido")
+            else:
+                partes.append(f"P{i + 1}: {centro:.2f} nm  Δ {deriva[i]:+.3f} nm  ({taxa[i]:+.3f} nm/min)  FWHM {fwhm:.1f}")
+        return "\n".join(partes)
+
+    def exportar(self, caminho):
+        """Exporta o histórico em CSV: ``timestamp;pico;centro_nm;altura;fwhm_nm``."""
+        hist = self.historico()
+        with open(caminho, "w") as f:
+            f.write("timestamp;pico;centro_nm;altura;fwhm_nm\n")
+            for j, t in enumerate(hist["timestamp"]):
+                for i in range(self.n_picos):
+                    f.write(f"{t:.6f};{i + 1};{hist['centro_nm'][j, i]:.5f};{hist['altura'][j, i]:.4f};{hist['fwhm_nm'][j, i]:.4f}\n")
+        return len(hist["timestamp"])
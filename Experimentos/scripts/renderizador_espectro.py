@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renderização do espectro ao vivo com blitting e reaproveitamento de artistas.
+
+O fundo do gráfico (eixos, grade, marcadores) é guardado em cache e apenas a
+linha e o preenchimento em degradê são redesenhados a cada quadro. Os
+vértices do degradê ficam em um único array ``(n, 5, 2)`` que é atualizado
+no lugar: os ``Path`` da ``PolyCollection`` são vistas desse array.
+"""
+
+import time
+
+import numpy as np
+from matplotlib.collections import PolyCollection
+
+
+class RenderizadorEspectro:
+    """Desenha linha + degradê do espectro em um ``FigureCanvasTkAgg`` usando blit."""
+
+    def __init__(self, ax, canvas, wl, cores=None, cor_linha="b", lw=1.5, alpha=1.0, fps_maximo=None):
+        """
+        Args:
+            ax: Eixos onde o espectro é desenhado
+            canvas: Canvas do matplotlib (precisa suportar copy_from_bbox/blit)
+            wl: Comprimentos de onda (eixo x), fixos durante a vida do renderizador
+            cores: Cores de cada trapézio do degradê (len(wl)-1), ou None para desenhar só a linha
+            cor_linha: Cor da linha principal
+            lw: Espessura da linha
+            alpha: Transparência da linha
+            fps_maximo: Taxa máxima de redesenho; quadros acima dela são ignorados (None = sem limite)
+        """
+        self.ax = ax
+        self.canvas = canvas
+        self.wl = np.asarray(wl, dtype=float)
+        self.periodo_minimo = 1.0 / fps_maximo if fps_maximo else 0.0
+        self.ultimo_desenho = 0.0
+        self.quadros_desenhados = 0
+        self.quadros_ignorados = 0
+        self._fundo = None
+
+        zeros = np.zeros_like(self.wl)
+        self.linha, = ax.plot(self.wl, zeros, color=cor_linha, lw=lw, alpha=alpha, animated=True)
+
+        self.poly = None
+        self._vertices = None
+        if cores is not None:
+            # Trapézio j: (wl[j], 0) -> (wl[j], y[j]) -> (wl[j+1], y[j+1]) -> (wl[j+1], 0) -> fecha
+            n = len(self.wl) - 1
+            self._vertices = np.zeros((n, 5, 2))
+            self._vertices[:, [0, 1, 4], 0] = self.wl[:-1, np.newaxis]
+            self._vertices[:, [2, 3], 0] = self.wl[1:, np.newaxis]
+            self.poly = PolyCollection([], facecolors=cores, edgecolors="none", animated=True)
+            # closed=False: cada Path referencia diretamente uma fatia de self._vertices
+            self.poly.set_verts(self._vertices, closed=False)
+            ax.add_collection(self.poly)
+
+        self._cid = canvas.mpl_connect("draw_event", self._on_draw)
+        canvas.draw()
+
+    def _on_draw(self, event):
+        """Após um desenho completo (resize, marcadores, tema), renova o fundo em cache."""
+        self._fundo = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._desenhar_artistas()
+
+    def _desenhar_artistas(self):
+        if self.poly is not None:
+            self.ax.draw_artist(self.poly)
+        self.ax.draw_artist(self.linha)
+
+    def desenhar(self, espectro, forcar=False):
+        """
+        Atualiza linha e degradê com ``espectro`` e faz o blit.
+
+        Returns:
+            False se o quadro foi ignorado pelo limite de taxa
+        """
+        agora = time.perf_counter()
+        if not forcar and agora - self.ultimo_desenho < self.periodo_minimo:
+            self.quadros_ignorados += 1
+            return False
+        self.ultimo_desenho = agora
+
+        espectro = np.asarray(espectro, dtype=float)
+        self.linha.set_ydata(espectro)
+        if self.poly is not None:
+            self._vertices[:, 1, 1] = espectro[:-1]
+            self._vertices[:, 2, 1] = espectro[1:]
+            self.poly.stale = True
+
+        if self._fundo is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._fundo)
+            self._desenhar_artistas()
+            self.canvas.blit(self.ax.bbox)
+        self.quadros_desenhados += 1
+        return True
+
+    def remover(self):
+        """Desconecta o callback e remove os artistas dos eixos."""
+        self.canvas.mpl_disconnect(self._cid)
+        self.linha.remove()
+        if self.poly is not None:
+            self.poly.remove()
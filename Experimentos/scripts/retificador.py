@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Retificação apenas da faixa de interesse (ROI) em torno da reta de calibração.
+
+``rotacionar_e_cortar_imagem`` gira o frame inteiro com ``cv2.warpAffine`` e
+depois recorta uma faixa de 300x40. Compondo a rotação com a translação do
+recorte obtém-se uma única matriz afim que leva o frame diretamente para a
+faixa de saída: o ``warpAffine`` passa a calcular apenas os pixels da faixa,
+com a mesma interpolação bilinear e o mesmo resultado.
+"""
+
+import numpy as np
+import cv2
+
+
+class Retificador:
+    """Faixa ``largura x altura`` centrada em ``centro`` e alinhada à reta de calibração."""
+
+    def __init__(self, coeficientes, centro, largura=300, altura=40):
+        """
+        Args:
+            coeficientes: Coeficientes (inclinação, intercepto) da reta
+            centro: Ponto (x, y) central da faixa
+            largura: Largura da faixa de saída em pixels
+            altura: Altura da faixa de saída em pixels
+        """
+        self.coeficientes = None
+        self.centro = None
+        self.largura = None
+        self.altura = None
+        self.matriz = None
+        self.atualizar(coeficientes, centro, largura, altura)
+
+    def atualizar(self, coeficientes, centro, largura=None, altura=None):
+        """
+        Recalcula a matriz afim apenas se a calibração tiver mudado.
+
+        Returns:
+            True se a matriz foi recalculada
+        """
+        coeficientes = tuple(float(c) for c in coeficientes[:2])
+        centro = (float(centro[0]), float(centro[1]))
+        largura = int(largura if largura is not None else self.largura)
+        altura = int(altura if altura is not None else self.altura)
+        if (coeficientes, centro, largura, altura) == (self.coeficientes, self.centro, self.largura, self.altura):
+            return False
+
+        angulo_graus = np.degrees(np.arctan(coeficientes[0]))
+        matriz = cv2.getRotationMatrix2D(centro, angulo_graus, 1)
+        # Mesmo recorte de rotacionar_e_cortar_imagem, aplicado como translação
+        self.x1 = int(centro[0] - largura / 2)
+        self.y1 = int(centro[1] - altura / 2)
+        matriz[0, 2] -= self.x1
+        matriz[1, 2] -= self.y1
+
+        self.coeficientes, self.centro, self.largura, self.altura = coeficientes, centro, largura, altura
+        self.matriz = matriz
+        return True
+
+    def dentro_do_frame(self, altura_frame, largura_frame):
+        """True se o recorte cabe no frame (o recorte original seria truncado caso contrário)."""
+        return (self.x1 >= 0 and self.y1 >= 0
+                and self.x1 + self.largura <= largura_frame
+                and self.y1 + self.altura <= altura_frame)
+
+    def retificar(self, frame):
+        """
+        Retorna a faixa retificada (``altura x largura``), ou None se ela sair do frame.
+
+        Args:
+            frame: Frame BGR ou em tons de cinza
+        """
+        if not self.dentro_do_frame(frame.shape[0], frame.shape[1]):
+            return None
+        return cv2.warpAffine(frame, self.matriz, (self.largura, self.altura))
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local (TCP) que publica os espectros ao vivo para outros processos.
+
+Cada mensagem começa com ``<4sBI``: ``b"OSAE"``, tipo e tamanho do corpo.
+    tipo 1 (cabeçalho) -> JSON com ``wl_nm``, ``canais``, ``dtype`` e extras;
+                          reenviado sempre que a calibração muda
+    tipo 2 (espectro)  -> ``<QdIII`` (seq, timestamp, descartados, linhas,
+                          pontos) seguido das intensidades em ``dtype``
+
+Ao conectar, o assinante envia uma linha JSON (ex.: ``{"a_cada": 5}`` para
+receber um espectro a cada 5) e recebe o cabeçalho. ``publicar`` serializa
+o espectro uma vez e apenas o coloca na fila de cada assinante: cada um tem
+uma fila curta e uma thread de envio própria, então um consumidor lento
+perde os espectros mais antigos (contados em ``descartados``) sem atrasar a
+aquisição nem os outros assinantes.
+
+Uso típico (tudo em localhost):
+    python Experimentos/scripts/aquisicao_headless.py --sintetica --duracao 60 --servidor 5055
+    python Experimentos/scripts/servidor_espectros.py assinar --porta 5055
+"""
+
+import argparse
+import json
+import socket
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+
+MAGICO = b"OSAE"
+PREFIXO = struct.Struct("<4sBI")
+CABECALHO_ESPECTRO = struct.Struct("<QdIII")
+TIPO_CABECALHO = 1
+TIPO_ESPECTRO = 2
+PORTA_PADRAO = 5055
+
+EspectroRecebido = namedtuple("EspectroRecebido", ["seq", "timestamp", "descartados", "intensidades"])
+
+
+def _mensagem(tipo, corpo):
+    return PREFIXO.pack(MAGICO, tipo, len(corpo)) + corpo
+
+
+class _Assinante:
+    """Conexão de um assinante: fila dos espectros mais recentes + thread de envio."""
+
+    def __init__(self, servidor, conexao, endereco, tamanho_fila):
+        self.servidor = servidor
+        self.conexao = conexao
+        self.endereco = endereco
+        self.fila = deque(maxlen=tamanho_fila)
+        self.cond = threading.Condition()
+        self.a_cada = 1
+        self.recebidos = 0
+        self.enviados = 0
+        self.descartados = 0
+        self.cabecalho_pendente = True
+        self.ativo = True
+        self.thread = threading.Thread(target=self._laco, name=f"osa-assinante-{endereco[1]}", daemon=True)
+
+    def enfileirar(self, item):
+        with self.cond:
+            self.recebidos += 1
+            if (self.recebidos - 1) % self.a_cada:
+                return
+            if len(self.fila) == self.fila.maxlen:
+                self.descartados += 1   # deque com maxlen descarta o mais antigo
+            self.fila.append(item)
+            self.cond.notify()
+
+    def novo_cabecalho(self):
+        """Calibração mudou: espectros pendentes são descartados e o cabeçalho vai antes do próximo."""
+        with self.cond:
+            self.fila.clear()
+            self.cabecalho_pendente = True
+            self.cond.notify()
+
+    def _ler_assinatura(self):
+        """Lê a linha JSON de assinatura (opcional: sem ela em 1 s, usa os padrões)."""
+        self.conexao.settimeout(1.0)
+        dados = b""
+        try:
+            while not dados.endswith(b"\n") and len(dados) < 4096:
+                parte = self.conexao.recv(4096)
+                if not parte:
+                    break
+                dados += parte
+        except socket.timeout:
+            pass
+        self.conexao.settimeout(None)
+        if dados.strip():
+            try:
+                pedido = json.loads(dados.decode("utf-8"))
+                self.a_cada = max(1, int(pedido.get("a_cada", 1)))
+            except (ValueError, AttributeError):
+                pass
+
+    def _laco(self):
+        try:
+            self._ler_assinatura()
+            while self.ativo:
+                with self.cond:
+                    while self.ativo and not self.fila and not self.cabecalho_pendente:
+                        self.cond.wait(0.5)
+                    if not self.ativo:
+                        break
+                    enviar_cabecalho, self.cabecalho_pendente = self.cabecalho_pendente, False
+                    item = self.fila.popleft() if self.fila and not enviar_cabecalho else None
+                    descartados = self.descartados
+                if enviar_cabecalho:
+                    self.conexao.sendall(self.servidor._cabecalho)
+                    continue
+                seq, timestamp, linhas, pontos, dados = item
+                cabecalho = CABECALHO_ESPECTRO.pack(seq, timestamp, descartados, linhas, pontos)
+                corpo = cabecalho + dados
+                self.conexao.sendall(PREFIXO.pack(MAGICO, TIPO_ESPECTRO, len(corpo)) + corpo)
+                self.enviados += 1
+        except OSError:
+            pass
+        finally:
+            self.fechar()
+            self.servidor._remover(self)
+
+    def fechar(self):
+        with self.cond:
+            self.ativo = False
+            self.cond.notify()
+        try:
+            self.conexao.close()
+        except OSError:
+            pass
+
+
+class ServidorEspectros:
+    """Publica espectros para assinantes TCP locais sem bloquear quem publica."""
+
+    def __init__(self, host="127.0.0.1", porta=PORTA_PADRAO, tamanho_fila=8, dtype="<f4"):
+        """
+        Args:
+            host: Interface de escuta (padrão: apenas localhost)
+            porta: Porta TCP (0 = escolhida pelo sistema, ver ``endereco``)
+            tamanho_fila: Espectros pendentes por assinante antes de descartar os mais antigos
+            dtype: Tipo das intensidades enviadas ("<f4" compacto, "<f8" sem perdas)
+        """
+        self.host = host
+        self.porta = int(porta)
+        self.tamanho_fila = int(tamanho_fila)
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._assinantes = []
+        self._socket = None
+        self._thread = None
+        self._cabecalho = _mensagem(TIPO_CABECALHO, b"{}")
+        self.seq = 0
+
+    def iniciar(self):
+        """Abre a porta e começa a aceitar assinantes em uma thread daemon."""
+        if self._socket is not None:
+            return
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.porta))
+        self._socket.listen()
+        self._thread = threading.Thread(target=self._aceitar, name="osa-servidor-espectros", daemon=True)
+        self._thread.start()
+
+    @property
+    def endereco(self):
+        return self._socket.getsockname() if self._socket is not None else (self.host, self.porta)
+
+    @property
+    def n_assinantes(self):
+        with self._lock:
+            return len(self._assinantes)
+
+    def _aceitar(self):
+        while self._socket is not None:
+            try:
+                conexao, endereco = self._socket.accept()
+            except OSError:
+                break
+            conexao.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            assinante = _Assinante(self, conexao, endereco, self.tamanho_fila)
+            with self._lock:
+                self._assinantes.append(assinante)
+            assinante.thread.start()
+
+    def _remover(self, assinante):
+        with self._lock:
+            if assinante in self._assinantes:
+                self._assinantes.remove(assinante)
+
+    def definir_cabecalho(self, wl_nm, canais=None, **extras):
+        """
+        Define (e reenvia aos assinantes conectados) o cabeçalho da transmissão.
+
+        Args:
+            wl_nm: Eixo de comprimento de onda dos espectros publicados
+            canais: Nomes das linhas de espectros multicanal (ex.: ``CANAIS``), opcional
+            extras: Campos JSON adicionais (filtros, calibração...)
+        """
+        cabecalho = {"wl_nm": [float(w) for w in wl_nm], "canais": list(canais) if canais else None,
+                     "dtype": self.dtype.str, **extras}
+        self._cabecalho = _mensagem(TIPO_CABECALHO, json.dumps(cabecalho).encode("utf-8"))
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for assinante in assinantes:
+            assinante.novo_cabecalho()
+
+    def publicar(self, espectro, timestamp=None):
+        """
+        Envia ``espectro`` (1D ou (linhas, pontos)) a todos os assinantes; nunca bloqueia.
+
+        Returns:
+            Número de assinantes que receberam o espectro na fila
+        """
+        self.seq += 1
+        with self._lock:
+            assinantes = list(self._assinantes)
+        if not assinantes:
+            return 0
+        matriz = np.atleast_2d(np.asarray(espectro, dtype=self.dtype))
+        item = (self.seq, time.time() if timestamp is None else float(timestamp),
+                matriz.shape[0], matriz.shape[1], matriz.tobytes())
+        for assinante in assinantes:
+            assinante.enfileirar(item)
+        return len(assinantes)
+
+    def estatisticas(self):
+        with self._lock:
+            return [{"endereco": f"{a.endereco[0]}:{a.endereco[1]}", "a_cada": a.a_cada,
+                     "enviados": a.enviados, "descartados": a.descartados} for a in self._assinantes]
+
+    def fechar(self):
+        if self._socket is not None:
+            socket_servidor, self._socket = self._socket, None
+            socket_servidor.close()
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for assinante in assinantes:
+            assinante.fechar()
+
+
+class AssinanteEspectros:
+    """Cliente: conecta ao servidor e recebe ``EspectroRecebido`` um a um."""
+
+    def __init__(self, host="127.0.0.1", porta=PORTA_PADRAO, a_cada=1, timeout=5.0):
+        """
+        Args:
+            host: Endereço do servidor
+            porta: Porta do servidor
+            a_cada: Recebe apenas um de cada ``a_cada`` espectros publicados
+            timeout: Tempo máximo de espera por mensagem, em segundos (None = sem limite)
+        """
+        self.conexao = socket.create_connection((host, int(porta)), timeout=timeout)
+        self.conexao.sendall(json.dumps({"a_cada": int(a_cada)}).encode("utf-8") + b"\n")
+        self.cabecalho = None
+        self.dtype = None
+        self.wl_nm = None
+        self._ler_cabecalho(*self._ler_mensagem())
+
+    def _ler_exato(self, n):
+        partes = bytearray()
+        while len(partes) < n:
+            parte = self.conexao.recv(n - len(partes))
+            if not parte:
+                raise ConnectionError("Conexão encerrada pelo servidor.")
+            partes += parte
+        return bytes(partes)
+
+    def _ler_mensagem(self):
+        magico, tipo, tamanho = PREFIXO.unpack(self._ler_exato(PREFIXO.size))
+        if magico != MAGICO:
+            raise ValueError("Mensagem inválida recebida do servidor de espectros.")
+        return tipo, self._ler_exato(tamanho)
+
+    def _ler_cabecalho(self, tipo, corpo):
+        if tipo != TIPO_CABECALHO:
+            raise ValueError("Esperado cabeçalho do servidor de espectros.")
+        self.cabecalho = json.loads(corpo.decode("utf-8"))
+        self.dtype = np.dtype(self.cabecalho.get("dtype", "<f4"))
+        self.wl_nm = np.asarray(self.cabecalho.get("wl_nm", []), dtype=float)
+
+    def receber(self):
+        """
+        Aguarda o próximo espectro (cabeçalhos novos atualizam ``cabecalho``/``wl_nm``).
+
+        Returns:
+            EspectroRecebido; ``intensidades`` é 1D, ou (linhas, pontos) em espectros multicanal
+        """
+        while True:
+            tipo, corpo = self._ler_mensagem()
+            if tipo == TIPO_CABECALHO:
+                self._ler_cabecalho(tipo, corpo)
+                continue
+            seq, timestamp, descartados, linhas, pontos = CABECALHO_ESPECTRO.unpack_from(corpo)
+            dados = np.frombuffer(corpo, dtype=self.dtype, offset=CABECALHO_ESPECTRO.size).reshape(linhas, pontos)
+            return EspectroRecebido(seq, timestamp, descartados, dados[0] if linhas == 1 else dados)
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.receber()
+            except ConnectionError:
+                return
+
+    def fechar(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assinante de linha de comando do servidor de espectros ao vivo.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_ass = sub.add_parser("assinar", help="Mostra um resumo de cada espectro recebido")
+    p_ass.add_argument("--host", default="127.0.0.1")
+    p_ass.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    p_ass.add_argument("--a-cada", type=int, default=1, help="Recebe um de cada N espectros (default: 1)")
+    p_ass.add_argument("--quantidade", type=int, help="Encerra após N espectros")
+    args = parser.parse_args()
+
+    with AssinanteEspectros(args.host, args.porta, args.a_cada, timeout=None) as assinante:
+        print(f"[OK] Conectado a {args.host}:{args.porta} ({len(assinante.wl_nm)} pontos)")
+        for k, recebido in enumerate(assinante, start=1):
+            y = recebido.intensidades if recebido.intensidades.ndim == 1 else recebido.intensidades[0]
+            pico = int(np.argmax(y))
+            wl_pico = assinante.wl_nm[pico] if pico < len(assinante.wl_nm) else float("nan")
+            print(f"{recebido.timestamp:.6f};seq {recebido.seq};pico {wl_pico:.2f} nm;max {y[pico]:.2f};"
+                  f"descartados {recebido.descartados}")
+            if args.quantidade is not None and k >= args.quantidade:
+                break
+
+
+if __name__ == "__main__":
+    main()
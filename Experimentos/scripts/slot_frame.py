@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Slot versionado para compartilhar o frame atual sem cópias.
+
+O produtor publica cada frame novo trocando a referência do slot (as fontes
+alocam um array novo a cada leitura, então o frame anterior continua válido
+para quem ainda o estiver usando: o slot funciona como um buffer duplo sem
+cópia). Os leitores recebem uma *view* somente leitura e a versão do frame;
+quem precisar desenhar sobre o frame faz a sua própria cópia com
+``copiar()``, ou usa a saída de ``cv2.cvtColor``/``cv2.resize``, que já é
+um array novo.
+"""
+
+import threading
+import time
+
+
+class SlotFrame:
+    """Frame mais recente + contador de versão, protegidos por um lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+        self.versao = 0
+        self.timestamp = None
+
+    def publicar(self, frame, timestamp=None):
+        """
+        Torna ``frame`` o frame atual (sem copiar os pixels).
+
+        Args:
+            frame: Array do frame; o produtor não deve alterá-lo depois de publicado
+            timestamp: Instante da captura (padrão: agora)
+        """
+        somente_leitura = None
+        if frame is not None:
+            somente_leitura = frame.view()
+            somente_leitura.flags.writeable = False
+        with self._lock:
+            self._frame = somente_leitura
+            self.timestamp = time.time() if timestamp is None else timestamp
+            self.versao += 1
+
+    def emprestar(self):
+        """
+        Retorna ``(versao, frame)`` com o frame como view somente leitura (ou None).
+
+        Escrever na view levanta ``ValueError``; use ``copiar()`` para anotar o frame.
+        """
+        with self._lock:
+            return self.versao, self._frame
+
+    def copiar(self):
+        """Retorna ``(versao, copia_gravavel)`` do frame atual (ou ``(versao, None)``)."""
+        versao, frame = self.emprestar()
+        return versao, (None if frame is None else frame.copy())
+
+    def limpar(self):
+        self.publicar(None)
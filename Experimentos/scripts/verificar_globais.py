@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verificação estática de variáveis globais não definidas.
+
+Procura, em cada função do arquivo, nomes lidos como globais (sem atribuição
+local) que não existem no nível do módulo: não são atribuídos, importados ou
+definidos ali, nem declarados ``global`` e atribuídos em alguma função, nem
+são builtins. É o caso de um widget criado como variável local de
+``osa_start`` e usado em outro callback, que só falha com ``NameError`` quando
+o callback roda.
+
+Não executa o arquivo (``interface.py`` abre a janela ao ser importado);
+usa apenas ``symtable``.
+
+Uso típico:
+    python Experimentos/scripts/verificar_globais.py
+    python Experimentos/scripts/verificar_globais.py outro_script.py
+
+Código de saída 1 se algum nome indefinido for encontrado.
+"""
+
+import argparse
+import builtins
+import symtable
+import sys
+from pathlib import Path
+
+
+PASTA_SCRIPTS = Path(__file__).resolve().parent
+
+
+def _funcoes(tabela):
+    """Todas as tabelas de função aninhadas em ``tabela`` (inclui métodos)."""
+    for filha in tabela.get_children():
+        if filha.get_type() == "function":
+            yield filha
+        yield from _funcoes(filha)
+
+
+def globais_indefinidas(caminho):
+    """
+    Nomes usados como globais em funções e nunca definidos no módulo.
+
+    Args:
+        caminho: Arquivo Python a verificar
+
+    Returns:
+        Lista ordenada de ``(nome, funcao, linha)``
+    """
+    codigo = Path(caminho).read_text(encoding="utf-8")
+    modulo = symtable.symtable(codigo, str(caminho), "exec")
+
+    definidos = set(dir(builtins)) | {"__file__", "__name__", "__doc__", "__spec__"}
+    for simbolo in modulo.get_symbols():
+        if simbolo.is_assigned() or simbolo.is_imported() or simbolo.is_namespace():
+            definidos.add(simbolo.get_name())
+    funcoes = list(_funcoes(modulo))
+    for funcao in funcoes:
+        for simbolo in funcao.get_symbols():
+            if simbolo.is_declared_global() and simbolo.is_assigned():
+                definidos.add(simbolo.get_name())
+
+    indefinidos = []
+    for funcao in funcoes:
+        for simbolo in funcao.get_symbols():
+            if simbolo.is_global() and simbolo.is_referenced() and simbolo.get_name() not in definidos:
+                indefinidos.append((simbolo.get_name(), funcao.get_name(), funcao.get_lineno()))
+    return sorted(indefinidos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nomes globais usados em funções e não definidos no módulo.")
+    parser.add_argument("arquivos", nargs="*", default=[str(PASTA_SCRIPTS / "interface.py")],
+                        help="Arquivos a verificar (padrão: interface.py)")
+    args = parser.parse_args()
+
+    problemas = 0
+    for arquivo in args.arquivos:
+        for nome, funcao, linha in globais_indefinidas(arquivo):
+            print(f"[ERRO] {arquivo}: '{nome}' usado em {funcao}() (linha {linha}) não é definido no módulo")
+            problemas += 1
+    if problemas == 0:
+        print(f"[OK] Nenhuma global indefinida em {len(args.arquivos)} arquivo(s).")
+    sys.exit(1 if problemas else 0)
+
+
+if __name__ == "__main__":
+    main()